@@ -0,0 +1,229 @@
+import numpy as np
+import pandas as pd
+from typing import NamedTuple, Union
+from psycopg2.extensions import connection as PgConnection
+from bess_intra_trading.utils import PositionTracker, setup_logger
+from bess_intra_trading.ledger import TradeLedger
+from bess_intra_trading.sources import MarketDataSource, PostgresSource
+from bess_intra_trading.cube import open_price_cube
+from bess_intra_trading.milp import BatteryModelTemplate
+from bess_intra_trading.model import solve_intrinsic_problem, drop_closed_products, SOLVERS
+from bess_intra_trading.strategy import cycle_allowance, day_cycles, trading_days
+
+
+log = setup_logger()
+
+# bess_params entries that may differ between the scenarios of a batch
+SCENARIO_PARAMS = (
+    "c_rate",
+    "efficiency",
+    "max_cycles",
+    "threshold",
+    "threshold_abs_min",
+    "discount_rate",
+    "min_trades",
+)
+
+
+class BatchResult(NamedTuple):
+    profits: pd.DataFrame  # scenario, day, profit, cycles
+    trades: pd.DataFrame  # scenario, execution_time, side, quantity, price, product, profit
+    schedules: pd.DataFrame  # scenario, day, product, net_buy, net_sell, battery_soc
+
+
+def _battery_soc(net_position, roundtrip_eff) -> np.ndarray:
+    """State of charge at the start of every product of a day's net positions, losses included."""
+    efficiency = roundtrip_eff ** 0.5
+    change = np.where(net_position >= 0, net_position * efficiency, net_position / efficiency)
+    return np.concatenate([[0.0], np.cumsum(change)[:-1]])
+
+
+def simulate_batch(
+        conn: Union[PgConnection, MarketDataSource],
+        scenarios: list,
+        start_date: pd.Timestamp,
+        end_date: pd.Timestamp,
+        solver: str = "cbc",
+        model_template: bool = False,
+        price_cube: Union[str, dict] = None,
+) -> BatchResult:
+    """
+    Runs the rolling intrinsic strategy for many parameter scenarios in one pass
+    over the market data.
+
+    Follows RollingIntrinsicStrategy.simulate with drop_closed_products and
+    prefetch: the same trading days and execution steps, the same cycle
+    allowance and cycle count, and the same solve_intrinsic_problem call per
+    scenario and step, so every scenario equals its single run. Prices are
+    fetched once per trading day with MarketDataSource.market_day and their
+    windows averaged once per min_trades value, the MILP solves are not shared:
+    a batch costs one solve per scenario and step, as many single runs do,
+    without their repeated price queries.
+
+    Args:
+        conn (PgConnection | MarketDataSource): Connection to the transaction database or
+            another source of the transactions.
+        scenarios (list): bess_params dicts, differing in SCENARIO_PARAMS.
+        start_date (pd.Timestamp): Start date of the simulation.
+        end_date (pd.Timestamp): End date of the simulation.
+        solver (str): MILP backend of every solve, see solve_intrinsic_problem.
+        model_template (bool): Patch one BatteryModelTemplate per scenario and product
+            grid instead of building a model per step, as simulate with model_template.
+        price_cube (str | dict): Price cube directory, or spec of a SharedPriceCube, to read the
+            prices from instead of conn.
+
+    Returns:
+        BatchResult: Daily profits, trades and end of day schedules per scenario.
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver '{solver}', choose one of {SOLVERS}")
+
+    dt = scenarios[0].get('time_step_h', 15)
+    lookback_h = scenarios[0].get('lookback_h', 8)
+    if any(
+            scenario.get('time_step_h', 15) != dt or scenario.get('lookback_h', 8) != lookback_h
+            for scenario in scenarios
+    ):
+        raise ValueError("All scenarios of a batch need the same time_step_h and lookback_h")
+
+    n_scenarios = len(scenarios)
+    cube = open_price_cube(price_cube) if price_cube else None
+    source = conn if isinstance(conn, MarketDataSource) else PostgresSource(conn)
+
+    # scenarios sharing the prices of a min_trades value
+    groups = {}
+    for k, scenario in enumerate(scenarios):
+        groups.setdefault(scenario['min_trades'], []).append(k)
+
+    profits = []
+    trades = []
+    schedules = []
+
+    current_cycles = np.zeros(n_scenarios)
+
+    # trades of the current day per scenario, reused from day to day
+    ledgers = [TradeLedger() for _ in scenarios]
+
+    for current_day in trading_days(start_date, end_date):
+
+        # lookback window of lookback_h hours before the trading day
+        trading_start = current_day - pd.Timedelta(hours=lookback_h)
+        trading_end = current_day + pd.Timedelta(days=1)
+
+        execution_time_start = trading_start
+        execution_time_end = trading_start + pd.Timedelta(minutes=dt)
+
+        days_left = (end_date - current_day).days
+
+        allowed_cycles = [
+            cycle_allowance(scenario['max_cycles'], days_left, current_cycles[k])
+            for k, scenario in enumerate(scenarios)
+        ]
+
+        # prices of all execution windows of the day from a single query
+        if cube is not None:
+            market_day = cube.market_day(trading_start, trading_end, 'BUY')
+        else:
+            market_day = source.market_day('BUY', trading_start, trading_end, dt)
+
+        for ledger in ledgers:
+            ledger.clear()
+        positions = [PositionTracker(trading_end) for _ in scenarios]
+        templates = [None] * n_scenarios
+
+        # net buy volume at the start of the day's last step, counted as the day's cycles
+        day_net_buy = np.zeros(n_scenarios)
+
+        while execution_time_end < trading_end:
+            for min_trades, members in groups.items():
+                volume_weighted_average_price = market_day.average_prices(execution_time_start, min_trades)
+                no_trades = volume_weighted_average_price["price"].isnull().all()
+                if no_trades:
+                    log.info("No trades in this quarter hour")
+
+                for k in members:
+                    scenario = scenarios[k]
+                    net_trades = positions[k].net_trades
+                    day_net_buy[k] = positions[k].net_buy.sum()
+
+                    if no_trades:
+                        continue
+
+                    # products past delivery start leave the model, see drop_closed_products
+                    prices_qh, initial_soc, cycles_used = drop_closed_products(
+                        volume_weighted_average_price,
+                        net_trades,
+                        execution_time_start,
+                        cap=1,
+                        roundtrip_eff=scenario['efficiency'],
+                    )
+
+                    if model_template and (
+                            templates[k] is None
+                            or not templates[k].index.equals(prices_qh.index)
+                    ):
+                        templates[k] = BatteryModelTemplate(
+                            prices_qh.index,
+                            cap=1,
+                            c_rate=scenario['c_rate'],
+                            roundtrip_eff=scenario['efficiency'],
+                        )
+
+                    try:
+                        _, step_trades, _ = solve_intrinsic_problem(
+                            prices_qh=prices_qh,
+                            execution_time=execution_time_start,
+                            cap=1,
+                            c_rate=scenario['c_rate'],
+                            roundtrip_eff=scenario['efficiency'],
+                            max_cycles=allowed_cycles[k] - cycles_used,
+                            threshold=scenario['threshold'],
+                            threshold_abs_min=scenario['threshold_abs_min'],
+                            discount_rate=scenario['discount_rate'],
+                            prev_net_trades=net_trades,
+                            solver=solver,
+                            template=templates[k],
+                            initial_soc=initial_soc,
+                        )
+                    except ValueError:
+                        log.info("Error in optimization for scenario {}".format(k))
+                        log.info("execution_time_start: {}".format(execution_time_start))
+                        continue
+
+                    ledgers[k].extend(step_trades)
+                    positions[k].add(step_trades)
+
+            execution_time_start = execution_time_end
+            execution_time_end = execution_time_end + pd.Timedelta(
+                minutes=dt
+            )
+
+        for k, scenario in enumerate(scenarios):
+            current_cycles[k] += day_cycles(day_net_buy[k], scenario['efficiency'])
+
+            profits.append((k, current_day, ledgers[k].total_profit(), current_cycles[k]))
+
+            day_trades = ledgers[k].frame()
+            day_trades.insert(0, "scenario", k)
+            trades.append(day_trades)
+
+            # end of day positions and the state of charge at the start of every product
+            net_position = positions[k].sum_buy - positions[k].sum_sell
+            schedules.append(
+                pd.DataFrame(
+                    {
+                        "scenario": k,
+                        "day": current_day,
+                        "product": positions[k].products,
+                        "net_buy": np.maximum(net_position, 0.0),
+                        "net_sell": np.maximum(-net_position, 0.0),
+                        "battery_soc": _battery_soc(net_position, scenario['efficiency']),
+                    }
+                )
+            )
+
+    return BatchResult(
+        profits=pd.DataFrame(profits, columns=["scenario", "day", "profit", "cycles"]),
+        trades=pd.concat(trades, ignore_index=True),
+        schedules=pd.concat(schedules, ignore_index=True),
+    )
@@ -0,0 +1,149 @@
+import pickle
+import time
+import pandas as pd
+import numpy as np
+from bess_intra_trading.model import solve_intrinsic_problem
+
+
+# engines to replay the intrinsic problem with, as keyword arguments of solve_intrinsic_problem
+ENGINES = {
+    "cbc": dict(solver="cbc"),
+    "cbc-compact": dict(solver="cbc", formulation="compact"),
+    "highs": dict(solver="highs"),
+    "highs-compact": dict(solver="highs", formulation="compact"),
+    "highs-compact-lp": dict(solver="highs", formulation="compact", lp_relaxation=True),
+}
+
+
+def save_cases(cases: list, path: str):
+    """Pickles recorded intrinsic problems, see RollingIntrinsicStrategy's 'record_cases' option."""
+    with open(path, "wb") as f:
+        pickle.dump(cases, f)
+
+
+def load_cases(path: str) -> list:
+    """Loads intrinsic problems saved with save_cases."""
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def make_cases(num_cases: int = 50, seed: int = 0) -> list:
+    """
+    Generates reproducible intrinsic problems resembling rolling steps.
+
+    Every second case carries net positions from an earlier step, obtained by
+    solving the problem on different prices one hour before.
+
+    Args:
+        num_cases (int): Number of problems.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        list: Dicts with the arguments of solve_intrinsic_problem.
+    """
+    rng = np.random.default_rng(seed)
+    day = pd.Timestamp("2022-01-02")
+    index = pd.date_range(day, day.replace(hour=23), freq="60min")
+
+    cases = []
+    for k in range(num_cases):
+        price = rng.uniform(-20, 120, len(index)).round(4)
+        price[rng.random(len(index)) < rng.uniform(0.1, 0.8)] = np.nan
+
+        execution_time = (
+            day - pd.Timedelta(hours=8) + pd.Timedelta(minutes=15 * int(rng.integers(4, 60)))
+        )
+        params = dict(
+            cap=1,
+            c_rate=float(rng.choice([0.25, 0.5, 1.0])),
+            roundtrip_eff=float(rng.choice([0.86, 0.9, 1.0])),
+            max_cycles=float(rng.choice([0.5, 1.0, 2.0])),
+            threshold=float(rng.choice([0, 5])),
+            threshold_abs_min=float(rng.choice([0, 1])),
+            discount_rate=float(rng.choice([0, 1, 3])),
+        )
+
+        prev_net_trades = pd.DataFrame(
+            0.0, index=index, columns=["sum_buy", "sum_sell", "net_buy", "net_sell"]
+        )
+        if k % 2:
+            earlier = pd.DataFrame(
+                {"price": rng.uniform(-20, 120, len(index)).round(4)}, index=index
+            )
+            results, _, _ = solve_intrinsic_problem(
+                earlier,
+                execution_time - pd.Timedelta(hours=1),
+                prev_net_trades=prev_net_trades.copy(),
+                solver="highs",
+                formulation="compact",
+                **params,
+            )
+            traded = (results["current_buy_qh"] - results["current_sell_qh"]).astype(float)
+            prev_net_trades["sum_buy"] = traded.clip(lower=0)
+            prev_net_trades["sum_sell"] = (-traded).clip(lower=0)
+            prev_net_trades["net_buy"] = prev_net_trades["sum_buy"]
+            prev_net_trades["net_sell"] = prev_net_trades["sum_sell"]
+
+        cases.append(
+            dict(
+                prices_qh=pd.DataFrame({"price": price}, index=index),
+                execution_time=execution_time,
+                prev_net_trades=prev_net_trades,
+                **params,
+            )
+        )
+
+    return cases
+
+
+def run_benchmark(cases: list, engines: list, reference: str = "cbc"):
+    """
+    Solves every case with every engine and compares against a reference engine.
+
+    Args:
+        cases (list): Problems from make_cases or load_cases.
+        engines (list): Names of ENGINES to run.
+        reference (str): Engine whose objective values the others are compared to.
+
+    Returns:
+        tuple: (summary, per_case) DataFrames.
+    """
+    engines = list(dict.fromkeys([reference] + list(engines)))
+
+    rows = []
+    for name in engines:
+        for k, case in enumerate(cases):
+            case = dict(case, prices_qh=case["prices_qh"].copy())
+            start = time.perf_counter()
+            try:
+                _, _, objective = solve_intrinsic_problem(**case, **ENGINES[name])
+            except ValueError:
+                objective = np.nan
+            rows.append(
+                {
+                    "engine": name,
+                    "case": k,
+                    "objective": objective,
+                    "seconds": time.perf_counter() - start,
+                }
+            )
+
+    per_case = pd.DataFrame(rows)
+    objectives = per_case.pivot(index="case", columns="engine", values="objective")
+    seconds = per_case.pivot(index="case", columns="engine", values="seconds")
+
+    # infeasible cases of the reference are not compared
+    solved = objectives[reference].notna()
+    deviation = objectives[solved].sub(objectives.loc[solved, reference], axis=0).abs()
+
+    summary = pd.DataFrame(
+        {
+            "failed": objectives[solved].isna().sum(),
+            "mean_ms": seconds.mean() * 1000,
+            "speedup": seconds[reference].sum() / seconds.sum(),
+            "max_abs_deviation": deviation.max(),
+            "mean_abs_deviation": deviation.mean(),
+        }
+    ).loc[engines]
+
+    return summary, per_case
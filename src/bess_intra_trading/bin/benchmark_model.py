@@ -0,0 +1,82 @@
+import argparse
+import sys
+from bess_intra_trading.benchmark import ENGINES, make_cases, load_cases, run_benchmark
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(
+        description="Compares objective values and solve times of the intrinsic problem engines."
+    )
+
+    parser.add_argument(
+        '--cases',
+        type=str,
+        default=None,
+        help='Pickle of recorded intrinsic problems (run_optimization --record-cases). '
+             'Synthetic problems are generated if omitted.'
+    )
+
+    parser.add_argument(
+        '--num-cases',
+        type=int,
+        default=50,
+        help='Number of synthetic problems.'
+    )
+
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=0,
+        help='Seed of the synthetic problems.'
+    )
+
+    parser.add_argument(
+        '--engines',
+        nargs='+',
+        choices=list(ENGINES),
+        default=list(ENGINES),
+        help='Engines to compare.'
+    )
+
+    parser.add_argument(
+        '--reference',
+        choices=list(ENGINES),
+        default='cbc',
+        help='Engine the objective values are compared against.'
+    )
+
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=1e-4,
+        help='Largest accepted absolute deviation of the objective values.'
+    )
+
+    args_parse = parser.parse_args(args)
+
+    if args_parse.cases is not None:
+        cases = load_cases(args_parse.cases)
+    else:
+        cases = make_cases(args_parse.num_cases, args_parse.seed)
+
+    summary, _ = run_benchmark(cases, args_parse.engines, reference=args_parse.reference)
+
+    print(f"\n--- {len(cases)} intrinsic problems, reference: {args_parse.reference} ---")
+    print(summary.to_string(float_format=lambda v: f"{v:.6g}"))
+
+    if (summary["max_abs_deviation"] > args_parse.tolerance).any():
+        print(f"\nObjective values deviate by more than {args_parse.tolerance}.")
+        return 1
+
+    if summary["failed"].any():
+        print("\nSome engines failed on problems the reference solved.")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
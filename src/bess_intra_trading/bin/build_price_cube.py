@@ -0,0 +1,102 @@
+import argparse
+import sys
+import pandas as pd
+from bess_intra_trading.data import connect_db
+from bess_intra_trading.cube import build_price_cube
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(
+        description="Precomputes the average prices, volumes and trade counts of every trading day into a "
+                    "memory-mapped price cube for run_optimization --price-cube."
+    )
+
+    # --- Database Connection Arguments ---
+    parser.add_argument(
+        '--db-name',
+        default='intradaydb',
+        help='PostgreSQL database name.'
+    )
+
+    parser.add_argument(
+        '--db-user',
+        default='leloq',
+        help='PostgreSQL user.'
+    )
+
+    parser.add_argument(
+        '--db-password',
+        default='123',
+        help='PostgreSQL password.'
+    )
+
+    parser.add_argument(
+        '--db-host',
+        default='localhost',
+        help='PostgreSQL host.'
+    )
+
+    parser.add_argument(
+        '--db-port',
+        default='5432',
+        help='PostgreSQL port.'
+    )
+
+    # --- Cube Arguments ---
+    parser.add_argument(
+        '--start-date',
+        type=str,
+        default='2022-01-01',
+        help='First trading day (YYYY-MM-DD).'
+    )
+
+    parser.add_argument(
+        '--end-date',
+        type=str,
+        default='2022-02-28',
+        help='Last trading day (YYYY-MM-DD).'
+    )
+
+    parser.add_argument(
+        '--output',
+        type=str,
+        default='price_cube',
+        help='Directory of the price cube.'
+    )
+
+    parser.add_argument(
+        '--time-step',
+        type=int,
+        default=15,
+        help='Length of the execution windows in minutes.'
+    )
+
+    args_parse = parser.parse_args(args)
+
+    db_config = {
+        'dbname': args_parse.db_name,
+        'user': args_parse.db_user,
+        'password': args_parse.db_password,
+        'host': args_parse.db_host,
+        'port': args_parse.db_port
+    }
+
+    try:
+        with connect_db(db_config) as conn:
+            build_price_cube(
+                conn,
+                args_parse.output,
+                pd.to_datetime(args_parse.start_date),
+                pd.to_datetime(args_parse.end_date),
+                dt=args_parse.time_step,
+            )
+
+    except Exception as e:
+        print(f"\nAn unhandled error occurred during execution: {e}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
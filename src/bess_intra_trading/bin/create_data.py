@@ -3,9 +3,14 @@ import sys
 from bess_intra_trading.data import (
     connect_db,
     setup_table,
+    create_indexes,
     generate_and_insert_fake_transactions,
-    load_external_data
+    write_fake_transactions,
+    generate_fake_transactions,
+    PRODUCT_DURATION_MIN,
+    copy_external_data
 )
+from bess_intra_trading.synthetic import simulate_transactions
 
 
 def main(args=None):
@@ -56,8 +61,105 @@ def main(args=None):
     )
 
     group.add_argument(
-        '--file-path', type=str,
-        help='Path to an external data file (e.g., CSV) to load instead of generating fake data.'
+        '--file-path', type=str, nargs='+',
+        help='Paths of external data files (e.g., CSV) to load with COPY instead of generating fake data.'
+    )
+
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=None,
+        help='Seed of the fake transactions, for reproducible data.'
+    )
+
+    parser.add_argument(
+        '--start-date',
+        type=str,
+        default='2022-01-01',
+        help='First day (YYYY-MM-DD) of the execution times of fake transactions.'
+    )
+
+    parser.add_argument(
+        '--end-date',
+        type=str,
+        default='2022-03-01',
+        help='End day (YYYY-MM-DD) of the execution times of fake transactions.'
+    )
+
+    parser.add_argument(
+        '--products',
+        type=str,
+        nargs='+',
+        default=None,
+        choices=list(PRODUCT_DURATION_MIN),
+        help='Products of fake transactions, by default XBID_Hour_Power and Intraday_Hour_Power, or '
+             'XBID_Hour_Power and XBID_Quarter_Hour_Power with --market-model.'
+    )
+
+    parser.add_argument(
+        '--market-model',
+        action='store_true',
+        help='Generate fake transactions with the synthetic market model: mean-reverting prices per product and '
+             'trades clustering toward gate closure, --start-date to --end-date being delivery days.'
+    )
+
+    parser.add_argument(
+        '--output-file',
+        type=str,
+        default=None,
+        help='Write fake transactions to this CSV file for --file-path instead of the database.'
+    )
+
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=200_000,
+        help='Rows of an external file copied and committed at a time.'
+    )
+
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='Keep the table and continue an interrupted load of --file-path, skipping the rows already loaded.'
+    )
+
+    # --- Schema Arguments ---
+    parser.add_argument(
+        '--no-indexes',
+        action='store_true',
+        help='Do not index the table for the price queries.'
+    )
+
+    parser.add_argument(
+        '--brin',
+        action='store_true',
+        help='Index executiontime with a BRIN index, suited to years of data loaded in execution order.'
+    )
+
+    parser.add_argument(
+        '--partition-start',
+        type=str,
+        default=None,
+        help='First delivery day (YYYY-MM-DD) of a table partitioned by delivery day.'
+    )
+
+    parser.add_argument(
+        '--partition-end',
+        type=str,
+        default=None,
+        help='Last delivery day (YYYY-MM-DD) of the daily partitions, later days go to a default partition.'
+    )
+
+    parser.add_argument(
+        '--compact-types',
+        action='store_true',
+        help='Store side and product as enums instead of strings.'
+    )
+
+    parser.add_argument(
+        '--vwap-aggregates',
+        action='store_true',
+        help='Maintain the summary table read by run_optimization --vwap-aggregates.'
     )
 
     args_parse = parser.parse_args(args)
@@ -71,16 +173,42 @@ def main(args=None):
         'port': args_parse.db_port
     }
 
+    fake_options = {
+        'start_date': args_parse.start_date,
+        'end_date': args_parse.end_date,
+        'seed': args_parse.seed,
+        'generator': simulate_transactions if args_parse.market_model else generate_fake_transactions,
+    }
+    if args_parse.products is not None:
+        fake_options['products'] = tuple(args_parse.products)
+
+    if args_parse.num_rows is not None and args_parse.output_file is not None:
+        write_fake_transactions(args_parse.output_file, args_parse.num_rows, **fake_options)
+        return
+
     try:
         with connect_db(db_config) as conn:
             with conn.cursor() as cur:
 
-                setup_table(cur)
-
+                if not args_parse.resume:
+                    setup_table(
+                        cur,
+                        indexes=False,
+                        partition_start=args_parse.partition_start,
+                        partition_end=args_parse.partition_end,
+                        compact_types=args_parse.compact_types,
+                        vwap_aggregates=args_parse.vwap_aggregates,
+                    )
+
+                # the loads refresh the summary table of --vwap-aggregates for the days they touch
                 if args_parse.num_rows is not None:
-                    generate_and_insert_fake_transactions(cur, conn, args_parse.num_rows)
+                    generate_and_insert_fake_transactions(cur, conn, args_parse.num_rows, **fake_options)
                 elif args_parse.file_path is not None:
-                    load_external_data(cur, args_parse.file_path)
+                    copy_external_data(conn, args_parse.file_path, chunk_size=args_parse.chunk_size)
+
+                # indexes are built once after loading, which is faster than maintaining them row by row
+                if not args_parse.no_indexes:
+                    create_indexes(cur, brin=args_parse.brin)
 
             print("Database transaction committed successfully and connection closed.")
 
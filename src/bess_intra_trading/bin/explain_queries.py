@@ -0,0 +1,84 @@
+import argparse
+import sys
+from bess_intra_trading.data import connect_db, explain_queries
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(
+        description="Prints the PostgreSQL query plans of the price queries of one trading day."
+    )
+
+    # --- Database Connection Arguments ---
+    parser.add_argument(
+        '--db-name',
+        default='intradaydb',
+        help='PostgreSQL database name.'
+    )
+
+    parser.add_argument(
+        '--db-user',
+        default='leloq',
+        help='PostgreSQL user.'
+    )
+
+    parser.add_argument(
+        '--db-password',
+        default='123',
+        help='PostgreSQL password.'
+    )
+
+    parser.add_argument(
+        '--db-host',
+        default='localhost',
+        help='PostgreSQL host.'
+    )
+
+    parser.add_argument(
+        '--db-port',
+        default='5432',
+        help='PostgreSQL port.'
+    )
+
+    # --- Plan Arguments ---
+    parser.add_argument(
+        '--date',
+        type=str,
+        default='2022-01-02',
+        help='Trading day of the queries (YYYY-MM-DD).'
+    )
+
+    parser.add_argument(
+        '--analyze',
+        action='store_true',
+        help='Execute the queries and report actual row counts, times and buffers (EXPLAIN ANALYZE).'
+    )
+
+    args_parse = parser.parse_args(args)
+
+    db_config = {
+        'dbname': args_parse.db_name,
+        'user': args_parse.db_user,
+        'password': args_parse.db_password,
+        'host': args_parse.db_host,
+        'port': args_parse.db_port
+    }
+
+    try:
+        with connect_db(db_config) as conn:
+            plans = explain_queries(conn, args_parse.date, analyze=args_parse.analyze)
+
+        for name, plan in plans.items():
+            print(f"\n--- {name} ---")
+            print(plan)
+            if "Seq Scan" in plan:
+                print(f"\nWarning: {name} uses sequential scans, see the index options of create_data.")
+
+    except Exception as e:
+        print(f"\nAn unhandled error occurred during execution: {e}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -1,7 +1,12 @@
 import argparse
 
+from bess_intra_trading.market import VWAP_WINDOWS
 from bess_intra_trading.strategy import RollingIntrinsicStrategy
 from bess_intra_trading.data import connect_db
+from bess_intra_trading.sources import open_source, DATA_SOURCES
+from bess_intra_trading.parallel import simulate_parallel, CYCLE_POLICIES
+from bess_intra_trading.model import SOLVERS
+from bess_intra_trading.milp import FORMULATIONS, warm_start_supported
 import pandas as pd
 
 def main():
@@ -86,6 +91,167 @@ def main():
         help='Min trades.'
     )
 
+    parser.add_argument(
+        '--solver',
+        choices=SOLVERS,
+        default='cbc',
+        help='MILP solver backend: cbc (PuLP subprocess) or highs (in-process).'
+    )
+
+    parser.add_argument(
+        '--model-template',
+        action='store_true',
+        help='Compile the battery model once per trading day and patch it at every step.'
+    )
+
+    parser.add_argument(
+        '--warm-start',
+        action='store_true',
+        help='Warm start every rolling step from the schedule of the previous step, needs --solver highs and highspy.'
+    )
+
+    parser.add_argument(
+        '--formulation',
+        choices=FORMULATIONS,
+        default='standard',
+        help='Battery MILP formulation: standard or compact (no linearization variables).'
+    )
+
+    parser.add_argument(
+        '--lp-relaxation',
+        action='store_true',
+        help='Solve the LP relaxation first and skip branch-and-bound when it is integral.'
+    )
+
+    parser.add_argument(
+        '--drop-closed-products',
+        action='store_true',
+        help='Drop products past gate closure from the model and fold their state of charge into the initial state.'
+    )
+
+    parser.add_argument(
+        '--gate-closure',
+        type=float,
+        default=0,
+        help='Gate closure in minutes before delivery start.'
+    )
+
+    parser.add_argument(
+        '--prefetch',
+        action='store_true',
+        help='Fetch the prices of all execution windows of a trading day in one query.'
+    )
+
+    parser.add_argument(
+        '--vwap-window',
+        choices=VWAP_WINDOWS,
+        default='bucket',
+        help='Transactions behind the prices of a step: its own window (bucket), all windows since trading start '
+             '(cumulative) or the last --vwap-lookback windows (sliding).'
+    )
+
+    parser.add_argument(
+        '--vwap-lookback',
+        type=int,
+        default=4,
+        help='Number of execution windows of the sliding VWAP.'
+    )
+
+    parser.add_argument(
+        '--vwap-aggregates',
+        action='store_true',
+        help='Read the prices from the summary table maintained by create_data --vwap-aggregates.'
+    )
+
+    parser.add_argument(
+        '--prepared-queries',
+        action='store_true',
+        help='Run the price query as a server-side prepared statement and report its latency.'
+    )
+
+    parser.add_argument(
+        '--data-source',
+        type=str,
+        default='postgres',
+        choices=DATA_SOURCES,
+        help='Backend of the transactions: PostgreSQL, Parquet or CSV files scanned by DuckDB, or a file loaded '
+             'into memory.'
+    )
+
+    parser.add_argument(
+        '--data-path',
+        type=str,
+        nargs='+',
+        default=None,
+        help='Files of the duckdb (paths or glob patterns) and memory (a single file) data sources.'
+    )
+
+    parser.add_argument(
+        '--price-cube',
+        type=str,
+        default=None,
+        help='Read the prices from a price cube written by build_price_cube instead of PostgreSQL.'
+    )
+
+    parser.add_argument(
+        '--time-step',
+        type=int,
+        default=15,
+        help='Length of the execution windows in minutes.'
+    )
+
+    parser.add_argument(
+        '--lookback',
+        type=float,
+        default=8,
+        help='Hours before the trading day the first execution window starts.'
+    )
+
+    parser.add_argument(
+        '--minute-aggregates',
+        type=str,
+        default=None,
+        help='Directory caching per-minute transaction sums of every trading day, rolled up to --time-step and '
+             '--lookback, so runs with other settings need no new queries.'
+    )
+
+    parser.add_argument(
+        '--processes',
+        type=int,
+        default=None,
+        help='Simulate the trading days in this many worker processes, reading the prices once into a price cube.'
+    )
+
+    parser.add_argument(
+        '--cycle-policy',
+        type=str,
+        default='reconcile',
+        choices=CYCLE_POLICIES,
+        help='Cycle budget of days simulated in parallel: a fixed daily share of --max-cycles, or budgets '
+             'reconciled with the cycles of earlier days by re-running the days whose budget changed.'
+    )
+
+    parser.add_argument(
+        '--reconcile-passes',
+        type=int,
+        default=None,
+        help='Largest number of passes of --cycle-policy reconcile, by default one per trading day plus one, '
+             'which always reconciles. The run fails if the budgets still change after them.'
+    )
+
+    parser.add_argument(
+        '--shared-memory',
+        action='store_true',
+        help='With --processes, publish the price cube once into shared memory for the worker processes.'
+    )
+
+    parser.add_argument(
+        '--record-cases',
+        type=str,
+        default=None,
+        help='Pickle the inputs of every rolling step to this file for benchmark_model.'
+    )
+
     parser.add_argument(
         '--db-name',
         default='intradaydb',
@@ -95,6 +261,9 @@ def main():
 
     args = parser.parse_args()
 
+    if args.warm_start and not warm_start_supported(args.solver):
+        parser.error('--warm-start needs --solver highs and the highspy package (pip install .[highs])')
+
     # Setup BESS and Strategy
     bess_params = {
         'c_rate': args.c_rate,
@@ -102,12 +271,28 @@ def main():
         # 'max_soc': args.capacity * 0.9,  # Assuming 90% maximum SoC
         'max_power_mw': args.power,
         'efficiency': args.efficiency,
-        'time_step_h': 15,  # 15 minutes
+        'time_step_h': args.time_step,  # minutes
+        'lookback_h': args.lookback,
         'max_cycles': args.max_cycles,
         'threshold': args.threshold,
         'threshold_abs_min': args.threshold_abs_min,
         'discount_rate': args.discount_rate,
         'min_trades': args.min_trades,
+        'solver': args.solver,
+        'model_template': args.model_template,
+        'warm_start': args.warm_start,
+        'formulation': args.formulation,
+        'record_cases': args.record_cases,
+        'lp_relaxation': args.lp_relaxation,
+        'drop_closed_products': args.drop_closed_products,
+        'gate_closure_min': args.gate_closure,
+        'prefetch': args.prefetch,
+        'vwap_window': args.vwap_window,
+        'vwap_lookback': args.vwap_lookback,
+        'price_cube': args.price_cube,
+        'minute_aggregates': args.minute_aggregates,
+        'vwap_aggregates': args.vwap_aggregates,
+        'prepared_queries': args.prepared_queries,
     }
 
     strategy = RollingIntrinsicStrategy(bess_params=bess_params)
@@ -118,11 +303,21 @@ def main():
     # CONNECTION_ALCHEMY = f"postgresql://leloq{password_for_url}@127.0.0.1/intradaydb"
     # conn_alchemy = create_engine(CONNECTION_ALCHEMY)
 
-    try:
-        with connect_db(db_config) as conn:
-
-            # Run Simulation
-            print("\n--- Starting Rolling Intrinsic Simulation ---")
+    def run(conn):
+        print("\n--- Starting Rolling Intrinsic Simulation ---")
+        if args.processes:
+            # trading days spread over a process pool
+            simulate_parallel(
+                bess_params,
+                conn,
+                start_date=pd.to_datetime(args.start_date),
+                end_date=pd.to_datetime(args.end_date),
+                processes=args.processes,
+                cycle_policy=args.cycle_policy,
+                max_passes=args.reconcile_passes,
+                shared_memory=args.shared_memory,
+            )
+        else:
             strategy.simulate(
                 conn=conn,
                 start_date=pd.to_datetime(args.start_date),
@@ -130,6 +325,26 @@ def main():
                 initial_soc=args.init_soc
             )
 
+    try:
+        if args.price_cube:
+            # the price cube replaces the database
+            run(None)
+        elif args.data_source != 'postgres':
+            # embedded and in-memory sources need no database server
+            if not args.data_path:
+                raise ValueError(f"The {args.data_source} data source needs --data-path")
+            source = open_source(
+                args.data_source,
+                path=args.data_path if args.data_source == 'duckdb' else args.data_path[0],
+            )
+            run(source)
+            source.close()
+        else:
+            with connect_db(db_config) as conn:
+
+                # Run Simulation
+                run(conn)
+
     #     # --- 4. Report Results ---
     #     total_revenue = results_df['revenue_dt'].sum()
     #     cycles = results_df['optimal_action_mw'].abs().sum() * bess_params['time_step_h'] / (2 * args.capacity)
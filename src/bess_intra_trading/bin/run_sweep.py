@@ -0,0 +1,236 @@
+import argparse
+import sys
+import pandas as pd
+from bess_intra_trading.data import connect_db
+from bess_intra_trading.model import SOLVERS
+from bess_intra_trading.sources import open_source, DATA_SOURCES
+from bess_intra_trading.sweep import parameter_grid, run_sweep
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+
+    parser = argparse.ArgumentParser(
+        description="Runs the Rolling Intrinsic BESS Optimization Strategy for every combination of the given "
+                    "parameters in a process pool, reading the market data once."
+    )
+
+    parser.add_argument(
+        '--start-date',
+        type=str,
+        default='2022-01-01',
+        help='Start date for simulation (YYYY-MM-DD).'
+    )
+
+    parser.add_argument(
+        '--end-date',
+        type=str,
+        default='2022-01-02',
+        help='End date for simulation (YYYY-MM-DD).'
+    )
+
+    # --- Parameter Grid Arguments ---
+    parser.add_argument(
+        '--c-rate',
+        type=float,
+        nargs='+',
+        default=[0.5],
+        help='C-rates of the battery.'
+    )
+
+    parser.add_argument(
+        '--efficiency',
+        type=float,
+        nargs='+',
+        default=[0.86],
+        help='Round-trip efficiencies of the battery.'
+    )
+
+    parser.add_argument(
+        '--max-cycles',
+        type=float,
+        nargs='+',
+        default=[1],
+        help='Maximum numbers of cycles per year.'
+    )
+
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        nargs='+',
+        default=[0],
+        help='Thresholds of the price spread.'
+    )
+
+    parser.add_argument(
+        '--threshold-abs-min',
+        type=float,
+        nargs='+',
+        default=[0],
+        help='Absolute minimum thresholds of the price spread.'
+    )
+
+    parser.add_argument(
+        '--discount-rate',
+        type=float,
+        nargs='+',
+        default=[0],
+        help='Discount rates of the prices.'
+    )
+
+    parser.add_argument(
+        '--min-trades',
+        type=int,
+        nargs='+',
+        default=[1],
+        help='Minimum numbers of trades of a product in an execution window.'
+    )
+
+    # --- Strategy Arguments ---
+    parser.add_argument(
+        '--solver',
+        type=str,
+        default='cbc',
+        choices=SOLVERS,
+        help='Solver of the intrinsic problem of every step, cbc or highs.'
+    )
+
+    parser.add_argument(
+        '--drop-closed-products',
+        action='store_true',
+        help='Remove products past gate closure from the model of every step.'
+    )
+
+    parser.add_argument(
+        '--gate-closure',
+        type=float,
+        default=0,
+        help='Minutes before delivery at which a product closes, with --drop-closed-products.'
+    )
+
+    parser.add_argument(
+        '--time-step',
+        type=int,
+        default=15,
+        help='Length of the execution windows in minutes.'
+    )
+
+    parser.add_argument(
+        '--lookback',
+        type=float,
+        default=8,
+        help='Hours before the trading day the first execution window starts.'
+    )
+
+    # --- Sweep Arguments ---
+    parser.add_argument(
+        '--processes',
+        type=int,
+        default=None,
+        help='Worker processes, by default the number of CPUs.'
+    )
+
+    parser.add_argument(
+        '--shared-memory',
+        action='store_true',
+        help='Publish the price cube once into shared memory for the worker processes.'
+    )
+
+    parser.add_argument(
+        '--output-dir',
+        type=str,
+        default='sweep',
+        help='Directory of the price cube, the outputs of every scenario and the summary tables.'
+    )
+
+    # --- Market Data Arguments ---
+    parser.add_argument(
+        '--price-cube',
+        type=str,
+        default=None,
+        help='Read the prices from a price cube written by build_price_cube instead of building one.'
+    )
+
+    parser.add_argument(
+        '--data-source',
+        type=str,
+        default='postgres',
+        choices=DATA_SOURCES,
+        help='Backend of the transactions the price cube is built from.'
+    )
+
+    parser.add_argument(
+        '--data-path',
+        type=str,
+        nargs='+',
+        default=None,
+        help='Files of the duckdb (paths or glob patterns) and memory (a single file) data sources.'
+    )
+
+    parser.add_argument(
+        '--db-name',
+        default='intradaydb',
+        help='PostgreSQL database name.'
+    )
+
+    args_parse = parser.parse_args(args)
+
+    base = {
+        'time_step_h': args_parse.time_step,
+        'lookback_h': args_parse.lookback,
+        'solver': args_parse.solver,
+        'drop_closed_products': args_parse.drop_closed_products,
+        'gate_closure_min': args_parse.gate_closure,
+    }
+    scenarios = parameter_grid(
+        base,
+        {
+            'c_rate': args_parse.c_rate,
+            'efficiency': args_parse.efficiency,
+            'max_cycles': args_parse.max_cycles,
+            'threshold': args_parse.threshold,
+            'threshold_abs_min': args_parse.threshold_abs_min,
+            'discount_rate': args_parse.discount_rate,
+            'min_trades': args_parse.min_trades,
+        },
+    )
+
+    sweep_options = {
+        'scenarios': scenarios,
+        'start_date': pd.to_datetime(args_parse.start_date),
+        'end_date': pd.to_datetime(args_parse.end_date),
+        'output_dir': args_parse.output_dir,
+        'processes': args_parse.processes,
+        'price_cube': args_parse.price_cube,
+        'shared_memory': args_parse.shared_memory,
+    }
+
+    # Database Connection and Data Fetch
+    db_config = {'dbname': args_parse.db_name, 'user': 'leloq', 'password': '123', 'host': 'localhost', 'port': '5432'}
+
+    try:
+        print(f"\n--- Starting sweep of {len(scenarios)} scenarios ---")
+        if args_parse.price_cube:
+            result = run_sweep(None, **sweep_options)
+        elif args_parse.data_source != 'postgres':
+            if not args_parse.data_path:
+                raise ValueError(f"The {args_parse.data_source} data source needs --data-path")
+            source = open_source(
+                args_parse.data_source,
+                path=args_parse.data_path if args_parse.data_source == 'duckdb' else args_parse.data_path[0],
+            )
+            result = run_sweep(source, **sweep_options)
+            source.close()
+        else:
+            with connect_db(db_config) as conn:
+                result = run_sweep(conn, **sweep_options)
+
+        print(result.summary.sort_values("profit", ascending=False).head(10).to_string(index=False))
+
+    except Exception as e:
+        print(f"\nSweep failed due to an error: {e}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,253 @@
+import json
+import os
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from typing import Union
+from psycopg2.extensions import connection as PgConnection
+from bess_intra_trading.market import MarketDay, execution_windows, delivery_products
+from bess_intra_trading.sources import MarketDataSource, PostgresSource
+
+
+# arrays of a price cube, one .npy file each, shape (days, sides, windows, products)
+CUBE_ARRAYS = ("vwap", "volume", "count")
+
+
+def build_price_cube(
+        conn: Union[PgConnection, MarketDataSource],
+        path: str,
+        start_date: pd.Timestamp,
+        end_date: pd.Timestamp,
+        dt: int = 15,
+        lookback_h: float = 8,
+        sides: tuple = ("BUY", "SELL"),
+):
+    """
+    Writes the average prices, volumes and trade counts of every trading day
+    between start_date and end_date to a price cube directory.
+
+    Every trading day holds the execution windows RollingIntrinsicStrategy.simulate
+    steps through, from lookback_h hours before the day until its end, on the
+    hourly delivery products of the day, aggregated by MarketDataSource.market_day. The
+    arrays are written as .npy files next to an index.json describing them.
+
+    Args:
+        conn (PgConnection | MarketDataSource): Connection to the transaction database or
+            another source of the transactions.
+        path (str): Directory of the cube, created if missing.
+        start_date (pd.Timestamp): First trading day.
+        end_date (pd.Timestamp): Last trading day.
+        dt (int): Length of the execution windows in minutes.
+        lookback_h (float): Hours before the trading day the first execution window starts.
+        sides (tuple): Sides of the transactions.
+    """
+    days = pd.date_range(
+        pd.to_datetime(start_date).normalize(), pd.to_datetime(end_date).normalize(), freq="D"
+    )
+    lookback = pd.Timedelta(hours=lookback_h)
+    n_windows = len(execution_windows(days[0] - lookback, days[0] + pd.Timedelta(days=1), dt))
+    n_products = len(delivery_products(days[0] + pd.Timedelta(days=1)))
+
+    source = conn if isinstance(conn, MarketDataSource) else PostgresSource(conn)
+
+    if not os.path.exists(path):
+        os.makedirs(path)
+
+    shape = (len(days), len(sides), n_windows, n_products)
+    arrays = {
+        "vwap": np.lib.format.open_memmap(os.path.join(path, "vwap.npy"), "w+", np.float64, shape),
+        "volume": np.lib.format.open_memmap(os.path.join(path, "volume.npy"), "w+", np.float64, shape),
+        "count": np.lib.format.open_memmap(os.path.join(path, "count.npy"), "w+", np.int32, shape),
+    }
+
+    for d, day in enumerate(days):
+        for s, side in enumerate(sides):
+            market_day = source.market_day(side, day - lookback, day + pd.Timedelta(days=1), dt)
+            arrays["vwap"][d, s] = market_day.vwap
+            arrays["volume"][d, s] = market_day.volume
+            arrays["count"][d, s] = market_day.count
+        print(f"Price cube: {day.date()} written ({int(arrays['count'][d].sum()):,} window trades).")
+
+    for array in arrays.values():
+        array.flush()
+
+    with open(os.path.join(path, "index.json"), "w") as f:
+        json.dump(
+            {
+                "dt": dt,
+                "lookback_h": lookback_h,
+                "sides": list(sides),
+                "days": [str(day.date()) for day in days],
+                "shape": list(shape),
+            },
+            f,
+            indent=2,
+        )
+    print(f"Price cube of {len(days)} days written to {path}.")
+
+
+class PriceCube:
+    """
+    Read-only view of a price cube written by build_price_cube.
+
+    The arrays are memory-mapped, so opening a cube reads only its index and
+    the MarketDay of a trading day is a view into the page cache shared by all
+    processes reading the cube.
+    """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, "index.json")) as f:
+            index = json.load(f)
+
+        self.path = path
+        self.dt = index["dt"]
+        self.lookback = pd.Timedelta(hours=index["lookback_h"])
+        self.sides = tuple(index["sides"])
+        self.days = pd.DatetimeIndex(index["days"])
+        self.arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in CUBE_ARRAYS
+        }
+
+    def market_day(
+            self,
+            trading_start: pd.Timestamp,
+            trading_end: pd.Timestamp,
+            side: str = "BUY",
+    ) -> MarketDay:
+        """
+        Prices of the trading day ending at trading_end, as fetch_market_day
+        would return them.
+
+        Raises:
+            ValueError: If the day is not in the cube or its execution windows
+                start at a different time.
+        """
+        day = trading_end - pd.Timedelta(days=1)
+        if day not in self.days or trading_start != day - self.lookback:
+            raise ValueError(
+                f"Price cube {self.path} has no trading day {day} starting at {trading_start}"
+            )
+
+        d = self.days.get_loc(day)
+        s = self.sides.index(side)
+
+        return MarketDay(
+            execution_windows(trading_start, trading_end, self.dt),
+            delivery_products(trading_end),
+            self.arrays["vwap"][d, s],
+            self.arrays["count"][d, s],
+            self.dt,
+            self.arrays["volume"][d, s],
+        )
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """Attaches to a shared memory block without letting this process's resource tracker unlink it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # before Python 3.13, attaching registers the block again with the resource
+        # tracker, which worker processes share with the publisher, so unlink
+        # still frees it once
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedPriceCube(PriceCube):
+    """
+    Price cube published into shared memory blocks, one per array of CUBE_ARRAYS.
+
+    publish copies a cube into shared memory once, and the picklable spec of
+    the published cube lets worker processes attach to the same blocks, e.g.
+    as the 'price_cube' param of RollingIntrinsicStrategy. Attached arrays are
+    read-only views of the blocks, so memory stays flat with the number of
+    workers and no file system is involved. The publisher calls unlink once
+    the workers are done.
+    """
+
+    def __init__(self, spec: dict, blocks: dict = None):
+        """
+        Args:
+            spec (dict): Description of the published cube, see publish.
+            blocks (dict): Shared memory blocks per array created by publish, attached by name otherwise.
+        """
+        self.path = f"shared memory {spec['names']['vwap']}"
+        self.spec = spec
+        self.dt = spec["dt"]
+        self.lookback = pd.Timedelta(hours=spec["lookback_h"])
+        self.sides = tuple(spec["sides"])
+        self.days = pd.DatetimeIndex(spec["days"])
+        self.owner = blocks is not None
+        if blocks is None:
+            blocks = {name: _attach_shared_memory(spec["names"][name]) for name in CUBE_ARRAYS}
+        self.blocks = blocks
+        self.arrays = {}
+        for name in CUBE_ARRAYS:
+            array = np.ndarray(spec["shape"], dtype=spec["dtypes"][name], buffer=self.blocks[name].buf)
+            array.flags.writeable = False
+            self.arrays[name] = array
+
+    @classmethod
+    def publish(cls, cube: PriceCube) -> "SharedPriceCube":
+        """
+        Copies the arrays of cube into new shared memory blocks.
+
+        Returns:
+            SharedPriceCube: The published cube, whose spec attaches workers to it.
+        """
+        names = {}
+        dtypes = {}
+        blocks = {}
+        for name in CUBE_ARRAYS:
+            source = cube.arrays[name]
+            block = shared_memory.SharedMemory(create=True, size=max(source.nbytes, 1))
+            np.ndarray(source.shape, dtype=source.dtype, buffer=block.buf)[...] = source
+            names[name] = block.name
+            dtypes[name] = source.dtype.str
+            blocks[name] = block
+
+        return cls(
+            {
+                "names": names,
+                "dtypes": dtypes,
+                "shape": list(cube.arrays["vwap"].shape),
+                "dt": cube.dt,
+                "lookback_h": cube.lookback / pd.Timedelta(hours=1),
+                "sides": list(cube.sides),
+                "days": [str(day.date()) for day in cube.days],
+            },
+            blocks,
+        )
+
+    def close(self):
+        """Detaches from the shared memory blocks."""
+        self.arrays = {}
+        for block in self.blocks.values():
+            block.close()
+
+    def unlink(self):
+        """Detaches from and frees the shared memory blocks of publish, once no worker needs them."""
+        self.close()
+        if self.owner:
+            for block in self.blocks.values():
+                block.unlink()
+            self.owner = False
+
+
+# shared cubes this process attached to, by the name of their vwap block
+_attached_cubes = {}
+
+
+def open_price_cube(price_cube: Union[str, dict]) -> PriceCube:
+    """
+    Opens the price cube of a directory, or attaches to the spec dict of a
+    SharedPriceCube. A process attaches to a shared cube once and reuses it for
+    every later strategy, e.g. the days of simulate_parallel.
+    """
+    if not isinstance(price_cube, dict):
+        return PriceCube(price_cube)
+
+    name = price_cube["names"]["vwap"]
+    if name not in _attached_cubes:
+        _attached_cubes[name] = SharedPriceCube(price_cube)
+    return _attached_cubes[name]
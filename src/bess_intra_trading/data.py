@@ -1,12 +1,20 @@
-import random
-from datetime import datetime, timedelta
+import io
+import os
+import time
 from psycopg2.extensions import cursor
 from psycopg2.extensions import connection as PgConnection
+import numpy as np
 import pandas as pd
 
 import pytz
 import psycopg2
 from psycopg2 import sql
+from bess_intra_trading.utils import (
+    get_average_prices, get_aggregated_average_prices, VWAP_AGGREGATES_TABLE, VWAP_BUCKET_MIN
+)
+from bess_intra_trading.market import (
+    fetch_market_day, accumulate_transactions, fetch_minute_aggregates
+)
 
 
 # Set the Europe/Berlin timezone globally
@@ -14,63 +22,80 @@ from psycopg2 import sql
 BERLIN_TZ = pytz.timezone('Europe/Berlin')
 
 
-def round_to_full_hour(dt: datetime) -> datetime:
-    """Rounds a datetime object to the nearest full hour."""
-    if dt.minute >= 30:
-        dt = dt + timedelta(hours=1)
-
-    return dt.replace(minute=0, second=0, microsecond=0)
-
-
-def random_time_in_2022() -> datetime:
-    """Generates a random timezone-aware timestamp in 2022, rounded to the nearest full hour."""
-    # TODO: fix this hard-coded implementation
-    start = BERLIN_TZ.localize(datetime(2022, 1, 1))
-    # end = BERLIN_TZ.localize(datetime(2023, 1, 1))
-    end = BERLIN_TZ.localize(datetime(2022, 3, 1))
+def connect_db(db_config: dict) -> psycopg2.connect:
+    """Establishes and returns a PostgreSQL database connection."""
+    conn = psycopg2.connect(**db_config)
+    print("Connected to the database successfully!")
+    return conn
 
-    # Calculate total hours (instead of total seconds for finer control)
-    total_hours = int((end - start).total_seconds() // 3600)
-    random_hours = random.randint(0, total_hours)
-    random_time = start + timedelta(hours=random_hours)
+# values of the compact side and product columns, see setup_table
+SIDES = ('BUY', 'SELL')
+PRODUCTS = (
+    'XBID_Hour_Power',
+    'Intraday_Hour_Power',
+    'XBID_Quarter_Hour_Power',
+    'Intraday_Quarter_Hour_Power',
+)
 
-    return round_to_full_hour(random_time)
 
+# progress of copy_external_data per file, committed together with the copied rows
+LOAD_STATE_TABLE = 'transactions_load_state'
 
-def random_deliverystart(executiontime: datetime) -> datetime:
-    """Generates a deliverystart within the next 16 hours, ensuring it is at a full hour."""
-    # Start checking from the full hour of execution time
-    rounded_executiontime = round_to_full_hour(executiontime)
+# columns of the external CSV files, in the order of the table
+CSV_COLUMNS = ['executiontime', 'deliverystart', 'deliveryend', 'price', 'volume', 'side', 'product']
 
-    # Add a random number of full hours between 0 and 15 (inclusive)
-    random_hours = random.randint(0, 15)
 
-    deliverystart = rounded_executiontime + timedelta(hours=random_hours)
+def setup_table(
+        cur: cursor,
+        indexes: bool = True,
+        brin: bool = False,
+        partition_start: str = None,
+        partition_end: str = None,
+        compact_types: bool = False,
+        vwap_aggregates: bool = False,
+):
+    """
+    Drops and creates the transactions_intraday_de table.
 
-    return deliverystart  # Already at a full hour due to the way it's calculated
+    Args:
+        cur (PgCursor): Open database cursor object.
+        indexes (bool): Create the indexes of the price queries, see create_indexes.
+        brin (bool): Index executiontime with a BRIN index instead of a B-tree.
+        partition_start (str): First delivery day of a table range partitioned by delivery day.
+        partition_end (str): Last delivery day of the partitions, later days go to a default partition.
+        compact_types (bool): Store side and product as enums instead of strings.
+        vwap_aggregates (bool): Also create the summary table of refresh_vwap_aggregates.
+    """
+    side_type, product_type = 'VARCHAR(4)', 'VARCHAR(50)'
+    enum_query = ""
+    if compact_types:
+        # 4 byte enums, compared with the same string literals as VARCHAR columns
+        side_type, product_type = 'trade_side', 'trade_product'
+        enum_query = f"""
+    DROP TYPE IF EXISTS trade_side;
+    DROP TYPE IF EXISTS trade_product;
+    CREATE TYPE trade_side AS ENUM ({', '.join(f"'{side}'" for side in SIDES)});
+    CREATE TYPE trade_product AS ENUM ({', '.join(f"'{product}'" for product in PRODUCTS)});
+    """
 
+    partitioned = partition_start is not None and partition_end is not None
 
-def connect_db(db_config: dict) -> psycopg2.connect:
-    """Establishes and returns a PostgreSQL database connection."""
-    conn = psycopg2.connect(**db_config)
-    print("Connected to the database successfully!")
-    return conn
-
-def setup_table(cur: cursor):
-    """Drops and creates the transactions_intraday_de table."""
-    create_table_query = """
+    create_table_query = f"""
+    DROP TABLE IF EXISTS {VWAP_AGGREGATES_TABLE};
+    DROP TABLE IF EXISTS {LOAD_STATE_TABLE};
     DROP TABLE IF EXISTS transactions_intraday_de;
-
+    {enum_query}
     CREATE TABLE IF NOT EXISTS transactions_intraday_de (
-        id SERIAL PRIMARY KEY,
+        id {'BIGSERIAL' if partitioned else 'SERIAL'},
         executiontime TIMESTAMP WITH TIME ZONE NOT NULL,
         deliverystart TIMESTAMP WITH TIME ZONE NOT NULL,
         deliveryend TIMESTAMP WITH TIME ZONE NOT NULL,
         price REAL NOT NULL,
         volume REAL NOT NULL,
-        side VARCHAR(4) NOT NULL,
-        product VARCHAR(50) NOT NULL
-    );
+        side {side_type} NOT NULL,
+        product {product_type} NOT NULL,
+        PRIMARY KEY ({'id, deliverystart' if partitioned else 'id'})
+    ){' PARTITION BY RANGE (deliverystart)' if partitioned else ''};
     """
     try:
         cur.execute(create_table_query)
@@ -79,53 +104,361 @@ def setup_table(cur: cursor):
         print(f"Error creating table: {e}")
         raise
 
+    if partitioned:
+        create_daily_partitions(cur, partition_start, partition_end)
+
+    if indexes:
+        create_indexes(cur, brin=brin)
+
+    if vwap_aggregates:
+        setup_vwap_aggregates(cur, side_type, product_type)
+
+
+def setup_vwap_aggregates(cur: cursor, side_type: str = 'VARCHAR(4)', product_type: str = 'VARCHAR(50)'):
+    """
+    Drops and creates the summary table read by get_aggregated_average_prices.
+
+    Every row sums the transactions of one side, product and delivery start
+    executed in one bucket of VWAP_BUCKET_MIN minutes. The edge columns sum the
+    transactions exactly at the bucket start, which also belong to the window
+    ending there.
+
+    Args:
+        cur (PgCursor): Open database cursor object.
+        side_type (str): Column type of side, as in transactions_intraday_de.
+        product_type (str): Column type of product, as in transactions_intraday_de.
+    """
+    create_table_query = f"""
+    DROP TABLE IF EXISTS {VWAP_AGGREGATES_TABLE};
+
+    CREATE TABLE {VWAP_AGGREGATES_TABLE} (
+        side {side_type} NOT NULL,
+        bucket TIMESTAMP WITH TIME ZONE NOT NULL,
+        deliverystart TIMESTAMP WITH TIME ZONE NOT NULL,
+        product {product_type} NOT NULL,
+        volume_price DOUBLE PRECISION NOT NULL,
+        volume DOUBLE PRECISION NOT NULL,
+        trades INTEGER NOT NULL,
+        edge_volume_price DOUBLE PRECISION NOT NULL,
+        edge_volume DOUBLE PRECISION NOT NULL,
+        edge_trades INTEGER NOT NULL,
+        PRIMARY KEY (side, bucket, deliverystart, product)
+    );
+    """
+    try:
+        cur.execute(create_table_query)
+        print(f"Table '{VWAP_AGGREGATES_TABLE}' created successfully!")
+    except Exception as e:
+        print(f"Error creating table: {e}")
+        raise
+
 
-def generate_and_insert_fake_transactions(cur: cursor, conn: PgConnection, num_transactions: int):
-    """Generates and inserts fake transactions into the database."""
+def refresh_vwap_aggregates(
+        cur: cursor,
+        start_date: str = None,
+        end_date: str = None,
+        bucket_min: int = VWAP_BUCKET_MIN,
+):
+    """
+    Recomputes the summary table of the delivery days from start_date to
+    end_date from transactions_intraday_de, or of all days if they are omitted.
+
+    Call it after loading the transactions of new days, the rows of other
+    days are left untouched.
+
+    Args:
+        cur (PgCursor): Open database cursor object.
+        start_date (str): First delivery day (YYYY-MM-DD).
+        end_date (str): Last delivery day (YYYY-MM-DD).
+        bucket_min (int): Bucket length in minutes, a divisor of 60.
+    """
+    delivery_filter = "TRUE"
+    if start_date is not None and end_date is not None:
+        delivery_end = pd.to_datetime(end_date) + pd.Timedelta(days=1)
+        delivery_filter = (
+            f"deliverystart >= '{pd.to_datetime(start_date)}' AND deliverystart < '{delivery_end}'"
+        )
+
+    bucket = (
+        f"date_trunc('hour', executiontime) + INTERVAL '{bucket_min} minutes' * "
+        f"FLOOR(EXTRACT(EPOCH FROM executiontime - date_trunc('hour', executiontime)) / {bucket_min * 60})"
+    )
+    on_edge = f"executiontime = {bucket}"
+
+    delete_query = f"DELETE FROM {VWAP_AGGREGATES_TABLE} WHERE {delivery_filter};"
+
+    insert_query = f"""
+    INSERT INTO {VWAP_AGGREGATES_TABLE}
+    (side, bucket, deliverystart, product, volume_price, volume, trades,
+     edge_volume_price, edge_volume, edge_trades)
+    SELECT
+    side,
+    {bucket},
+    deliverystart,
+    product,
+    SUM(CAST(price AS DOUBLE PRECISION)*volume),
+    SUM(CAST(volume AS DOUBLE PRECISION)),
+    COUNT(*),
+    SUM(CASE WHEN {on_edge} THEN CAST(price AS DOUBLE PRECISION)*volume ELSE 0 END),
+    SUM(CASE WHEN {on_edge} THEN CAST(volume AS DOUBLE PRECISION) ELSE 0 END),
+    SUM(CASE WHEN {on_edge} THEN 1 ELSE 0 END)
+    FROM
+    transactions_intraday_de
+    WHERE
+    {delivery_filter}
+    GROUP BY
+    1, 2, 3, 4;
+    """
+    try:
+        cur.execute(delete_query)
+        cur.execute(insert_query)
+        print(f"Table '{VWAP_AGGREGATES_TABLE}' refreshed ({cur.rowcount:,} rows).")
+        cur.execute(f"ANALYZE {VWAP_AGGREGATES_TABLE};")
+    except Exception as e:
+        print(f"Error refreshing table: {e}")
+        raise
+
+
+def _delivery_days(deliverystart: pd.Series) -> tuple:
+    """First and last Europe/Berlin delivery day (YYYY-MM-DD) of a block of transactions."""
+    days = pd.to_datetime(deliverystart, utc=True).dt.tz_convert(BERLIN_TZ)
+    return days.min().strftime('%Y-%m-%d'), days.max().strftime('%Y-%m-%d')
+
+
+def _refresh_loaded_days(cur: cursor, loaded_days: list):
+    """
+    Refreshes the summary table of refresh_vwap_aggregates for the delivery
+    days of the loaded blocks, see _delivery_days, if the table exists.
+    """
+    if not loaded_days:
+        return
+
+    cur.execute("SELECT to_regclass(%s);", [VWAP_AGGREGATES_TABLE])
+    if cur.fetchone()[0] is None:
+        return
+
+    refresh_vwap_aggregates(
+        cur, min(first for first, _ in loaded_days), max(last for _, last in loaded_days)
+    )
+
+
+def create_daily_partitions(
+        cur: cursor,
+        start_date: str,
+        end_date: str,
+        table_name: str = 'transactions_intraday_de'
+):
+    """
+    Creates one partition per delivery day from start_date to end_date and a
+    default partition for the other days. Existing partitions are kept, so the
+    range can be extended later.
+
+    Args:
+        cur (PgCursor): Open database cursor object.
+        start_date (str): First delivery day.
+        end_date (str): Last delivery day.
+        table_name (str): The name of the partitioned table.
+    """
+    days = pd.date_range(pd.to_datetime(start_date), pd.to_datetime(end_date), freq="D")
+    for day in days:
+        cur.execute(
+            sql.SQL(
+                "CREATE TABLE IF NOT EXISTS {} PARTITION OF {} FOR VALUES FROM (%s) TO (%s);"
+            ).format(sql.Identifier(f"{table_name}_{day:%Y%m%d}"), sql.Identifier(table_name)),
+            [str(day.date()), str((day + pd.Timedelta(days=1)).date())]
+        )
+    cur.execute(
+        sql.SQL("CREATE TABLE IF NOT EXISTS {} PARTITION OF {} DEFAULT;").format(
+            sql.Identifier(f"{table_name}_default"), sql.Identifier(table_name)
+        )
+    )
+    print(f"{len(days)} daily partitions of '{table_name}' created successfully!")
+
+
+def create_indexes(cur: cursor, brin: bool = False, table_name: str = 'transactions_intraday_de'):
+    """
+    Creates the indexes of the price queries, which filter on side, an
+    executiontime window, product and a deliverystart range.
+
+    The B-tree on (side, executiontime) carries the other selected columns, so
+    the queries are answered by index-only scans. With brin, executiontime gets
+    a BRIN index instead, a few pages for years of data loaded in execution
+    order, and deliverystart a B-tree for per-day scans.
+
+    Args:
+        cur (PgCursor): Open database cursor object.
+        brin (bool): Use a BRIN index on executiontime.
+        table_name (str): The name of the target database table.
+    """
+    if brin:
+        queries = [
+            "CREATE INDEX IF NOT EXISTS {} ON {} USING BRIN (executiontime);",
+            "CREATE INDEX IF NOT EXISTS {} ON {} (deliverystart, side);",
+        ]
+        names = [f"{table_name}_executiontime_brin", f"{table_name}_delivery_side_idx"]
+    else:
+        queries = [
+            "CREATE INDEX IF NOT EXISTS {} ON {} (side, executiontime) "
+            "INCLUDE (deliverystart, product, price, volume);",
+        ]
+        names = [f"{table_name}_side_execution_idx"]
+
+    for query, name in zip(queries, names):
+        cur.execute(sql.SQL(query).format(sql.Identifier(name), sql.Identifier(table_name)))
+    cur.execute(sql.SQL("ANALYZE {};").format(sql.Identifier(table_name)))
+    print(f"Indexes of '{table_name}' created successfully!")
+
+
+# delivery length in minutes of the products of fake transactions
+PRODUCT_DURATION_MIN = {
+    'XBID_Hour_Power': 60,
+    'Intraday_Hour_Power': 60,
+    'XBID_Quarter_Hour_Power': 15,
+    'Intraday_Quarter_Hour_Power': 15,
+}
+
+
+def generate_fake_transactions(
+        num_transactions: int,
+        start_date: str = '2022-01-01',
+        end_date: str = '2022-03-01',
+        seed: int = None,
+        products: tuple = ('XBID_Hour_Power', 'Intraday_Hour_Power'),
+        block_size: int = 1_000_000,
+):
+    """
+    Generates fake transactions in blocks of columns drawn with NumPy.
+
+    As before, transactions come in groups of six executed at the same full
+    hour between start_date and end_date (Europe/Berlin), each delivered within
+    the next 16 hours, at prices between 20 and 100 and volumes between 1 and
+    10. Products of PRODUCT_DURATION_MIN with 15 minute deliveries start on
+    quarter hours.
+
+    Args:
+        num_transactions (int): Number of transactions.
+        start_date (str): First day of the execution times.
+        end_date (str): End of the execution times.
+        seed (int): Seed of the random generator, for reproducible data.
+        products (tuple): Products to draw from, keys of PRODUCT_DURATION_MIN.
+        block_size (int): Transactions per block.
+
+    Yields:
+        pd.DataFrame: Blocks with the columns of CSV_COLUMNS, timestamps as UTC strings.
+    """
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(start_date).tz_localize(BERLIN_TZ).tz_convert('UTC').tz_localize(None)
+    end = pd.Timestamp(end_date).tz_localize(BERLIN_TZ).tz_convert('UTC').tz_localize(None)
+    total_hours = int((end - start) // pd.Timedelta(hours=1))
+    products = np.array(products)
+    duration = np.array([PRODUCT_DURATION_MIN[product] for product in products])
+
+    for block_start in range(0, num_transactions, block_size):
+        n = min(block_size, num_transactions - block_start)
+
+        # one full execution hour per group of six transactions
+        hours = np.repeat(rng.integers(0, total_hours + 1, -(-n // 6)), 6)[:n]
+        executiontime = np.datetime64(start, 'm') + hours * np.timedelta64(60, 'm')
+
+        product = rng.integers(0, len(products), n)
+        length = duration[product]
+        deliverystart = executiontime + (
+            rng.integers(0, 16 * 60 // length) * length
+        ).astype('timedelta64[m]')
+        deliveryend = deliverystart + length.astype('timedelta64[m]')
+
+        yield pd.DataFrame(
+            {
+                'executiontime': np.char.add(np.datetime_as_string(executiontime, unit='s'), '+00'),
+                'deliverystart': np.char.add(np.datetime_as_string(deliverystart, unit='s'), '+00'),
+                'deliveryend': np.char.add(np.datetime_as_string(deliveryend, unit='s'), '+00'),
+                'price': rng.uniform(20, 100, n).round(2),
+                'volume': rng.uniform(1, 10, n).round(2),
+                'side': np.array(SIDES)[rng.integers(0, len(SIDES), n)],
+                'product': products[product],
+            }
+        )
+
+
+def generate_and_insert_fake_transactions(
+        cur: cursor,
+        conn: PgConnection,
+        num_transactions: int,
+        table_name: str = 'transactions_intraday_de',
+        generator=None,
+        **kwargs,
+):
+    """
+    Generates fake transactions with generate_fake_transactions and copies
+    every block into the table with COPY FROM STDIN, committing per block.
+    The summary table of refresh_vwap_aggregates, if created, is refreshed for
+    the delivery days of the new transactions at the end.
+
+    Args:
+        cur (PgCursor): Open database cursor object.
+        conn (PgConnection): Database connection.
+        num_transactions (int): Number of transactions.
+        table_name (str): The name of the target database table.
+        generator: Function yielding the blocks, generate_fake_transactions by default
+            or synthetic.simulate_transactions.
+        **kwargs: Date range, seed, products and block size of the generator.
+    """
     print(f"Generating and inserting {num_transactions:,} fake transactions...")
-    count = 0
-    # Use a list to batch the inserts for efficiency
-    insert_data = []
-
-    while count < num_transactions:
-        base_executiontime = random_time_in_2022()
-
-        # Insert the base transaction + 5 more transactions within the next 5 minutes
-        for i in range(6):
-            if i == 0:
-                executiontime = base_executiontime
-            else:
-                # Add a random number of minutes and round the executiontime to the nearest minute
-                executiontime = (base_executiontime + timedelta(minutes=i)).replace(second=0, microsecond=0)
-
-            # Ensure executiontime is rounded to a full hour (as per original logic, though this might need review)
-            executiontime = round_to_full_hour(executiontime)
-
-            deliverystart = random_deliverystart(executiontime)
-            deliveryend = deliverystart + timedelta(minutes=60)
-
-            price = round(random.uniform(20, 100), 2)
-            volume = round(random.uniform(1, 10), 2)
-            side = random.choice(['BUY', 'SELL'])
-            product = random.choice(['XBID_Hour_Power', 'Intraday_Hour_Power'])
-
-            # Insert the transaction into the transactions_intraday_de table
-            cur.execute(
-                sql.SQL(
-                    "INSERT INTO transactions_intraday_de (executiontime, deliverystart, deliveryend, price, volume, side, product) VALUES (%s, %s, %s, %s, %s, %s, %s);"),
-                [executiontime, deliverystart, deliveryend, price, volume, side, product]
-            )
-            count += 1
+    copy_query = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+        sql.Identifier(table_name), sql.SQL(', ').join(map(sql.Identifier, CSV_COLUMNS))
+    ).as_string(conn)
 
-        # Commit the transaction
+    count = 0
+    loaded_days = []
+    start = time.perf_counter()
+    generator = generator or generate_fake_transactions
+    for block in generator(num_transactions, **kwargs):
+        buffer = io.StringIO()
+        block.to_csv(buffer, header=False, index=False)
+        buffer.seek(0)
+        cur.copy_expert(copy_query, buffer)
         conn.commit()
 
-    print(f"{num_transactions:,} fake transactions inserted successfully!")
+        count += len(block)
+        loaded_days.append(_delivery_days(block['deliverystart']))
+        print(f"{count:,} rows, {count / max(time.perf_counter() - start, 1e-9):,.0f} rows/s")
+
+    print(f"{count:,} fake transactions inserted successfully!")
+
+    _refresh_loaded_days(cur, loaded_days)
+    conn.commit()
+
+
+def write_fake_transactions(file_path: str, num_transactions: int, generator=None, **kwargs):
+    """
+    Writes fake transactions of generate_fake_transactions to a CSV file, which
+    copy_external_data loads.
+
+    Args:
+        file_path (str): Path of the CSV file, compressed if it ends in .gz.
+        num_transactions (int): Number of transactions.
+        generator: Function yielding the blocks, generate_fake_transactions by default
+            or synthetic.simulate_transactions.
+        **kwargs: Date range, seed, products and block size of the generator.
+    """
+    print(f"Writing {num_transactions:,} fake transactions to {file_path}...")
+    count = 0
+    start = time.perf_counter()
+    generator = generator or generate_fake_transactions
+    for block in generator(num_transactions, **kwargs):
+        block.to_csv(file_path, mode='w' if count == 0 else 'a', header=count == 0, index=False)
+
+        count += len(block)
+        print(f"{count:,} rows, {count / max(time.perf_counter() - start, 1e-9):,.0f} rows/s")
+
+    print(f"{count:,} fake transactions written successfully!")
+
 
 def load_external_data(cur: cursor, file_path: str, table_name: str = 'transactions_intraday_de'):
     """
     Loads data from an external CSV file into the specified PostgreSQL table
-    using a row-by-row INSERT loop (suitable for small datasets).
+    using a row-by-row INSERT loop (suitable for small datasets, see
+    copy_external_data for large ones).
 
     Args:
         cur (PgCursor): Open database cursor object.
@@ -200,3 +533,169 @@ def load_external_data(cur: cursor, file_path: str, table_name: str = 'transacti
     # Note: The final conn.commit() is still handled by the calling main() function.
     print(f"✅ Successfully inserted {insert_count} out of {len(df)} rows.")
 
+
+
+def copy_external_data(
+        conn: PgConnection,
+        file_paths: list,
+        table_name: str = 'transactions_intraday_de',
+        chunk_size: int = 200_000,
+):
+    """
+    Streams external CSV files into the specified PostgreSQL table with COPY.
+
+    Every file is read in chunks of chunk_size rows, so memory stays bounded
+    whatever the file size. The timestamps of a chunk are converted to
+    Europe/Berlin in one go, as in load_external_data, and the chunk is sent
+    with COPY FROM STDIN. The number of rows loaded from each file is stored in
+    LOAD_STATE_TABLE in the transaction of the chunk, so an interrupted load
+    resumes after the last committed chunk and finished files are skipped.
+    The summary table of refresh_vwap_aggregates, if created, is refreshed for
+    the delivery days of the chunks loaded by the call at the end.
+
+    Args:
+        conn (PgConnection): Database connection, committed after every chunk.
+        file_paths (list): Paths of the CSV files, with the columns of CSV_COLUMNS.
+        table_name (str): The name of the target database table.
+        chunk_size (int): Rows per chunk.
+    """
+    cur = conn.cursor()
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS {LOAD_STATE_TABLE} (
+            file_path TEXT PRIMARY KEY,
+            rows_loaded BIGINT NOT NULL,
+            done BOOLEAN NOT NULL
+        );
+        """)
+    conn.commit()
+
+    copy_query = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv)").format(
+        sql.Identifier(table_name), sql.SQL(', ').join(map(sql.Identifier, CSV_COLUMNS))
+    ).as_string(conn)
+    state_query = f"""
+        INSERT INTO {LOAD_STATE_TABLE} (file_path, rows_loaded, done) VALUES (%s, %s, %s)
+        ON CONFLICT (file_path) DO UPDATE SET rows_loaded = EXCLUDED.rows_loaded, done = EXCLUDED.done;
+        """
+
+    total_rows = 0
+    loaded_days = []
+    start = time.perf_counter()
+    for file_path in file_paths:
+        key = os.path.abspath(file_path)
+        cur.execute(f"SELECT rows_loaded, done FROM {LOAD_STATE_TABLE} WHERE file_path = %s;", [key])
+        state = cur.fetchone()
+        rows_loaded, done = state if state is not None else (0, False)
+
+        if done:
+            print(f"Skipping {file_path}, already loaded ({rows_loaded:,} rows).")
+            continue
+        if rows_loaded:
+            print(f"Resuming {file_path} after {rows_loaded:,} rows...")
+        else:
+            print(f"Loading {file_path}...")
+
+        # rows already committed are skipped without keeping a list of their numbers
+        reader = pd.read_csv(
+            file_path,
+            usecols=CSV_COLUMNS,
+            chunksize=chunk_size,
+            skiprows=lambda i, skip=rows_loaded: 0 < i <= skip,
+        )
+        for chunk in reader:
+            for col in ['executiontime', 'deliverystart', 'deliveryend']:
+                chunk[col] = pd.to_datetime(chunk[col], utc=True).dt.tz_convert(BERLIN_TZ)
+
+            buffer = io.StringIO()
+            chunk[CSV_COLUMNS].to_csv(buffer, header=False, index=False)
+            buffer.seek(0)
+            cur.copy_expert(copy_query, buffer)
+
+            rows_loaded += len(chunk)
+            total_rows += len(chunk)
+            loaded_days.append(_delivery_days(chunk['deliverystart']))
+            cur.execute(state_query, [key, rows_loaded, False])
+            conn.commit()
+
+            elapsed = time.perf_counter() - start
+            print(
+                f"{file_path}: {rows_loaded:,} rows loaded, "
+                f"{total_rows / max(elapsed, 1e-9):,.0f} rows/s"
+            )
+
+        cur.execute(state_query, [key, rows_loaded, True])
+        conn.commit()
+
+    print(f"✅ Copied {total_rows:,} rows in {time.perf_counter() - start:.1f} s.")
+
+    _refresh_loaded_days(cur, loaded_days)
+    conn.commit()
+
+
+class _ExplainCursor:
+    """Cursor that collects the plans of the queries executed on it instead of their rows."""
+
+    def __init__(self, cur: cursor, analyze: bool, plans: list):
+        self.cur = cur
+        self.analyze = analyze
+        self.plans = plans
+
+    def execute(self, query, params=None):
+        options = "ANALYZE, BUFFERS" if self.analyze else "COSTS"
+        self.cur.execute(f"EXPLAIN ({options}) {query}", params)
+        self.plans.append("\n".join(row[0] for row in self.cur.fetchall()))
+
+    def fetchall(self):
+        return []
+
+
+class _ExplainConnection:
+    """Connection handing out _ExplainCursor objects."""
+
+    def __init__(self, conn: PgConnection, analyze: bool):
+        self.conn = conn
+        self.analyze = analyze
+        self.plans = []
+
+    def cursor(self):
+        return _ExplainCursor(self.conn.cursor(), self.analyze, self.plans)
+
+
+def explain_queries(conn: PgConnection, day: str, analyze: bool = False) -> dict:
+    """
+    Query plans of the price queries of one trading day.
+
+    The queries are issued by the functions the strategy calls, through a
+    connection that replaces every query with its EXPLAIN, so the plans are
+    those of the exact SQL run in simulations.
+
+    Args:
+        conn (PgConnection): Database connection.
+        day (str): Trading day (YYYY-MM-DD).
+        analyze (bool): Execute the queries and report actual times and buffers.
+
+    Returns:
+        dict: Plan text per query name.
+    """
+    current_day = pd.to_datetime(day)
+    trading_start = current_day - pd.Timedelta(hours=8)
+    trading_end = current_day + pd.Timedelta(days=1)
+
+    queries = {
+        "get_average_prices": lambda c: get_average_prices(
+            c, 'BUY', trading_start, trading_start + pd.Timedelta(minutes=15), trading_end
+        ),
+        "get_aggregated_average_prices": lambda c: get_aggregated_average_prices(
+            c, 'BUY', trading_start, trading_start + pd.Timedelta(minutes=15), trading_end
+        ),
+        "fetch_market_day": lambda c: fetch_market_day(c, 'BUY', trading_start, trading_end),
+        "accumulate_transactions": lambda c: accumulate_transactions(c, trading_start, trading_end),
+        "fetch_minute_aggregates": lambda c: fetch_minute_aggregates(c, trading_end),
+    }
+
+    plans = {}
+    for name, query in queries.items():
+        explain_conn = _ExplainConnection(conn, analyze)
+        query(explain_conn)
+        plans[name] = "\n\n".join(explain_conn.plans)
+
+    return plans
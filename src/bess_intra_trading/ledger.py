@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+
+
+# columns of the trades frames of solve_intrinsic_problem and simulate
+TRADE_COLUMNS = ["execution_time", "side", "quantity", "price", "product", "profit"]
+
+# sides of the trades, stored as their position in this tuple
+TRADE_SIDES = ("buy", "sell")
+
+
+class TradeLedger:
+    """
+    Trades in preallocated, typed column arrays.
+
+    Appending a step's trades copies them into the arrays, which double in
+    size when full, so a day of steps costs amortized constant time per trade
+    instead of a DataFrame concatenation per trade or step. frame converts the
+    trades to the DataFrame of TRADE_COLUMNS at output boundaries only.
+    """
+
+    __slots__ = ("size", "execution_time", "side", "quantity", "price", "product", "profit")
+
+    def __init__(self, capacity: int = 256):
+        """
+        Args:
+            capacity (int): Trades the arrays hold before they first grow.
+        """
+        capacity = max(int(capacity), 1)
+        self.size = 0
+        self.execution_time = np.empty(capacity, dtype="datetime64[ns]")
+        self.side = np.empty(capacity, dtype=np.int8)
+        self.quantity = np.empty(capacity)
+        self.price = np.empty(capacity)
+        self.product = np.empty(capacity, dtype="datetime64[ns]")
+        self.profit = np.empty(capacity)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _reserve(self, n: int):
+        """Grows the arrays to hold n more trades, at least doubling them."""
+        capacity = len(self.quantity)
+        if self.size + n <= capacity:
+            return
+
+        capacity = max(2 * capacity, self.size + n)
+        for name in ("execution_time", "side", "quantity", "price", "product", "profit"):
+            array = getattr(self, name)
+            grown = np.empty(capacity, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            setattr(self, name, grown)
+
+    def append_solution(
+            self,
+            execution_time: pd.Timestamp,
+            products: pd.DatetimeIndex,
+            buy: np.ndarray,
+            sell: np.ndarray,
+            price: np.ndarray,
+    ):
+        """
+        Appends the trades of one execution step, a buy and a sell trade for
+        every product with a positive bought and sold quantity, in product
+        order with the buy before the sell.
+
+        Args:
+            execution_time (pd.Timestamp): Execution time of the trades.
+            products (pd.DatetimeIndex): Delivery products.
+            buy (np.ndarray): Bought quantity per product.
+            sell (np.ndarray): Sold quantity per product.
+            price (np.ndarray): Price per product.
+        """
+        quantity = np.column_stack([buy, sell]).ravel()
+        traded = np.flatnonzero(quantity > 0)
+        n = len(traded)
+        if n == 0:
+            return
+
+        self._reserve(n)
+        column = traded // 2
+        side = (traded % 2).astype(np.int8)
+        rows = slice(self.size, self.size + n)
+
+        self.execution_time[rows] = pd.Timestamp(execution_time).to_datetime64()
+        self.side[rows] = side
+        self.quantity[rows] = quantity[traded]
+        self.price[rows] = price[column]
+        self.product[rows] = products.values[column]
+        self.profit[rows] = np.where(side == 1, 1.0, -1.0) * quantity[traded] * price[column]
+        self.size += n
+
+    def extend(self, trades: pd.DataFrame):
+        """Appends a DataFrame of trades with the columns of TRADE_COLUMNS."""
+        n = len(trades)
+        if n == 0:
+            return
+
+        self._reserve(n)
+        rows = slice(self.size, self.size + n)
+
+        self.execution_time[rows] = pd.DatetimeIndex(trades["execution_time"]).as_unit("ns").values
+        self.side[rows] = np.where(trades["side"].to_numpy() == "sell", 1, 0)
+        self.quantity[rows] = trades["quantity"].to_numpy(dtype=float)
+        self.price[rows] = trades["price"].to_numpy(dtype=float)
+        self.product[rows] = pd.DatetimeIndex(trades["product"]).as_unit("ns").values
+        self.profit[rows] = trades["profit"].to_numpy(dtype=float)
+        self.size += n
+
+    def total_profit(self, start: int = 0) -> float:
+        """Sum of the profits of the trades from position start on, skipping NaN as pandas does."""
+        return float(np.nansum(self.profit[start:self.size]))
+
+    def frame(self, start: int = 0) -> pd.DataFrame:
+        """Trades from position start on as a DataFrame with the columns of TRADE_COLUMNS."""
+        rows = slice(start, self.size)
+
+        return pd.DataFrame(
+            {
+                "execution_time": self.execution_time[rows],
+                "side": np.array(TRADE_SIDES, dtype=object)[self.side[rows]],
+                "quantity": self.quantity[rows],
+                "price": self.price[rows],
+                "product": self.product[rows],
+                "profit": self.profit[rows],
+            },
+            columns=TRADE_COLUMNS,
+        )
+
+    def clear(self):
+        """Drops all trades, keeping the allocated arrays."""
+        self.size = 0
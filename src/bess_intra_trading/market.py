@@ -0,0 +1,670 @@
+import os
+import numpy as np
+import pandas as pd
+from psycopg2.extensions import connection as PgConnection
+
+
+def execution_windows(trading_start: pd.Timestamp, trading_end: pd.Timestamp, dt: int) -> pd.DatetimeIndex:
+    """
+    Start times of the execution windows of a trading day, stepped like
+    RollingIntrinsicStrategy.simulate: windows of dt minutes from trading_start
+    as long as they end before trading_end.
+    """
+    execution_times = []
+    execution_time_start = trading_start
+    execution_time_end = trading_start + pd.Timedelta(minutes=dt)
+    while execution_time_end < trading_end:
+        execution_times.append(execution_time_start)
+        execution_time_start = execution_time_end
+        execution_time_end = execution_time_end + pd.Timedelta(minutes=dt)
+
+    return pd.DatetimeIndex(execution_times)
+
+
+def delivery_products(target_delivery_date: pd.Timestamp) -> pd.DatetimeIndex:
+    """Hourly delivery products of the day get_average_prices reports on."""
+    start_of_day = pd.to_datetime(target_delivery_date) - pd.Timedelta(hours=2)
+
+    # set hour and minute to 0 (europe/berlin time)
+    start_of_day = start_of_day.replace(hour=0, minute=0)
+    end_of_day = start_of_day.replace(hour=23, minute=45)
+
+    return pd.date_range(start_of_day, end_of_day, freq="60min")
+
+
+class MarketDay:
+    """
+    Volume-weighted average prices and trade counts of one trading day, per
+    execution window and delivery product.
+
+    Rows follow execution_times and columns follow products. Pairs without trades
+    hold a NaN price and a zero count, so min_trades is applied when slicing.
+    """
+
+    def __init__(
+            self,
+            execution_times: pd.DatetimeIndex,
+            products: pd.DatetimeIndex,
+            vwap: np.ndarray,
+            count: np.ndarray,
+            dt: int = 15,
+            volume: np.ndarray = None,
+    ):
+        """
+        Args:
+            execution_times (pd.DatetimeIndex): Start times of the execution windows.
+            products (pd.DatetimeIndex): Delivery products.
+            vwap (np.ndarray): Average prices, shape (windows, products).
+            count (np.ndarray): Trade counts, shape (windows, products).
+            dt (int): Length of the execution windows in minutes.
+            volume (np.ndarray): Traded volumes, shape (windows, products), if known.
+        """
+        self.execution_times = execution_times
+        self.products = products
+        self.vwap = vwap
+        self.count = count
+        self.dt = dt
+        self.volume = volume
+
+    def average_prices(self, execution_time_start: pd.Timestamp, min_trades: int = 1) -> pd.DataFrame:
+        """
+        Prices of one execution window, equivalent to get_average_prices with the
+        same window, target delivery date and min_trades.
+        """
+        k = self.execution_times.get_loc(execution_time_start)
+        price = np.where(self.count[k] >= min_trades, self.vwap[k], np.nan)
+
+        return pd.DataFrame({"price": price}, index=self.products)
+
+
+def fetch_market_day(
+        conn: PgConnection,
+        side: str,
+        trading_start: pd.Timestamp,
+        trading_end: pd.Timestamp,
+        dt: int = 15,
+) -> MarketDay:
+    """
+    Aggregates the transactions of a whole trading day in one query.
+
+    Every execution window of execution_windows becomes a row of a VALUES list
+    joined with its transactions by the same inclusive BETWEEN as
+    get_average_prices, so a transaction on a window boundary counts in both
+    windows. The HAVING of min_trades is left to MarketDay.average_prices.
+
+    Args:
+        conn (PgConnection): Connection to the transaction database.
+        side (str): Side of the transactions, e.g. 'BUY'.
+        trading_start (pd.Timestamp): Start of the first execution window.
+        trading_end (pd.Timestamp): Target delivery date, execution windows end before it.
+        dt (int): Length of the execution windows in minutes.
+
+    Returns:
+        MarketDay: Prices and trade counts of the day.
+    """
+    execution_times = execution_windows(trading_start, trading_end, dt)
+    products = delivery_products(trading_end)
+    vwap = np.full((len(execution_times), len(products)), np.nan)
+    count = np.zeros((len(execution_times), len(products)), dtype=int)
+    volume = np.zeros((len(execution_times), len(products)))
+
+    if len(execution_times) == 0:
+        return MarketDay(execution_times, products, vwap, count, dt, volume)
+
+    windows = ",\n        ".join(
+        ["(%s, CAST(%s AS TIMESTAMPTZ), CAST(%s AS TIMESTAMPTZ))"] * len(execution_times)
+    )
+    window_params = [
+        value
+        for k, start in enumerate(execution_times)
+        for value in (k, str(start), str(start + pd.Timedelta(minutes=dt)))
+    ]
+    last_end = execution_times[-1] + pd.Timedelta(minutes=dt)
+
+    cursor = conn.cursor()
+
+    cursor.execute(
+        f"""
+        SELECT
+        windows.bucket,
+        t.deliverystart,
+        SUM(t.price*t.volume)/SUM(t.volume) AS weighted_avg_price,
+        COUNT(*) AS trades,
+        SUM(t.volume) AS volume
+        FROM
+        (VALUES
+        {windows}
+        ) AS windows (bucket, execution_time_start, execution_time_end)
+        JOIN transactions_intraday_de t
+        ON t.executiontime BETWEEN windows.execution_time_start AND windows.execution_time_end
+        WHERE
+        (t.executiontime BETWEEN %s AND %s)
+        AND (t.product ='XBID_Hour_Power' or t.product = 'Intraday_Hour_Power')
+        AND t.side = %s
+        AND t.deliverystart < %s
+        AND t.deliverystart >= %s
+        GROUP BY
+        windows.bucket, t.deliverystart;
+        """,
+        window_params
+        + [str(execution_times[0]), str(last_end), side, str(trading_end), str(products[0])],
+    )
+    result = cursor.fetchall()
+
+    if result:
+        df = pd.DataFrame(result, columns=["bucket", "product", "price", "trades", "volume"])
+        delivery = pd.DatetimeIndex(df["product"])
+
+        # Remove timezone if present
+        if delivery.tz is not None:
+            delivery = delivery.tz_localize(None)
+
+        # deliveries off the hourly grid are dropped, as by the reindex of get_average_prices
+        column = products.get_indexer(delivery)
+        on_grid = column >= 0
+        row = df["bucket"].to_numpy(dtype=int)[on_grid]
+        vwap[row, column[on_grid]] = df["price"].to_numpy(dtype=float)[on_grid]
+        count[row, column[on_grid]] = df["trades"].to_numpy(dtype=int)[on_grid]
+        volume[row, column[on_grid]] = df["volume"].to_numpy(dtype=float)[on_grid]
+
+    return MarketDay(execution_times, products, vwap, count, dt, volume)
+
+
+# windows the average prices of a MarketDay are taken over, see VwapAccumulator.market_day
+VWAP_WINDOWS = ("bucket", "cumulative", "sliding")
+
+# arrays of a VwapAccumulator written by save
+ACCUMULATOR_SUMS = (
+    "volume_price", "volume", "count", "edge_volume_price", "edge_volume", "edge_count"
+)
+
+# hours of execution time fetched before a trading day into minute aggregates,
+# so lookbacks up to it roll up from the same aggregates
+MINUTE_LOOKBACK_H = 24
+
+
+def _window_start(first, window, lookback):
+    """First accumulator window of every execution window, whose own first ones are first."""
+    if window not in VWAP_WINDOWS:
+        raise ValueError(f"Unknown VWAP window '{window}', choose one of {VWAP_WINDOWS}")
+
+    if window == "bucket":
+        return first
+    if window == "cumulative":
+        return np.full(len(first), first[0] if len(first) else 0)
+
+    return first[np.maximum(np.arange(len(first)) - lookback + 1, 0)]
+
+
+class VwapAccumulator:
+    """
+    Running sums of price times volume, volume and trade count per side,
+    execution window and delivery product.
+
+    Transactions are absorbed in O(1) each and the average prices of any
+    execution window, or of a run of consecutive windows, are answered from the
+    sums without rescanning transactions. The execution windows of a day share
+    their boundaries and get_average_prices selects them with an inclusive
+    BETWEEN, so a transaction exactly on a boundary belongs to two windows. It is
+    kept in the window it starts and in separate edge sums at that boundary,
+    which are added to the window ending there.
+    """
+
+    def __init__(
+            self,
+            execution_times: pd.DatetimeIndex,
+            products: pd.DatetimeIndex,
+            dt: int = 15,
+            sides: tuple = ("BUY", "SELL"),
+    ):
+        """
+        Args:
+            execution_times (pd.DatetimeIndex): Start times of consecutive execution windows.
+            products (pd.DatetimeIndex): Delivery products.
+            dt (int): Length of the execution windows in minutes.
+            sides (tuple): Sides to keep sums for.
+        """
+        self.execution_times = execution_times
+        self.products = products
+        self.dt = dt
+        self.sides = tuple(sides)
+
+        shape = (len(self.sides), len(execution_times), len(products))
+        self.volume_price = np.zeros(shape)
+        self.volume = np.zeros(shape)
+        self.count = np.zeros(shape, dtype=int)
+
+        # transactions on the start of window k, k == len(execution_times) is the end of the last one
+        edge_shape = (len(self.sides), len(execution_times) + 1, len(products))
+        self.edge_volume_price = np.zeros(edge_shape)
+        self.edge_volume = np.zeros(edge_shape)
+        self.edge_count = np.zeros(edge_shape, dtype=int)
+
+        self._start = execution_times[0].value if len(execution_times) else 0
+        self._step = pd.Timedelta(minutes=dt).value
+
+    def _locate(self, execution_time, delivery_start, side):
+        """Window offsets in nanoseconds, rows of the sides and columns of the products."""
+        offset = pd.DatetimeIndex(np.atleast_1d(execution_time)).as_unit("ns").asi8 - self._start
+        column = self.products.get_indexer(pd.DatetimeIndex(np.atleast_1d(delivery_start)))
+        row = pd.Index(self.sides).get_indexer(np.atleast_1d(side))
+
+        return offset, row, column
+
+    def _absorb(self, offset, row, column, sums, edge_sums, on_edge):
+        """Adds sums to the windows of the offsets and edge_sums to the boundaries on_edge."""
+        bucket = offset // self._step
+        n_windows = len(self.execution_times)
+        valid = (column >= 0) & (row >= 0) & (offset >= 0)
+
+        inside = valid & (bucket < n_windows)
+        index = (row[inside], bucket[inside], column[inside])
+        for array, values in zip((self.volume_price, self.volume, self.count), sums):
+            np.add.at(array, index, np.broadcast_to(values, offset.shape)[inside])
+
+        edge = valid & on_edge & (bucket <= n_windows)
+        index = (row[edge], bucket[edge], column[edge])
+        for array, values in zip((self.edge_volume_price, self.edge_volume, self.edge_count), edge_sums):
+            np.add.at(array, index, np.broadcast_to(values, offset.shape)[edge])
+
+    def add(self, execution_time, delivery_start, price, volume, side):
+        """
+        Absorbs one transaction, or arrays of transactions.
+
+        Transactions outside the execution windows, on deliveries off the product
+        grid or on other sides are ignored.
+
+        Args:
+            execution_time: Execution time(s), timezone-naive.
+            delivery_start: Delivery start(s), timezone-naive.
+            price: Price(s).
+            volume: Volume(s).
+            side: Side(s), e.g. 'BUY'.
+        """
+        offset, row, column = self._locate(execution_time, delivery_start, side)
+        volume_price = np.asarray(price, dtype=float) * np.asarray(volume, dtype=float)
+        sums = (volume_price, np.asarray(volume, dtype=float), 1)
+
+        self._absorb(offset, row, column, sums, sums, offset % self._step == 0)
+
+    def add_transactions(self, transactions: pd.DataFrame):
+        """Absorbs a DataFrame with executiontime, deliverystart, price, volume and side columns."""
+        self.add(
+            transactions["executiontime"],
+            transactions["deliverystart"],
+            transactions["price"],
+            transactions["volume"],
+            transactions["side"],
+        )
+
+    def add_sums(
+            self,
+            execution_time,
+            delivery_start,
+            side,
+            volume_price,
+            volume,
+            count,
+            edge_volume_price,
+            edge_volume,
+            edge_count,
+    ):
+        """
+        Absorbs sums of transactions already aggregated per execution window.
+
+        Args:
+            execution_time: Start time(s) of the windows, timezone-naive.
+            delivery_start: Delivery start(s), timezone-naive.
+            side: Side(s), e.g. 'BUY'.
+            volume_price: Sum(s) of price times volume.
+            volume: Sum(s) of volume.
+            count: Number(s) of transactions.
+            edge_volume_price: Sum(s) of price times volume exactly at the window start.
+            edge_volume: Sum(s) of volume exactly at the window start.
+            edge_count: Number(s) of transactions exactly at the window start.
+        """
+        offset, row, column = self._locate(execution_time, delivery_start, side)
+        on_edge = offset % self._step == 0
+
+        self._absorb(
+            offset,
+            row,
+            column,
+            (np.asarray(volume_price, dtype=float), np.asarray(volume, dtype=float), np.asarray(count)),
+            (np.asarray(edge_volume_price, dtype=float), np.asarray(edge_volume, dtype=float), np.asarray(edge_count)),
+            on_edge,
+        )
+
+    def _market_day(self, side, execution_times, dt, start, end):
+        """
+        MarketDay whose window k covers the windows start[k] to end[k] - 1 of the
+        accumulator and the transactions exactly on the boundary end[k].
+        """
+        s = self.sides.index(side)
+
+        def window_sums(main, edge):
+            prefix = np.concatenate([np.zeros((1,) + main.shape[2:], dtype=main.dtype), main[s].cumsum(axis=0)])
+            return prefix[end] - prefix[start] + edge[s, end]
+
+        volume_price = window_sums(self.volume_price, self.edge_volume_price)
+        volume = window_sums(self.volume, self.edge_volume)
+        count = window_sums(self.count, self.edge_count)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vwap = np.where(count > 0, volume_price / volume, np.nan)
+
+        return MarketDay(execution_times, self.products, vwap, count, dt, volume)
+
+    def market_day(self, side: str = "BUY", window: str = "bucket", lookback: int = 4) -> MarketDay:
+        """
+        Average prices and trade counts of every execution window.
+
+        Args:
+            side (str): Side of the transactions.
+            window (str): Transactions every window covers, one of VWAP_WINDOWS:
+                'bucket' the window itself as get_average_prices, 'cumulative' all
+                windows since the first one, 'sliding' the last lookback windows.
+            lookback (int): Number of windows of the 'sliding' variant.
+
+        Returns:
+            MarketDay: Prices and trade counts over the chosen windows.
+        """
+        first = np.arange(len(self.execution_times))
+
+        return self._market_day(
+            side, self.execution_times, self.dt, _window_start(first, window, lookback), first + 1
+        )
+
+    def rollup(
+            self,
+            trading_start: pd.Timestamp,
+            trading_end: pd.Timestamp,
+            dt: int,
+            side: str = "BUY",
+            window: str = "bucket",
+            lookback: int = 4,
+    ) -> MarketDay:
+        """
+        Average prices and trade counts of coarser execution windows, summed from
+        the windows of the accumulator through prefix sums.
+
+        Minute aggregates (see fetch_minute_aggregates) roll up to any multiple of
+        a minute and to any lookback they cover, without querying again.
+
+        Args:
+            trading_start (pd.Timestamp): Start of the first execution window.
+            trading_end (pd.Timestamp): Target delivery date, execution windows end before it.
+            dt (int): Length of the execution windows in minutes, a multiple of the accumulator's.
+            side (str): Side of the transactions.
+            window (str): Transactions every window covers, see market_day.
+            lookback (int): Number of windows of the 'sliding' variant.
+
+        Returns:
+            MarketDay: Prices and trade counts of the windows of execution_windows.
+
+        Raises:
+            ValueError: If the windows are not made of whole accumulator windows
+                within its span.
+        """
+        execution_times = execution_windows(trading_start, trading_end, dt)
+        offset = execution_times.as_unit("ns").asi8 - self._start
+        width = pd.Timedelta(minutes=dt).value // self._step
+        first = offset // self._step
+        last = first + width
+
+        if (
+                pd.Timedelta(minutes=dt).value % self._step
+                or (offset % self._step).any()
+                or (first < 0).any()
+                or (last > len(self.execution_times)).any()
+        ):
+            raise ValueError(
+                f"Execution windows of {dt} minutes from {trading_start} are not covered by "
+                f"the {self.dt} minute windows from {self.execution_times[0]}"
+            )
+
+        return self._market_day(
+            side, execution_times, dt, _window_start(first, window, lookback), last
+        )
+
+    def save(self, path: str):
+        """Writes the sums to an .npz file, see load."""
+        np.savez(
+            path,
+            execution_times=self.execution_times.as_unit("ns").asi8,
+            products=self.products.as_unit("ns").asi8,
+            dt=self.dt,
+            sides=np.array(self.sides),
+            **{name: getattr(self, name) for name in ACCUMULATOR_SUMS},
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "VwapAccumulator":
+        """Reads an accumulator written by save."""
+        with np.load(path) as data:
+            accumulator = cls(
+                pd.DatetimeIndex(data["execution_times"].astype("datetime64[ns]")),
+                pd.DatetimeIndex(data["products"].astype("datetime64[ns]")),
+                int(data["dt"]),
+                tuple(data["sides"].tolist()),
+            )
+            for name in ACCUMULATOR_SUMS:
+                setattr(accumulator, name, data[name])
+
+        return accumulator
+
+
+def accumulate_transactions(
+        conn: PgConnection,
+        trading_start: pd.Timestamp,
+        trading_end: pd.Timestamp,
+        dt: int = 15,
+        sides: tuple = ("BUY",),
+) -> VwapAccumulator:
+    """
+    Fetches the transactions of a trading day in one query into a VwapAccumulator.
+
+    Selects the transactions get_average_prices would see in any execution
+    window of the day. The sums are kept in double precision, so average prices
+    may differ from the SQL aggregates in the last digits.
+
+    Args:
+        conn (PgConnection): Connection to the transaction database.
+        trading_start (pd.Timestamp): Start of the first execution window.
+        trading_end (pd.Timestamp): Target delivery date, execution windows end before it.
+        dt (int): Length of the execution windows in minutes.
+        sides (tuple): Sides to fetch.
+
+    Returns:
+        VwapAccumulator: Sums of the day's transactions.
+    """
+    execution_times = execution_windows(trading_start, trading_end, dt)
+    products = delivery_products(trading_end)
+    accumulator = VwapAccumulator(execution_times, products, dt, sides)
+
+    if len(execution_times) == 0:
+        return accumulator
+
+    last_end = execution_times[-1] + pd.Timedelta(minutes=dt)
+
+    cursor = conn.cursor()
+
+    # side is compared as text, so the text[] parameter also matches an enum column
+    cursor.execute(
+        """
+        SELECT
+        executiontime, deliverystart, price, volume, side
+        FROM
+        transactions_intraday_de
+        WHERE
+        (executiontime BETWEEN %s AND %s)
+        AND (product ='XBID_Hour_Power' or product = 'Intraday_Hour_Power')
+        AND side::text = ANY(%s)
+        AND deliverystart < %s
+        AND deliverystart >= %s;
+        """,
+        (
+            str(execution_times[0]),
+            str(last_end),
+            list(sides),
+            str(trading_end),
+            str(products[0]),
+        ),
+    )
+    result = cursor.fetchall()
+
+    if result:
+        df = pd.DataFrame(result, columns=["executiontime", "deliverystart", "price", "volume", "side"])
+        for column in ("executiontime", "deliverystart"):
+            times = pd.DatetimeIndex(df[column])
+
+            # Remove timezone if present
+            if times.tz is not None:
+                times = times.tz_localize(None)
+            df[column] = times
+
+        accumulator.add_transactions(df)
+
+    return accumulator
+
+
+def fetch_minute_aggregates(
+        conn: PgConnection,
+        trading_end: pd.Timestamp,
+        lookback_h: float = MINUTE_LOOKBACK_H,
+        sides: tuple = ("BUY",),
+) -> VwapAccumulator:
+    """
+    Fetches per-minute sums of the transactions of a trading day in one query.
+
+    The accumulator has one minute windows from lookback_h hours before the
+    trading day until trading_end, with the sums of the transactions exactly on
+    every full minute kept as edge sums. VwapAccumulator.rollup turns them into
+    the prices of any window length in minutes and any shorter lookback, equal to
+    get_average_prices up to the float precision of the SQL aggregates.
+
+    Args:
+        conn (PgConnection): Connection to the transaction database.
+        trading_end (pd.Timestamp): Target delivery date.
+        lookback_h (float): Hours of execution time before the trading day.
+        sides (tuple): Sides to fetch.
+
+    Returns:
+        VwapAccumulator: Minute sums of the trading day.
+    """
+    trading_start = trading_end - pd.Timedelta(days=1) - pd.Timedelta(hours=lookback_h)
+    execution_times = execution_windows(trading_start, trading_end, 1)
+    products = delivery_products(trading_end)
+    accumulator = VwapAccumulator(execution_times, products, 1, sides)
+
+    last_end = execution_times[-1] + pd.Timedelta(minutes=1)
+    on_minute = "executiontime = date_trunc('minute', executiontime)"
+
+    cursor = conn.cursor()
+
+    # side is compared as text, so the text[] parameter also matches the
+    # trade_side enum column of the compact schema
+    cursor.execute(
+        f"""
+        SELECT
+        date_trunc('minute', executiontime) AS minute,
+        deliverystart,
+        side,
+        SUM(CAST(price AS DOUBLE PRECISION)*volume),
+        SUM(CAST(volume AS DOUBLE PRECISION)),
+        COUNT(*),
+        SUM(CASE WHEN {on_minute} THEN CAST(price AS DOUBLE PRECISION)*volume ELSE 0 END),
+        SUM(CASE WHEN {on_minute} THEN CAST(volume AS DOUBLE PRECISION) ELSE 0 END),
+        SUM(CASE WHEN {on_minute} THEN 1 ELSE 0 END)
+        FROM
+        transactions_intraday_de
+        WHERE
+        (executiontime BETWEEN %s AND %s)
+        AND (product ='XBID_Hour_Power' or product = 'Intraday_Hour_Power')
+        AND side::text = ANY(%s)
+        AND deliverystart < %s
+        AND deliverystart >= %s
+        GROUP BY
+        1, 2, 3;
+        """,
+        (
+            str(execution_times[0]),
+            str(last_end),
+            list(sides),
+            str(trading_end),
+            str(products[0]),
+        ),
+    )
+    result = cursor.fetchall()
+
+    if result:
+        df = pd.DataFrame(
+            result,
+            columns=[
+                "minute", "deliverystart", "side", "volume_price", "volume", "count",
+                "edge_volume_price", "edge_volume", "edge_count",
+            ],
+        )
+        for column in ("minute", "deliverystart"):
+            times = pd.DatetimeIndex(df[column])
+
+            # Remove timezone if present
+            if times.tz is not None:
+                times = times.tz_localize(None)
+            df[column] = times
+
+        accumulator.add_sums(
+            df["minute"],
+            df["deliverystart"],
+            df["side"],
+            df["volume_price"],
+            df["volume"],
+            df["count"],
+            df["edge_volume_price"],
+            df["edge_volume"],
+            df["edge_count"],
+        )
+
+    return accumulator
+
+
+def load_minute_aggregates(
+        conn: PgConnection,
+        path: str,
+        trading_end: pd.Timestamp,
+        lookback_h: float = 8,
+) -> VwapAccumulator:
+    """
+    Minute aggregates of a trading day, cached in a directory.
+
+    The aggregates are fetched once with fetch_minute_aggregates, covering at
+    least MINUTE_LOOKBACK_H hours, and saved as one .npz file per day. Later runs
+    with any window length and lookback within them read the file instead of
+    querying the database.
+
+    Args:
+        conn (PgConnection): Connection to the transaction database.
+        path (str): Cache directory, created if missing.
+        trading_end (pd.Timestamp): Target delivery date.
+        lookback_h (float): Lookback the aggregates need to cover, in hours.
+
+    Returns:
+        VwapAccumulator: Minute sums of the trading day.
+    """
+    trading_start = trading_end - pd.Timedelta(days=1) - pd.Timedelta(hours=lookback_h)
+    file_path = os.path.join(path, f"{(trading_end - pd.Timedelta(days=1)).date()}.npz")
+
+    if os.path.exists(file_path):
+        accumulator = VwapAccumulator.load(file_path)
+        if accumulator.execution_times[0] <= trading_start:
+            return accumulator
+
+    if not os.path.exists(path):
+        os.makedirs(path)
+
+    accumulator = fetch_minute_aggregates(
+        conn, trading_end, max(lookback_h, MINUTE_LOOKBACK_H), sides=("BUY", "SELL")
+    )
+    accumulator.save(file_path)
+
+    return accumulator
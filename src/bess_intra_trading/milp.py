@@ -0,0 +1,735 @@
+from typing import NamedTuple
+from pulp import (
+    LpProblem, LpVariable, LpAffineExpression, LpConstraint, LpMaximize, PULP_CBC_CMD, LpStatus,
+    LpConstraintEQ, LpConstraintLE, LpConstraintGE, LpInteger, LpContinuous
+)
+from scipy.optimize import milp, LinearConstraint, Bounds
+from scipy.sparse import csr_matrix
+import pandas as pd
+import numpy as np
+from bess_intra_trading.ledger import TradeLedger
+
+try:
+    import highspy
+except ImportError:  # optional, only needed to warm start HiGHS
+    highspy = None
+
+
+# variable blocks of the battery model, each block holds one entry per product
+VARIABLES = (
+    "current_buy_qh",
+    "current_sell_qh",
+    "battery_soc",
+    "net_buy",
+    "net_sell",
+    "charge_sign",
+    "z",
+    "w",
+)
+
+# the compact formulation needs no linearisation of the charge sign products
+COMPACT_VARIABLES = VARIABLES[:6]
+
+FORMULATIONS = ("standard", "compact")
+
+# CBC reads right-hand sides of this size as infinite
+CBC_INFINITY = 1e30
+
+
+class BatteryMILP(NamedTuple):
+    """Sparse matrix form of the battery MILP, row_lb <= A @ x <= row_ub."""
+    c: np.ndarray
+    A: csr_matrix
+    row_lb: np.ndarray
+    row_ub: np.ndarray
+    lb: np.ndarray
+    ub: np.ndarray
+    integrality: np.ndarray
+    n_products: int
+
+
+class _RowBuilder:
+    """Collects constraint families as COO triplets."""
+
+    def __init__(self, n_products: int, variables=VARIABLES):
+        self.n = n_products
+        self.variables = variables
+        self.rows, self.cols, self.vals = [], [], []
+        self.row_lb, self.row_ub = [], []
+        self.n_rows = 0
+
+    def var(self, name: str, products=None) -> np.ndarray:
+        """Column indices of a variable block, optionally restricted to some products."""
+        offset = self.variables.index(name) * self.n
+        if products is None:
+            products = np.arange(self.n)
+        return offset + np.asarray(products)
+
+    def add(self, terms, lb, ub):
+        """
+        Adds one constraint per entry of the column arrays in terms.
+
+        Args:
+            terms (list): (column indices, coefficient) pairs of equal length.
+            lb (float or np.ndarray): Lower bound of the rows.
+            ub (float or np.ndarray): Upper bound of the rows.
+
+        Returns:
+            slice: Row positions of the added constraints.
+        """
+        k = len(terms[0][0])
+        rows = self.n_rows + np.arange(k)
+        for cols, coef in terms:
+            self.rows.append(rows)
+            self.cols.append(cols)
+            self.vals.append(np.broadcast_to(np.asarray(coef, dtype=float), (k,)))
+        self.row_lb.append(np.broadcast_to(np.asarray(lb, dtype=float), (k,)))
+        self.row_ub.append(np.broadcast_to(np.asarray(ub, dtype=float), (k,)))
+        self.n_rows += k
+
+        return slice(rows[0], rows[0] + k) if k else slice(self.n_rows, self.n_rows)
+
+    def add_sum(self, cols, coef, lb, ub):
+        """Adds a single constraint summing over all given columns."""
+        self.rows.append(np.full(len(cols), self.n_rows))
+        self.cols.append(cols)
+        self.vals.append(np.broadcast_to(np.asarray(coef, dtype=float), (len(cols),)))
+        self.row_lb.append(np.array([lb], dtype=float))
+        self.row_ub.append(np.array([ub], dtype=float))
+        self.n_rows += 1
+
+        return self.n_rows - 1
+
+    def matrix(self) -> csr_matrix:
+        return csr_matrix(
+            (np.concatenate(self.vals), (np.concatenate(self.rows), np.concatenate(self.cols))),
+            shape=(self.n_rows, len(self.variables) * self.n),
+        )
+
+
+class BatteryModelTemplate:
+    """
+    Battery MILP compiled once per product grid and patched in place.
+
+    Within a trading day the structure of the model never changes, only the
+    objective prices, the Netting right-hand sides, the MaxCycles bound and
+    the set of priced products do. The constraint matrix is therefore built
+    once and update() rewrites the affected vectors before every solve. HiGHS
+    reads the matrices directly, CBC solves a PuLP problem that is created on
+    the first CBC solve and from then on only patched, see _PulpModel.
+
+    The "standard" formulation mirrors the named PuLP constraints of
+    solve_intrinsic_problem one to one. Products without a price keep their
+    Cap/Rate/SellVsSOC rows with an infinite upper bound and have their
+    current trades pinned to zero through the variable bounds.
+
+    The "compact" formulation solves the same problem with fewer variables and
+    a tighter relaxation. Since net_buy <= M * charge_sign and
+    net_sell <= M * (1 - charge_sign) already force z = net_buy and w = net_sell,
+    the auxiliaries z and w and their eight constraints are dropped and Netting
+    acts on net_buy - net_sell directly. M is the rate limit cap * c_rate instead
+    of 100. Products without a price cannot trade, so their net positions are
+    fixed by the previous trades through the bounds and their charge sign is a
+    fixed continuous variable, leaving binaries only on tradable products.
+    """
+
+    def __init__(self, index, cap, c_rate, roundtrip_eff, M=100, formulation="standard"):
+        """
+        Compiles the constraint matrix for a product grid.
+
+        Args:
+            index (pd.DatetimeIndex): Delivery products of the grid.
+            cap (float): Battery capacity.
+            c_rate (float): Battery c-rate.
+            roundtrip_eff (float): Roundtrip efficiency.
+            M (float): Big-M constant of the standard formulation.
+            formulation (str): "standard" or "compact".
+        """
+        if formulation not in FORMULATIONS:
+            raise ValueError(f"Unknown formulation '{formulation}', choose one of {FORMULATIONS}")
+
+        self.index = index
+        self.cap = cap
+        self.c_rate = c_rate
+        self.roundtrip_eff = roundtrip_eff
+        self.formulation = formulation
+        self.variables = VARIABLES if formulation == "standard" else COMPACT_VARIABLES
+
+        # the rate limit bounds net positions of tradable products
+        if formulation == "compact":
+            M = cap * c_rate
+
+        n = len(index)
+        efficiency = roundtrip_eff**0.5
+        rb = _RowBuilder(n, self.variables)
+        self._rb = rb
+
+        # BatteryBalance
+        rb.add(
+            [
+                (rb.var("battery_soc", np.arange(1, n)), 1.0),
+                (rb.var("battery_soc", np.arange(n - 1)), -1.0),
+                (rb.var("net_buy", np.arange(n - 1)), -efficiency),
+                (rb.var("net_sell", np.arange(n - 1)), 1.0 / efficiency),
+            ],
+            0.0,
+            0.0,
+        )
+
+        # InitialBatterySOC
+        self._initial_soc_row = rb.add([(rb.var("battery_soc", [0]), 1.0)], 0.0, 0.0).start
+
+        # Cap, BuyRate, SellRate and SellVsSOC, relaxed by update() for NaN products
+        relaxed_rows = [
+            rb.add([(rb.var("battery_soc"), 1.0)], -np.inf, cap),
+            rb.add([(rb.var("net_buy"), 1.0)], -np.inf, cap * c_rate),
+            rb.add([(rb.var("net_sell"), 1.0)], -np.inf, cap * c_rate),
+            rb.add(
+                [(rb.var("net_sell"), 1.0 / efficiency), (rb.var("battery_soc"), -1.0)],
+                -np.inf,
+                0.0,
+            ),
+        ]
+
+        # big M constraints for net buy and sell
+        big_m_rows = [
+            rb.add([(rb.var("net_buy"), 1.0), (rb.var("charge_sign"), -M)], -np.inf, 0.0),
+            rb.add([(rb.var("net_sell"), 1.0), (rb.var("charge_sign"), M)], -np.inf, M),
+        ]
+
+        if formulation == "standard":
+            rb.add([(rb.var("z"), 1.0), (rb.var("charge_sign"), -M)], -np.inf, 0.0)
+            rb.add([(rb.var("z"), 1.0), (rb.var("net_buy"), -1.0)], -np.inf, 0.0)
+            rb.add(
+                [(rb.var("z"), 1.0), (rb.var("net_buy"), -1.0), (rb.var("charge_sign"), -M)],
+                -M,
+                np.inf,
+            )
+
+            rb.add([(rb.var("w"), 1.0), (rb.var("charge_sign"), M)], -np.inf, M)
+            rb.add([(rb.var("w"), 1.0), (rb.var("net_sell"), -1.0)], -np.inf, 0.0)
+            rb.add(
+                [(rb.var("w"), 1.0), (rb.var("net_sell"), -1.0), (rb.var("charge_sign"), M)],
+                0.0,
+                np.inf,
+            )
+            net = [(rb.var("z"), 1.0), (rb.var("w"), -1.0)]
+        else:
+            # NaN products have fixed net positions and need no big M rows
+            relaxed_rows += big_m_rows
+            net = [(rb.var("net_buy"), 1.0), (rb.var("net_sell"), -1.0)]
+
+        self._relaxed_rows = relaxed_rows
+
+        # Netting, right-hand side set by update()
+        self._netting_rows = rb.add(
+            net + [(rb.var("current_buy_qh"), -1.0), (rb.var("current_sell_qh"), 1.0)],
+            0.0,
+            0.0,
+        )
+
+        # MaxCycles, bound set by update()
+        self._max_cycles_row = rb.add_sum(rb.var("net_buy"), efficiency, -np.inf, np.inf)
+
+        # all variables are non-negative, the charge sign is binary
+        n_vars = len(self.variables) * n
+        ub = np.full(n_vars, np.inf)
+        ub[rb.var("charge_sign")] = 1.0
+        integrality = np.zeros(n_vars)
+        integrality[rb.var("charge_sign")] = 1
+
+        self.model = BatteryMILP(
+            c=np.zeros(n_vars),
+            A=rb.matrix(),
+            row_lb=np.concatenate(rb.row_lb),
+            row_ub=np.concatenate(rb.row_ub),
+            lb=np.zeros(n_vars),
+            ub=ub,
+            integrality=integrality,
+            n_products=n,
+        )
+
+        # bounds of the compiled grid, before any NaN relaxation
+        self._base_row_ub = self.model.row_ub.copy()
+        self._base_lb = self.model.lb.copy()
+        self._base_ub = self.model.ub.copy()
+        self._base_integrality = self.model.integrality.copy()
+
+        # PuLP problem for CBC, created on the first CBC solve
+        self._pulp = None
+
+    def update(self, coefficients, prev_net_buy, prev_net_sell, max_cycles, initial_soc=0.0):
+        """
+        Patches objective, right-hand sides and bounds for a new execution step.
+
+        Args:
+            coefficients (ObjectiveCoefficients): Output of build_objective_coefficients.
+            prev_net_buy (np.ndarray): Net bought quantity per product so far.
+            prev_net_sell (np.ndarray): Net sold quantity per product so far.
+            max_cycles (float): Cycles allowed in the optimization horizon.
+            initial_soc (float): State of charge at the start of the first product.
+
+        Returns:
+            BatteryModelTemplate: self, for chaining.
+        """
+        model = self.model
+        rb = self._rb
+        nan_mask = coefficients.nan_mask
+        relaxed = np.flatnonzero(nan_mask)
+
+        # objective, maximized
+        model.c[rb.var("current_sell_qh")] = np.where(nan_mask, 0.0, coefficients.sell)
+        model.c[rb.var("current_buy_qh")] = np.where(nan_mask, 0.0, -coefficients.buy)
+
+        # Cap/Rate/SellVsSOC only bind for priced products
+        model.row_ub[:] = self._base_row_ub
+        for rows in self._relaxed_rows:
+            model.row_ub[rows.start + relaxed] = np.inf
+
+        netting_rhs = prev_net_buy - prev_net_sell
+        model.row_lb[self._netting_rows] = netting_rhs
+        model.row_ub[self._netting_rows] = netting_rhs
+
+        model.row_ub[self._max_cycles_row] = max_cycles * self.cap
+
+        model.row_lb[self._initial_soc_row] = initial_soc
+        model.row_ub[self._initial_soc_row] = initial_soc
+
+        model.lb[:] = self._base_lb
+        model.ub[:] = self._base_ub
+        model.integrality[:] = self._base_integrality
+
+        # NaN products cannot trade
+        model.ub[rb.var("current_buy_qh", relaxed)] = 0.0
+        model.ub[rb.var("current_sell_qh", relaxed)] = 0.0
+
+        if self.formulation == "compact":
+            # their net positions follow from the previous trades alone
+            fixed = {
+                "net_buy": np.maximum(netting_rhs[relaxed], 0.0),
+                "net_sell": np.maximum(-netting_rhs[relaxed], 0.0),
+                "charge_sign": (netting_rhs[relaxed] > 0).astype(float),
+            }
+            for name, value in fixed.items():
+                model.lb[rb.var(name, relaxed)] = value
+                model.ub[rb.var(name, relaxed)] = value
+            model.integrality[rb.var("charge_sign", relaxed)] = 0
+
+        return self
+
+    def solve(self, solver="highs", warm_start=None, stats=None) -> np.ndarray:
+        """
+        Solves the current state of the model with the given backend.
+
+        Args:
+            solver (str): "highs" or "cbc".
+            warm_start (dict): Start values per variable block, see warm_start_values.
+                Ignored by backends without warm_start_supported.
+            stats (dict): Filled by HiGHS with its branch-and-bound node count and
+                whether it accepted the warm start, see solve_with_highs.
+        """
+        x0 = None
+        if warm_start is not None and warm_start_supported(solver):
+            # keep the start within the bounds fixed for this step
+            x0 = np.clip(
+                np.concatenate([warm_start[name] for name in self.variables]),
+                self.model.lb,
+                self.model.ub,
+            )
+
+        if solver == "highs":
+            return solve_with_highs(self.model, x0=x0, stats=stats)
+
+        return self._pulp_model().solve()
+
+    def _pulp_model(self):
+        """The persistent PuLP problem, patched to the current state of the model."""
+        if self._pulp is None:
+            self._pulp = _PulpModel(self.model, self.variables)
+
+        return self._pulp.sync(self.model)
+
+    def solve_relaxation(self, solver="highs", tol=1e-6):
+        """
+        Solves the LP relaxation of the current state of the model. If the
+        binaries come out integral, the relaxed optimum is optimal for the MILP
+        and branch-and-bound can be skipped.
+
+        Args:
+            solver (str): "highs" or "cbc".
+            tol (float): Largest accepted distance of a binary from 0 or 1.
+
+        Returns:
+            np.ndarray: The solution with binaries rounded, or None if any of
+            them is fractional.
+        """
+        relaxed = self.model._replace(integrality=np.zeros_like(self.model.integrality))
+
+        if solver == "highs":
+            x = solve_with_highs(relaxed)
+        else:
+            x = self._pulp_model().solve(mip=False)
+
+        integer = self.model.integrality.astype(bool)
+        rounded = np.round(x[integer])
+        if np.abs(x[integer] - rounded).max(initial=0.0) > tol:
+            return None
+
+        x[integer] = rounded
+        return x
+
+    def values(self, x) -> dict:
+        """Splits a solution vector into its variable blocks."""
+        n = self.model.n_products
+
+        return {name: x[k * n:(k + 1) * n] for k, name in enumerate(self.variables)}
+
+
+def build_battery_milp(
+        coefficients,
+        prev_net_buy,
+        prev_net_sell,
+        cap,
+        c_rate,
+        roundtrip_eff,
+        max_cycles,
+        M=100,
+        formulation="standard",
+) -> BatteryMILP:
+    """
+    Builds the battery model of solve_intrinsic_problem as sparse matrices
+    for a single execution step.
+
+    Returns:
+        BatteryMILP: The model in matrix form.
+    """
+    n = len(coefficients.nan_mask)
+    template = BatteryModelTemplate(
+        pd.RangeIndex(n), cap, c_rate, roundtrip_eff, M=M, formulation=formulation
+    )
+
+    return template.update(coefficients, prev_net_buy, prev_net_sell, max_cycles).model
+
+
+def warm_start_supported(solver: str) -> bool:
+    """
+    Whether the backend takes a MIP start, only HiGHS with the optional highspy
+    package. CBC returns schedules worse than its cold optimum from MIP starts
+    that violate the rounded constraints of the current step, so it solves cold.
+    """
+    return solver == "highs" and highspy is not None
+
+
+def warm_start_values(results: pd.DataFrame, index) -> dict:
+    """
+    Turns the schedule of the previous execution step into a MIP start.
+
+    The trades of the previous step have been executed since, so keeping its
+    net positions without any new trade is feasible for the current step.
+
+    Args:
+        results (pd.DataFrame): Results of the previous solve_intrinsic_problem call.
+        index (pd.DatetimeIndex): Delivery products of the current step.
+
+    Returns:
+        dict: Start values per variable block of VARIABLES.
+    """
+    # all variables are non-negative, clip solver noise such as -1e-12
+    previous = results.reindex(index).astype(float).fillna(0).clip(lower=0)
+    charge_sign = np.round(previous["charge_sign"].to_numpy())
+    net_buy = previous["net_buy"].to_numpy()
+    net_sell = previous["net_sell"].to_numpy()
+
+    return {
+        "current_buy_qh": np.zeros(len(index)),
+        "current_sell_qh": np.zeros(len(index)),
+        "battery_soc": previous["battery_soc"].to_numpy(),
+        "net_buy": net_buy,
+        "net_sell": net_sell,
+        "charge_sign": charge_sign,
+        "z": net_buy * charge_sign,
+        "w": net_sell * (1 - charge_sign),
+    }
+
+
+def solve_with_highs(model: BatteryMILP, mip_rel_gap: float = 1e-9, x0=None, stats=None) -> np.ndarray:
+    """
+    Solves the battery model in-process with HiGHS through scipy.optimize.milp.
+
+    scipy.optimize.milp takes no MIP start, a start x0 is therefore passed to
+    HiGHS through highspy when it is installed and ignored otherwise.
+
+    Args:
+        stats (dict): Filled with "mip_node_count", the branch-and-bound nodes
+            HiGHS explored, and "warm_start_accepted", whether HiGHS took the
+            start x0 as its first incumbent.
+
+    Raises:
+        ValueError: If HiGHS does not return a feasible solution.
+    """
+    if x0 is not None and highspy is not None:
+        return _solve_with_highspy(model, mip_rel_gap, x0, stats)
+
+    res = milp(
+        -model.c,
+        constraints=LinearConstraint(model.A, model.row_lb, model.row_ub),
+        integrality=model.integrality,
+        bounds=Bounds(model.lb, model.ub),
+        options={"mip_rel_gap": mip_rel_gap},
+    )
+    if res.x is None:
+        raise ValueError(f"HiGHS found no solution: {res.message}")
+
+    if stats is not None:
+        stats["mip_node_count"] = getattr(res, "mip_node_count", None)
+        stats["warm_start_accepted"] = False
+
+    return res.x
+
+
+def _solve_with_highspy(model: BatteryMILP, mip_rel_gap: float, x0, stats=None) -> np.ndarray:
+    """
+    Solves the battery model with highspy, seeding HiGHS with the start x0.
+
+    HiGHS completes the start by solving the LP with its integer values fixed
+    and, if that is feasible, reports it as its first new incumbent. The start
+    therefore counts as accepted when the first incumbent HiGHS reports keeps
+    the integer values of x0. HighsInfo has no field for it.
+    """
+    A = model.A.tocsr()
+
+    lp = highspy.HighsLp()
+    lp.num_col_ = A.shape[1]
+    lp.num_row_ = A.shape[0]
+    lp.sense_ = highspy.ObjSense.kMaximize
+    lp.col_cost_ = model.c
+    lp.col_lower_ = model.lb
+    lp.col_upper_ = np.minimum(model.ub, highspy.kHighsInf)
+    lp.row_lower_ = np.maximum(model.row_lb, -highspy.kHighsInf)
+    lp.row_upper_ = np.minimum(model.row_ub, highspy.kHighsInf)
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+    lp.a_matrix_.num_col_ = A.shape[1]
+    lp.a_matrix_.num_row_ = A.shape[0]
+    lp.a_matrix_.start_ = A.indptr
+    lp.a_matrix_.index_ = A.indices
+    lp.a_matrix_.value_ = A.data
+    lp.integrality_ = [
+        highspy.HighsVarType.kInteger if v else highspy.HighsVarType.kContinuous
+        for v in model.integrality
+    ]
+
+    h = highspy.Highs()
+    h.setOptionValue("output_flag", False)
+    h.setOptionValue("mip_rel_gap", mip_rel_gap)
+    h.passModel(lp)
+
+    incumbents = []
+    h.cbMipImprovingSolution.subscribe(
+        lambda event: incumbents.append(np.array(event.data_out.mip_solution)) if not incumbents else None
+    )
+
+    start = highspy.HighsSolution()
+    start.col_value = list(x0)
+    start.value_valid = True
+    h.setSolution(start)
+
+    h.run()
+    if h.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+        raise ValueError(f"HiGHS found no solution: {h.modelStatusToString(h.getModelStatus())}")
+
+    if stats is not None:
+        integer = model.integrality.astype(bool)
+        stats["mip_node_count"] = h.getInfo().mip_node_count
+        stats["warm_start_accepted"] = bool(incumbents) and bool(
+            np.array_equal(np.round(incumbents[0][integer]), np.round(x0[integer]))
+        )
+
+    return np.array(h.getSolution().col_value)
+
+
+class _PulpModel:
+    """
+    PuLP problem of a battery model, kept across solves for CBC.
+
+    The variables, the row expressions and their constraints are created once.
+    sync() copies the objective, bounds and right-hand sides that changed since
+    the last solve into them. Rows relaxed for products without a price stay in
+    the problem with an infinite right-hand side, so the problem only grows when
+    a row is bounded for the first time. CBC still runs as a subprocess reading
+    an MPS file per solve.
+    """
+
+    def __init__(self, model: BatteryMILP, variables=None):
+        """
+        Args:
+            model (BatteryMILP): Model whose matrix the problem is built from.
+            variables (tuple): Names of the variable blocks, for readable MPS files.
+        """
+        n = model.n_products
+        if variables is None:
+            names = [f"x{j}" for j in range(len(model.c))]
+        else:
+            names = [f"{name}_{k}" for name in variables for k in range(n)]
+        self.x = [LpVariable(name, lowBound=0) for name in names]
+
+        A = model.A.tocsr()
+        self.rows = [
+            LpAffineExpression(
+                zip(
+                    [self.x[j] for j in A.indices[A.indptr[r]:A.indptr[r + 1]]],
+                    A.data[A.indptr[r]:A.indptr[r + 1]].tolist(),
+                )
+            )
+            for r in range(A.shape[0])
+        ]
+
+        # every variable is in the objective, so that PuLP reports a value for all of them
+        self.objective = LpAffineExpression([(x, 0.0) for x in self.x])
+
+        # constraints in the problem, per row and sense
+        self.constraints = {}
+        self.problem = None
+        self.synced = None
+
+    def _reset(self):
+        self.problem = LpProblem("battery", LpMaximize)
+        self.problem += self.objective
+        self.constraints = {}
+
+    def _set_row(self, row: int, sense: int, rhs: float):
+        """Sets the right-hand side of a row, adding its constraint to the problem if needed."""
+        constraint = self.constraints.get((row, sense))
+        if constraint is None:
+            if np.isinf(rhs):
+                return
+            constraint = LpConstraint(self.rows[row], sense, name=f"r{row}_{sense + 1}")
+            self.constraints[row, sense] = constraint
+            self.problem += constraint
+
+        constraint.changeRHS(float(np.clip(rhs, -CBC_INFINITY, CBC_INFINITY)))
+
+    def sync(self, model: BatteryMILP):
+        """
+        Patches the problem to the vectors of model.
+
+        Returns:
+            _PulpModel: self, for chaining.
+        """
+        previous = self.synced
+
+        def changed(*names):
+            if previous is None:
+                return np.arange(len(getattr(model, names[0])))
+            return np.flatnonzero(
+                np.any([getattr(model, name) != getattr(previous, name) for name in names], axis=0)
+            )
+
+        if self.problem is None:
+            self._reset()
+
+        for j in changed("c"):
+            self.objective[self.x[j]] = float(model.c[j])
+
+        for j in changed("lb", "ub", "integrality"):
+            x = self.x[j]
+            x.lowBound = None if np.isinf(model.lb[j]) else float(model.lb[j])
+            x.upBound = None if np.isinf(model.ub[j]) else float(model.ub[j])
+            x.cat = LpInteger if model.integrality[j] else LpContinuous
+
+        rows = changed("row_lb", "row_ub")
+        equal = model.row_lb[rows] == model.row_ub[rows]
+
+        # an equality cannot be relaxed in place, a row that stops being one needs a new problem
+        if any((r, LpConstraintEQ) in self.constraints for r in rows[~equal]):
+            self._reset()
+            rows = np.arange(len(model.row_lb))
+            equal = model.row_lb == model.row_ub
+
+        for r, eq in zip(rows, equal):
+            if eq:
+                self._set_row(r, LpConstraintEQ, model.row_lb[r])
+            else:
+                self._set_row(r, LpConstraintLE, model.row_ub[r])
+                self._set_row(r, LpConstraintGE, model.row_lb[r])
+
+        self.synced = model._replace(
+            **{name: getattr(model, name).copy() for name in ("c", "row_lb", "row_ub", "lb", "ub", "integrality")}
+        )
+
+        return self
+
+    def solve(self, mip: bool = True) -> np.ndarray:
+        """
+        Solves the problem with CBC.
+
+        Args:
+            mip (bool): False solves the LP relaxation.
+
+        Raises:
+            ValueError: If CBC does not find an optimal solution.
+        """
+        problem = self.problem
+        problem.solve(PULP_CBC_CMD(msg=0, mip=mip))
+
+        # CBC's preprocessing can wrongly declare the model infeasible when previous
+        # net trades leave right-hand sides of the order of 1e-9, retry without it
+        if LpStatus[problem.status] != "Optimal":
+            problem.solve(PULP_CBC_CMD(msg=0, mip=mip, options=["preprocess off"]))
+
+        if LpStatus[problem.status] != "Optimal":
+            raise ValueError(f"CBC found no solution: {LpStatus[problem.status]}")
+
+        return np.array(
+            [self.synced.lb[j] if x.value() is None else x.value() for j, x in enumerate(self.x)],
+            dtype=float,
+        )
+
+
+def solve_with_cbc(model: BatteryMILP) -> np.ndarray:
+    """
+    Solves the battery model with CBC by translating the matrices into a PuLP
+    problem. Templates keep that problem across solves instead.
+
+    Raises:
+        ValueError: If CBC does not find an optimal solution.
+    """
+    return _PulpModel(model).sync(model).solve()
+
+
+def collect_solution(values, index, price, execution_time):
+    """
+    Converts a solution into the results and trades frames returned by
+    solve_intrinsic_problem.
+
+    Args:
+        values (dict): Solution per variable block, see BatteryModelTemplate.values.
+        index (pd.DatetimeIndex): Delivery products.
+        price (np.ndarray): Rounded prices of the products.
+        execution_time (pd.Timestamp): Execution time of the trades.
+
+    Returns:
+        tuple: (results, trades) DataFrames.
+    """
+    results = pd.DataFrame(
+        {
+            name: values[name]
+            for name in (
+                "current_buy_qh",
+                "current_sell_qh",
+                "battery_soc",
+                "net_buy",
+                "net_sell",
+                "charge_sign",
+            )
+        },
+        index=index,
+    )
+
+    # buy and sell trades interleaved per product
+    ledger = TradeLedger(2 * len(index))
+    ledger.append_solution(
+        execution_time, index, values["current_buy_qh"], values["current_sell_qh"], price
+    )
+    trades = ledger.frame()
+
+    return results, trades
@@ -3,6 +3,14 @@ from pulp import (
 )
 import pandas as pd
 import numpy as np
+from typing import NamedTuple
+from bess_intra_trading.milp import (
+    BatteryModelTemplate, collect_solution, warm_start_values, FORMULATIONS
+)
+
+
+# MILP solver backends of the battery problem
+SOLVERS = ("cbc", "highs")
 
 
 def calculate_discounted_price(price, current_time, delivery_time, discount_rate):
@@ -21,6 +29,237 @@ def calculate_discounted_price(price, current_time, delivery_time, discount_rate
     return price * discount_factor
 
 
+def calculate_discounted_prices(prices, current_time, delivery_times, discount_rate):
+    """
+    Vectorized version of calculate_discounted_price.
+
+    Args:
+        prices (array-like): Prices of the delivery products.
+        current_time (pd.Timestamp): Execution time of the trading decision.
+        delivery_times (array-like): Delivery start of each product.
+        discount_rate (float): Discount rate in percent per hour.
+
+    Returns:
+        np.ndarray: Discounted prices, NaN where the input price is NaN.
+    """
+    prices = np.asarray(prices, dtype=float)
+    time_difference = (
+        pd.DatetimeIndex(delivery_times) - current_time
+    ).total_seconds().to_numpy() / 3600  # difference in hours
+
+    # negative prices are discounted upwards, positive prices downwards
+    sign = np.where(prices < 0, 1.0, -1.0)
+    discount_factor = np.exp(sign * (discount_rate / 100) * time_difference)
+
+    # if less than one hour, keep the original price
+    return np.where(time_difference <= 1, prices, prices * discount_factor)
+
+
+class ObjectiveCoefficients(NamedTuple):
+    """Per-product arrays feeding the objective of the intrinsic problem."""
+    price: np.ndarray
+    price_sell: np.ndarray
+    price_buy: np.ndarray
+    spread: np.ndarray
+    sell: np.ndarray
+    buy: np.ndarray
+    nan_mask: np.ndarray
+    adjusted: np.ndarray
+
+
+def build_objective_coefficients(
+        prices_qh,
+        execution_time,
+        threshold,
+        threshold_abs_min,
+        discount_rate,
+        prev_net_trades,
+        e=0.01,
+) -> ObjectiveCoefficients:
+    """
+    Computes the objective coefficients of all products in one pass.
+
+    Discounted sell and buy prices are rounded to 2 decimals exactly as the
+    scalar calculate_discounted_price loop did. Products without previous net
+    trades (adjusted) pay half of the threshold spread on each side, products
+    with previous net trades are valued at the plain rounded price.
+
+    Args:
+        prices_qh (pd.DataFrame): VWAP per product, column "price".
+        execution_time (pd.Timestamp): Execution time of the trading decision.
+        threshold (float): Relative spread threshold in percent.
+        threshold_abs_min (float): Minimum absolute spread.
+        discount_rate (float): Discount rate in percent per hour.
+        prev_net_trades (pd.DataFrame): Net trades per product, columns "net_buy" and "net_sell".
+        e (float): Small penalty on selling, avoids simultaneous buying and selling.
+
+    Returns:
+        ObjectiveCoefficients: Arrays aligned to prices_qh.index.
+    """
+    return objective_coefficients(
+        prices_qh["price"].to_numpy(dtype=float),
+        prices_qh.index,
+        execution_time,
+        threshold,
+        threshold_abs_min,
+        discount_rate,
+        prev_net_trades.loc[prices_qh.index, "net_buy"].to_numpy(dtype=float),
+        prev_net_trades.loc[prices_qh.index, "net_sell"].to_numpy(dtype=float),
+        e=e,
+    )
+
+
+def objective_coefficients(
+        raw_price,
+        delivery_times,
+        execution_time,
+        threshold,
+        threshold_abs_min,
+        discount_rate,
+        prev_net_buy,
+        prev_net_sell,
+        e=0.01,
+) -> ObjectiveCoefficients:
+    """
+    Array version of build_objective_coefficients. The parameters broadcast,
+    e.g. thresholds of shape (S, 1) and previous net trades of shape (S, N)
+    give the coefficients of S scenarios at once.
+
+    Args:
+        raw_price (np.ndarray): VWAP per product.
+        delivery_times (pd.DatetimeIndex): Delivery start per product.
+        execution_time (pd.Timestamp): Execution time of the trading decision.
+        threshold (float | np.ndarray): Relative spread threshold in percent.
+        threshold_abs_min (float | np.ndarray): Minimum absolute spread.
+        discount_rate (float | np.ndarray): Discount rate in percent per hour.
+        prev_net_buy (np.ndarray): Net bought quantity per product so far.
+        prev_net_sell (np.ndarray): Net sold quantity per product so far.
+        e (float): Small penalty on selling, avoids simultaneous buying and selling.
+
+    Returns:
+        ObjectiveCoefficients: Broadcast arrays.
+    """
+    nan_mask = np.isnan(raw_price)
+
+    # discount the raw prices and round to 2 decimals
+    price_sell = np.round(
+        calculate_discounted_prices(raw_price, execution_time, delivery_times, discount_rate), 2
+    )
+    price_buy = np.round(
+        calculate_discounted_prices(raw_price, execution_time, delivery_times, -discount_rate), 2
+    )
+    price = np.round(raw_price, 2)
+
+    spread = np.maximum(
+        np.abs((threshold / 100) * np.abs(price)), threshold_abs_min
+    ) / 2
+
+    adjusted = (prev_net_buy < e) & (prev_net_sell < e)
+
+    sell = np.where(adjusted, price_sell - spread - e, price - e)
+    buy = np.where(adjusted, price_buy + spread + e, price)
+
+    return ObjectiveCoefficients(
+        price=price,
+        price_sell=price_sell,
+        price_buy=price_buy,
+        spread=spread,
+        sell=sell,
+        buy=buy,
+        nan_mask=nan_mask,
+        adjusted=adjusted,
+    )
+
+
+def fold_closed_products(
+        products,
+        price,
+        execution_time,
+        net_buy,
+        net_sell,
+        cap,
+        roundtrip_eff,
+        gate_closure=pd.Timedelta(0),
+):
+    """
+    Folds the leading products that are past gate closure and have no price
+    into an initial state, see drop_closed_products.
+
+    Works on the net positions of one schedule or, with arrays of shape
+    (scenarios, products) and roundtrip_eff of shape (scenarios, 1), of many
+    schedules on the same prices at once.
+
+    Args:
+        products (pd.DatetimeIndex): Delivery products.
+        price (np.ndarray): Price per product, NaN without trades.
+        execution_time (pd.Timestamp): Execution time of the step.
+        net_buy (np.ndarray): Net bought quantity per product so far.
+        net_sell (np.ndarray): Net sold quantity per product so far.
+        cap (float): Battery capacity.
+        roundtrip_eff: Roundtrip efficiency.
+        gate_closure (pd.Timedelta): Time before delivery at which trading closes.
+
+    Returns:
+        tuple: (number of closed products, initial state of charge, cycles used
+        by the closed products).
+    """
+    closed = (products <= execution_time + gate_closure) & np.isnan(price)
+
+    # only a leading block of products can be folded into the initial state
+    n_closed = len(closed) if closed.all() else int(np.argmin(closed))
+
+    efficiency = roundtrip_eff**0.5
+    net_buy = net_buy[..., :n_closed]
+    net_sell = net_sell[..., :n_closed]
+
+    initial_soc = np.sum(net_buy * efficiency - net_sell / efficiency, axis=-1)
+    cycles_used = np.sum(net_buy * efficiency, axis=-1) / cap
+
+    return n_closed, initial_soc, cycles_used
+
+
+def drop_closed_products(
+        prices_qh,
+        prev_net_trades,
+        execution_time,
+        cap,
+        roundtrip_eff,
+        gate_closure=pd.Timedelta(0),
+):
+    """
+    Drops the leading products that are past gate closure and have no price.
+
+    Such products cannot be traded anymore, their net positions are fixed by the
+    previous trades. Their state of charge and cycles therefore follow from
+    prev_net_trades alone and are folded into the initial state of the
+    remaining products, which keeps the optimal schedule unchanged.
+
+    Args:
+        prices_qh (pd.DataFrame): Prices on the full product grid.
+        prev_net_trades (pd.DataFrame): Net trades per product so far.
+        execution_time (pd.Timestamp): Execution time of the step.
+        cap (float): Battery capacity.
+        roundtrip_eff (float): Roundtrip efficiency.
+        gate_closure (pd.Timedelta): Time before delivery at which trading closes.
+
+    Returns:
+        tuple: (prices of the open products, initial state of charge,
+        cycles used by the dropped products).
+    """
+    n_closed, initial_soc, cycles_used = fold_closed_products(
+        prices_qh.index,
+        prices_qh["price"].to_numpy(dtype=float),
+        execution_time,
+        prev_net_trades.loc[prices_qh.index, "net_buy"].to_numpy(dtype=float),
+        prev_net_trades.loc[prices_qh.index, "net_sell"].to_numpy(dtype=float),
+        cap,
+        roundtrip_eff,
+        gate_closure=gate_closure,
+    )
+
+    return prices_qh.iloc[n_closed:].copy(), float(initial_soc), float(cycles_used)
+
+
 def solve_intrinsic_problem(
         prices_qh,
         execution_time,
@@ -34,41 +273,94 @@ def solve_intrinsic_problem(
         prev_net_trades=pd.DataFrame(
             columns=["sum_buy", "sum_sell", "net_buy", "net_sell", "product"]
         ),
+        solver="cbc",
+        template=None,
+        warm_start=None,
+        formulation="standard",
+        lp_relaxation=False,
+        stats=None,
+        initial_soc=0.0,
 ):
-    # copy prices_qh
-    prices_qh_adj = prices_qh.copy()
-
-    # loop through prices_qh and adjust prices
-    for i in prices_qh_adj.index:
-        if not pd.isna(prices_qh_adj.loc[i, "price"]):
-            prices_qh_adj.loc[i, "price"] = calculate_discounted_price(
-                prices_qh_adj.loc[i, "price"], execution_time, i, discount_rate
-            )
+    """
+    Solves the intrinsic battery problem for one execution step.
+
+    Args:
+        solver (str): "cbc" solves the named PuLP model with CBC in a subprocess,
+            "highs" solves the same model as sparse matrices in-process with HiGHS.
+        template (BatteryModelTemplate): Model compiled for the product grid of
+            prices_qh. It is patched and solved with the chosen backend instead
+            of building a new model.
+        warm_start (pd.DataFrame): Results of the previous execution step, used
+            as MIP start by HiGHS when highspy is installed, see
+            warm_start_supported. CBC ignores it and solves cold.
+        formulation (str): "standard" or "compact", see BatteryModelTemplate.
+            Ignored when a template is given.
+        lp_relaxation (bool): Solve the LP relaxation first and accept it when
+            the charge signs come out integral, otherwise solve the MILP.
+        stats (dict): Filled with solver details of the step: whether the LP
+            relaxation was integral and, from HiGHS, its branch-and-bound node
+            count and whether it accepted the warm start.
+        initial_soc (float): State of charge at the start of the first product,
+            see drop_closed_products.
+    """
+    if solver not in SOLVERS:
+        raise ValueError(f"Unknown solver '{solver}', choose one of {SOLVERS}")
+    if formulation not in FORMULATIONS:
+        raise ValueError(f"Unknown formulation '{formulation}', choose one of {FORMULATIONS}")
 
-            # round prices to 2 decimals
-            prices_qh_adj.loc[i, "price"] = round(prices_qh_adj.loc[i, "price"], 2)
+    e = 0.01
 
-    # copy prices_qh
-    prices_qh_adj_buy = prices_qh.copy()
+    # discounted prices, threshold spreads and NaN mask for all products
+    coefficients = build_objective_coefficients(
+        prices_qh,
+        execution_time,
+        threshold,
+        threshold_abs_min,
+        discount_rate,
+        prev_net_trades,
+        e=e,
+    )
 
-    # loop through prices_qh and adjust prices
-    for i in prices_qh_adj_buy.index:
-        if not pd.isna(prices_qh_adj_buy.loc[i, "price"]):
-            prices_qh_adj_buy.loc[i, "price"] = calculate_discounted_price(
-                prices_qh_adj_buy.loc[i, "price"], execution_time, i, -discount_rate
+    prices_qh["price"] = coefficients.price
+
+    prev_net_buy = prev_net_trades.loc[prices_qh.index, "net_buy"].to_numpy(dtype=float)
+    prev_net_sell = prev_net_trades.loc[prices_qh.index, "net_sell"].to_numpy(dtype=float)
+
+    # the matrix model also carries warm starts, which only HiGHS takes
+    if (
+            template is not None
+            or solver == "highs"
+            or formulation == "compact"
+            or lp_relaxation
+    ):
+        if template is None:
+            template = BatteryModelTemplate(
+                prices_qh.index, cap, c_rate, roundtrip_eff, formulation=formulation
             )
-
-            # round prices to 2 decimals
-            prices_qh_adj_buy.loc[i, "price"] = round(
-                prices_qh_adj_buy.loc[i, "price"], 2
+        elif not template.index.equals(prices_qh.index):
+            raise ValueError("Model template was compiled for a different product grid")
+
+        template.update(
+            coefficients,
+            prev_net_buy,
+            prev_net_sell,
+            max_cycles,
+            initial_soc=initial_soc,
+        )
+        x = template.solve_relaxation(solver) if lp_relaxation else None
+        if stats is not None:
+            stats["relaxation_integral"] = x is not None
+
+        if x is None:
+            x = template.solve(
+                solver,
+                warm_start=None if warm_start is None else warm_start_values(warm_start, prices_qh.index),
+                stats=stats,
             )
-
-    prices_qh["price"] = round(prices_qh["price"], 2)
-
-    # # merhe prices_qh_adj to prices_qh with column name "price_adj"
-    # prices_qh = pd.merge(prices_qh, prices_qh_adj, left_index=True, right_index=True, suffixes=('', '_adj'))
-
-    # print(prices_qh)
+        results, trades = collect_solution(
+            template.values(x), prices_qh.index, coefficients.price, execution_time
+        )
+        return results, trades, float(template.model.c @ x)
 
     # Create the 'battery' model
     m_battery = LpProblem("battery", LpMaximize)
@@ -89,61 +381,31 @@ def solve_intrinsic_problem(
 
     M = 100
 
-    e = 0.01
-
     # Objective function
-    # Adjusted objective component for cases where previous trades < e
-    adjusted_obj = [
-        (
-            (
-                current_sell_qh[i]
-                * (
-                    prices_qh_adj.loc[i, "price"]
-                    - max(
-                        abs((threshold / 100) * abs(prices_qh.loc[i, "price"])),
-                        threshold_abs_min,
-                    )
-                    / 2
-                    - e
-                )
-            )
-            - (
-                current_buy_qh[i]
-                * (
-                    prices_qh_adj_buy.loc[i, "price"]
-                    + max(
-                        abs((threshold / 100) * abs(prices_qh.loc[i, "price"])),
-                        threshold_abs_min,
-                    )
-                    / 2
-                    + e
-                )
-            )
-        )
-        * 1.0
-        / 1.0
-        for i in prices_qh.index
-        if not pd.isna(prices_qh.loc[i, "price"])
-        and (
-            prev_net_trades.loc[i, "net_buy"] < e
-            and prev_net_trades.loc[i, "net_sell"] < e
-        )
-    ]
-
     # Original objective component for cases where previous trades >= e
     original_obj = [
-        (
-            current_sell_qh[i] * (prices_qh.loc[i, "price"] - e)
-            - current_buy_qh[i] * prices_qh.loc[i, "price"]
+        current_sell_qh[i] * sell - current_buy_qh[i] * buy
+        for i, sell, buy, is_nan, adjusted in zip(
+            prices_qh.index,
+            coefficients.sell,
+            coefficients.buy,
+            coefficients.nan_mask,
+            coefficients.adjusted,
         )
-        * 1.0
-        / 1.0
-        for i in prices_qh.index
-        if not pd.isna(prices_qh.loc[i, "price"])
-        and (
-            prev_net_trades.loc[i, "net_buy"] >= e
-            or prev_net_trades.loc[i, "net_sell"] >= e
+        if not is_nan and not adjusted
+    ]
+
+    # Adjusted objective component for cases where previous trades < e
+    adjusted_obj = [
+        current_sell_qh[i] * sell - current_buy_qh[i] * buy
+        for i, sell, buy, is_nan, adjusted in zip(
+            prices_qh.index,
+            coefficients.sell,
+            coefficients.buy,
+            coefficients.nan_mask,
+            coefficients.adjusted,
         )
+        if not is_nan and adjusted
     ]
 
     # Combine and set the objective
@@ -164,11 +426,11 @@ def solve_intrinsic_problem(
         )
         previous_index = i
 
-    m_battery += battery_soc[prices_qh.index[0]] == 0, "InitialBatterySOC"
+    m_battery += battery_soc[prices_qh.index[0]] == initial_soc, "InitialBatterySOC"
 
-    for i in prices_qh.index:
+    for i, is_nan in zip(prices_qh.index, coefficients.nan_mask):
         # Handling NaN values by setting buy and sell quantities to 0
-        if pd.isna(prices_qh.loc[i, "price"]):
+        if is_nan:
             m_battery += current_buy_qh[i] == 0, f"NaNBuy_{i}"
             m_battery += current_sell_qh[i] == 0, f"NaNSell_{i}"
         else:
@@ -219,50 +481,19 @@ def solve_intrinsic_problem(
     # print(f"Status: {LpStatus[m_battery.status]}")
     # print(f"Objective value: {m_battery.objective.value()}")
 
-    results = pd.DataFrame(
-        columns=["current_buy_qh", "current_sell_qh", "battery_soc"],
-        index=prices_qh.index,
-    )
-
-    trades = pd.DataFrame(
-        columns=["execution_time", "side", "quantity", "price", "product", "profit"]
+    values = {
+        name: np.array([variables[i].value() for i in prices_qh.index], dtype=float)
+        for name, variables in (
+            ("current_buy_qh", current_buy_qh),
+            ("current_sell_qh", current_sell_qh),
+            ("battery_soc", battery_soc),
+            ("net_buy", net_buy),
+            ("net_sell", net_sell),
+            ("charge_sign", charge_sign),
+        )
+    }
+    results, trades = collect_solution(
+        values, prices_qh.index, coefficients.price, execution_time
     )
 
-    for i in prices_qh.index:
-        if current_buy_qh[i].value() and current_buy_qh[i].value() > 0:
-            # create buy trade
-            new_trade = {
-                "execution_time": [execution_time],
-                "side": ["buy"],
-                "quantity": [current_buy_qh[i].value()],
-                "price": [prices_qh.loc[i, "price"]],
-                "product": [i],
-                "profit": [-current_buy_qh[i].value() * prices_qh.loc[i, "price"] / 1],
-            }
-
-            # append new trade using concat
-            trades = pd.concat([trades, pd.DataFrame(new_trade)], ignore_index=True)
-
-        if current_sell_qh[i].value() and current_sell_qh[i].value() > 0:
-            # create sell trade
-            new_trade = {
-                "execution_time": [execution_time],
-                "side": ["sell"],
-                "quantity": [current_sell_qh[i].value()],
-                "price": [prices_qh.loc[i, "price"]],
-                "product": [i],
-                "profit": [current_sell_qh[i].value() * prices_qh.loc[i, "price"] / 1],
-            }
-
-            # append new trade using concat
-            trades = pd.concat([trades, pd.DataFrame(new_trade)], ignore_index=True)
-
-    for i in prices_qh.index:
-        results.loc[i, "current_buy_qh"] = current_buy_qh[i].value()
-        results.loc[i, "current_sell_qh"] = current_sell_qh[i].value()
-        results.loc[i, "net_buy"] = net_buy[i].value()
-        results.loc[i, "net_sell"] = net_sell[i].value()
-        results.loc[i, "charge_sign"] = charge_sign[i].value()
-        results.loc[i, "battery_soc"] = battery_soc[i].value()
-
     return results, trades, m_battery.objective.value()
@@ -0,0 +1,175 @@
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Union
+import numpy as np
+import pandas as pd
+from psycopg2.extensions import connection as PgConnection
+from bess_intra_trading.utils import setup_logger
+from bess_intra_trading.cube import PriceCube, SharedPriceCube, build_price_cube
+from bess_intra_trading.sources import MarketDataSource
+from bess_intra_trading.strategy import RollingIntrinsicStrategy, cycle_allowance, trading_days
+
+
+log = setup_logger()
+
+# cycle budgets of simulate_parallel
+CYCLE_POLICIES = ("fixed", "reconcile")
+
+
+def _run_day(task: tuple):
+    """Simulates one trading day with a given cycle budget in a worker process."""
+    params, day, budget = task
+    profits = RollingIntrinsicStrategy(params).simulate(
+        None, day - pd.Timedelta(days=1), day, 0.0, cycle_budget={day: budget}
+    )
+
+    return day, float(profits["profit"].iloc[0]), float(profits["cycles"].iloc[0])
+
+
+def simulate_parallel(
+        params: dict,
+        conn: Union[PgConnection, MarketDataSource],
+        start_date: pd.Timestamp,
+        end_date: pd.Timestamp,
+        processes: int = None,
+        cycle_policy: str = "reconcile",
+        max_passes: int = None,
+        shared_memory: bool = False,
+) -> pd.DataFrame:
+    """
+    Runs RollingIntrinsicStrategy.simulate with the trading days spread over a
+    process pool.
+
+    Days only depend on each other through the cycle budget of cycle_allowance,
+    which carries the cycles left unused by earlier days. The cycle_policy
+    decides how days simulated apart get their budget:
+
+    - 'fixed': every day may use max_cycles / 365 cycles, so all days run at
+      once, but unused cycles are not carried forward.
+    - 'reconcile': a first pass as 'fixed', then every further pass computes
+      the budgets of cycle_allowance from the cycles of the previous pass and
+      re-runs only the days whose budget changed, until no budget changes and
+      the result equals the sequential simulate. A day's budget only depends on
+      the days before it, so the first k days are final after k passes and one
+      pass per day plus one always suffices.
+
+    The prices are read once into a price cube, unless params holds one, and
+    the outputs of the days are merged into the directory of simulate. With
+    shared_memory, the cube is published once with SharedPriceCube and every
+    worker attaches to the same blocks instead of the files.
+
+    Args:
+        params (dict): bess_params of the strategy.
+        conn (PgConnection | MarketDataSource): Source of the transactions, unused with a price cube.
+        start_date (pd.Timestamp): Start date of the simulation.
+        end_date (pd.Timestamp): End date of the simulation.
+        processes (int): Worker processes, by default the number of CPUs.
+        cycle_policy (str): One of CYCLE_POLICIES.
+        max_passes (int): Largest number of passes of the 'reconcile' policy, by default
+            one per trading day plus one.
+        shared_memory (bool): Serve the price cube to the workers from shared memory.
+
+    Returns:
+        pd.DataFrame: Profit and cumulative cycles of every simulated day, as simulate.
+
+    Raises:
+        ValueError: If the budgets of the 'reconcile' policy still change after max_passes passes.
+    """
+    if cycle_policy not in CYCLE_POLICIES:
+        raise ValueError(f"Unknown cycle policy '{cycle_policy}', choose one of {CYCLE_POLICIES}")
+
+    strategy = RollingIntrinsicStrategy(params)
+    path = strategy.output_path()
+    days = trading_days(start_date, end_date)
+    max_cycles = params['max_cycles']
+    if not days:
+        return pd.DataFrame(columns=["day", "profit", "cycles"])
+    if max_passes is None:
+        max_passes = len(days) + 1
+
+    if not os.path.exists(os.path.join(path, "trades")):
+        os.makedirs(os.path.join(path, "trades"))
+
+    # prices of all trading days, memory-mapped by every worker
+    if strategy.price_cube is None:
+        cube_path = os.path.join(strategy.output_dir, "price_cube")
+        build_price_cube(
+            conn,
+            cube_path,
+            days[0],
+            days[-1],
+            dt=strategy.dt,
+            lookback_h=strategy.lookback_h,
+            sides=("BUY",),
+        )
+        params = dict(params, price_cube=cube_path)
+
+    # workers attach to the cube in shared memory, freed once all passes are done
+    shared_cube = None
+    worker_params = params
+    if shared_memory and not isinstance(params['price_cube'], dict):
+        shared_cube = SharedPriceCube.publish(PriceCube(params['price_cube']))
+        worker_params = dict(params, price_cube=shared_cube.spec)
+
+    # every day writes to a directory of its own, merged below
+    day_dirs = {day: os.path.join(strategy.output_dir, "days", day.strftime("%Y-%m-%d")) for day in days}
+
+    budget = np.full(len(days), max_cycles / 365)
+    profit = np.zeros(len(days))
+    cycles = np.zeros(len(days))
+    rerun = np.arange(len(days))
+    start = time.perf_counter()
+
+    try:
+        with ProcessPoolExecutor(max_workers=processes or os.cpu_count()) as pool:
+            for n_pass in range(1, max_passes + 1 if cycle_policy == "reconcile" else 2):
+                tasks = [(dict(worker_params, output_dir=day_dirs[days[k]]), days[k], budget[k]) for k in rerun]
+                for k, (day, day_profit, day_cycles) in zip(rerun, pool.map(_run_day, tasks)):
+                    profit[k] = day_profit
+                    cycles[k] = day_cycles
+                log.info(
+                    "Pass {}: {} days simulated, {:.1f} s elapsed".format(
+                        n_pass, len(rerun), time.perf_counter() - start
+                    )
+                )
+
+                if cycle_policy == "fixed":
+                    break
+
+                # budgets of the sequential simulation given the cycles of this pass
+                used = np.concatenate([[0.0], np.cumsum(cycles)[:-1]])
+                days_left = np.array([(end_date - day).days for day in days])
+                sequential = cycle_allowance(max_cycles, days_left, used)
+                rerun = np.flatnonzero(~np.isclose(sequential, budget, rtol=0, atol=1e-9))
+                budget = sequential
+                if len(rerun) == 0:
+                    break
+    finally:
+        if shared_cube is not None:
+            shared_cube.unlink()
+
+    if cycle_policy == "reconcile" and len(rerun) > 0:
+        raise ValueError(
+            f"Cycle budgets of {len(rerun)} days not reconciled after {max_passes} passes, "
+            "the result would differ from the sequential simulate"
+        )
+
+    # outputs of the days merged into the directory of simulate
+    stats = []
+    for day, day_dir in day_dirs.items():
+        day_path = RollingIntrinsicStrategy(dict(params, output_dir=day_dir)).output_path()
+        trades_file = "trades_" + day.strftime("%Y-%m-%d") + ".csv"
+        shutil.copyfile(
+            os.path.join(day_path, "trades", trades_file), os.path.join(path, "trades", trades_file)
+        )
+        stats.append(pd.read_csv(os.path.join(day_path, "solver_stats.csv")))
+    shutil.rmtree(os.path.join(strategy.output_dir, "days"))
+    pd.concat(stats, ignore_index=True).to_csv(os.path.join(path, "solver_stats.csv"), index=False)
+
+    profits = pd.DataFrame({"day": days, "profit": profit, "cycles": np.cumsum(cycles)})
+    profit_frame = profits.assign(day=profits["day"].astype(object))
+    profit_frame.to_csv(os.path.join(path, "profit.csv"), index=False)
+
+    return profits
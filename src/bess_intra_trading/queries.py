@@ -0,0 +1,151 @@
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from psycopg2.extensions import connection as PgConnection
+from psycopg2.pool import AbstractConnectionPool
+from bess_intra_trading.utils import average_prices_frame
+
+
+# server-side prepared statements, the query of get_average_prices with the
+# window, side, delivery day and min_trades as parameters, whose types
+# PostgreSQL infers from the columns they are compared with
+PREPARED_STATEMENTS = {
+    "average_prices": """
+        PREPARE average_prices AS
+        SELECT
+        deliverystart,
+        SUM(price*volume)/SUM(volume) AS weighted_avg_price
+        FROM
+        transactions_intraday_de
+        WHERE
+        (executiontime BETWEEN $2 AND $3)
+        AND (product ='XBID_Hour_Power' or product = 'Intraday_Hour_Power')
+        AND side=$1
+        AND deliverystart < $4
+        AND deliverystart >= $5
+        GROUP BY
+        deliverystart
+        HAVING
+        COUNT(*) >= $6;
+        """,
+}
+
+
+class PriceQueries:
+    """
+    Price queries run as server-side prepared statements, planned once per
+    connection instead of at every step.
+
+    Connections come from a pool, so simulations in several threads share its
+    connections safely, or from a single connection. The latency of every query
+    is recorded, see latency.
+    """
+
+    def __init__(self, pool: AbstractConnectionPool = None, conn: PgConnection = None):
+        """
+        Args:
+            pool (AbstractConnectionPool): Pool to borrow a connection from for every query.
+            conn (PgConnection): Single connection to use without a pool.
+        """
+        if (pool is None) == (conn is None):
+            raise ValueError("PriceQueries needs either a connection pool or a connection")
+
+        self.pool = pool
+        self.conn = conn
+        self._prepared = {}
+        self._latencies = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        """Borrows a connection from the pool, or yields the single connection."""
+        if self.pool is None:
+            yield self.conn
+            return
+
+        conn = self.pool.getconn()
+        try:
+            yield conn
+        finally:
+            self.pool.putconn(conn)
+
+    def execute(self, name: str, params: tuple) -> list:
+        """
+        Executes the prepared statement name with params, preparing it first on
+        connections that have not seen it.
+        """
+        with self.connection() as conn:
+            start = time.perf_counter()
+            cursor = conn.cursor()
+
+            # statements live as long as the database session of the connection
+            session = (id(conn), conn.info.backend_pid)
+            with self._lock:
+                prepared = name in self._prepared.setdefault(session, set())
+            if not prepared:
+                cursor.execute(PREPARED_STATEMENTS[name])
+                with self._lock:
+                    self._prepared[session].add(name)
+
+            placeholders = ", ".join(["%s"] * len(params))
+            cursor.execute(f"EXECUTE {name} ({placeholders});", params)
+            result = cursor.fetchall()
+            cursor.close()
+
+            elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self._latencies.setdefault(name, []).append(elapsed)
+
+        return result
+
+    def average_prices(
+            self,
+            side: str,
+            execution_time_start: pd.Timestamp,
+            execution_time_end: pd.Timestamp,
+            target_delivery_date: pd.Timestamp,
+            min_trades: int = 1
+    ) -> pd.DataFrame:
+        """Same as get_average_prices, through the prepared statement."""
+        start_of_day = pd.to_datetime(target_delivery_date) - pd.Timedelta(hours=2)
+
+        # set hour and minute to 0 (europe/berlin time)
+        start_of_day = start_of_day.replace(hour=0, minute=0)
+        end_of_day = start_of_day.replace(hour=23, minute=45)
+
+        result = self.execute(
+            "average_prices",
+            (
+                side,
+                str(execution_time_start),
+                str(execution_time_end),
+                str(pd.to_datetime(target_delivery_date)),
+                str(start_of_day),
+                int(min_trades),
+            ),
+        )
+
+        return average_prices_frame(result, start_of_day, end_of_day)
+
+    def latency(self) -> pd.DataFrame:
+        """Count, mean, median, 95th percentile and maximum latency in ms per query."""
+        with self._lock:
+            latencies = {name: np.array(values) * 1000 for name, values in self._latencies.items()}
+
+        return pd.DataFrame(
+            [
+                {
+                    "query": name,
+                    "count": len(values),
+                    "mean_ms": values.mean(),
+                    "p50_ms": np.percentile(values, 50),
+                    "p95_ms": np.percentile(values, 95),
+                    "max_ms": values.max(),
+                }
+                for name, values in latencies.items()
+            ],
+            columns=["query", "count", "mean_ms", "p50_ms", "p95_ms", "max_ms"],
+        )
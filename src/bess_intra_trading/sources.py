@@ -0,0 +1,427 @@
+import numpy as np
+import pandas as pd
+from psycopg2.extensions import connection as PgConnection
+from bess_intra_trading.utils import (
+    get_average_prices, get_aggregated_average_prices, average_prices_frame
+)
+from bess_intra_trading.market import (
+    MarketDay, VwapAccumulator, fetch_market_day, accumulate_transactions,
+    execution_windows, delivery_products
+)
+
+try:
+    import duckdb
+except ImportError:  # optional, only needed by DuckDBSource
+    duckdb = None
+
+
+# products the price queries aggregate, as get_average_prices
+HOUR_PRODUCTS = ('XBID_Hour_Power', 'Intraday_Hour_Power')
+
+# columns of the transactions returned by MarketDataSource.transactions
+TRANSACTION_COLUMNS = ["executiontime", "deliverystart", "price", "volume", "side"]
+
+# backends of run_optimization --data-source
+DATA_SOURCES = ("postgres", "duckdb", "memory")
+
+
+def _wall_clock(times) -> pd.DatetimeIndex:
+    """Timestamps as timezone-naive Europe/Berlin wall clock times, the convention of the queries."""
+    try:
+        times = pd.DatetimeIndex(pd.to_datetime(times))
+    except ValueError:
+        # offsets changing with daylight saving time, e.g. +01:00 and +02:00, only parse as UTC
+        times = pd.DatetimeIndex(pd.to_datetime(times, utc=True))
+    if times.tz is not None:
+        times = times.tz_convert('Europe/Berlin').tz_localize(None)
+    return times
+
+
+class MarketDataSource:
+    """
+    Interface of the transaction data RollingIntrinsicStrategy.simulate and
+    simulate_batch read.
+
+    A source implements transactions, the hourly product transactions of an
+    execution and delivery range, and inherits average_prices, market_day and
+    accumulate computed from them in pandas and NumPy. Sources with a query
+    engine override these with aggregations pushed into the engine.
+
+    All timestamps are timezone-naive Europe/Berlin wall clock times and
+    execution ranges include both ends, as the BETWEEN of get_average_prices.
+    """
+
+    def transactions(
+            self,
+            execution_time_start: pd.Timestamp,
+            execution_time_end: pd.Timestamp,
+            delivery_start: pd.Timestamp,
+            delivery_end: pd.Timestamp,
+            sides: tuple = ("BUY",),
+    ) -> pd.DataFrame:
+        """
+        Hourly product transactions executed from execution_time_start to
+        execution_time_end, delivered from delivery_start until before delivery_end.
+
+        Returns:
+            pd.DataFrame: Transactions with the columns of TRANSACTION_COLUMNS.
+        """
+        raise NotImplementedError
+
+    def average_prices(
+            self,
+            side: str,
+            execution_time_start: pd.Timestamp,
+            execution_time_end: pd.Timestamp,
+            target_delivery_date: pd.Timestamp,
+            min_trades: int = 1
+    ) -> pd.DataFrame:
+        """Same as get_average_prices."""
+        products = delivery_products(target_delivery_date)
+        df = self.transactions(
+            execution_time_start, execution_time_end, products[0], target_delivery_date, (side,)
+        )
+
+        df["volume_price"] = df["price"] * df["volume"]
+        sums = df.groupby("deliverystart").agg(
+            volume_price=("volume_price", "sum"), volume=("volume", "sum"), trades=("price", "size")
+        )
+        sums = sums[sums["trades"] >= min_trades]
+
+        return average_prices_frame(
+            list(zip(sums.index, sums["volume_price"] / sums["volume"])),
+            products[0],
+            products[-1] + pd.Timedelta(minutes=45),
+        )
+
+    def accumulate(
+            self,
+            trading_start: pd.Timestamp,
+            trading_end: pd.Timestamp,
+            dt: int = 15,
+            sides: tuple = ("BUY",),
+    ) -> VwapAccumulator:
+        """Same as accumulate_transactions."""
+        execution_times = execution_windows(trading_start, trading_end, dt)
+        products = delivery_products(trading_end)
+        accumulator = VwapAccumulator(execution_times, products, dt, sides)
+
+        if len(execution_times) == 0:
+            return accumulator
+
+        df = self.transactions(
+            execution_times[0],
+            execution_times[-1] + pd.Timedelta(minutes=dt),
+            products[0],
+            trading_end,
+            sides,
+        )
+        if len(df):
+            accumulator.add_transactions(df)
+
+        return accumulator
+
+    def market_day(
+            self,
+            side: str,
+            trading_start: pd.Timestamp,
+            trading_end: pd.Timestamp,
+            dt: int = 15,
+    ) -> MarketDay:
+        """Same as fetch_market_day, from a single scan of the day's transactions."""
+        return self.accumulate(trading_start, trading_end, dt, (side,)).market_day(side)
+
+    def close(self):
+        """Releases the resources of the source."""
+
+
+class PostgresSource(MarketDataSource):
+    """Transactions in the PostgreSQL table of create_data, aggregated by the existing queries."""
+
+    def __init__(self, conn: PgConnection, vwap_aggregates: bool = False):
+        """
+        Args:
+            conn (PgConnection): Connection to the transaction database.
+            vwap_aggregates (bool): Read average_prices from the summary table of
+                data.refresh_vwap_aggregates.
+        """
+        self.conn = conn
+        self.vwap_aggregates = vwap_aggregates
+
+    def transactions(
+            self,
+            execution_time_start: pd.Timestamp,
+            execution_time_end: pd.Timestamp,
+            delivery_start: pd.Timestamp,
+            delivery_end: pd.Timestamp,
+            sides: tuple = ("BUY",),
+    ) -> pd.DataFrame:
+        cursor = self.conn.cursor()
+
+        # side is compared as text, so the text[] parameter also matches the
+        # trade_side enum column of the compact schema
+        cursor.execute(
+            """
+            SELECT
+            executiontime, deliverystart, price, volume, side
+            FROM
+            transactions_intraday_de
+            WHERE
+            (executiontime BETWEEN %s AND %s)
+            AND (product ='XBID_Hour_Power' or product = 'Intraday_Hour_Power')
+            AND side::text = ANY(%s)
+            AND deliverystart < %s
+            AND deliverystart >= %s;
+            """,
+            (
+                str(execution_time_start),
+                str(execution_time_end),
+                list(sides),
+                str(delivery_end),
+                str(delivery_start),
+            ),
+        )
+        df = pd.DataFrame(cursor.fetchall(), columns=TRANSACTION_COLUMNS)
+
+        # Remove timezone if present
+        for column in ("executiontime", "deliverystart"):
+            times = pd.DatetimeIndex(df[column])
+            if times.tz is not None:
+                times = times.tz_localize(None)
+            df[column] = times
+
+        return df
+
+    def average_prices(
+            self,
+            side: str,
+            execution_time_start: pd.Timestamp,
+            execution_time_end: pd.Timestamp,
+            target_delivery_date: pd.Timestamp,
+            min_trades: int = 1
+    ) -> pd.DataFrame:
+        average_prices = get_aggregated_average_prices if self.vwap_aggregates else get_average_prices
+
+        return average_prices(
+            conn=self.conn,
+            side=side,
+            execution_time_start=execution_time_start,
+            execution_time_end=execution_time_end,
+            target_delivery_date=target_delivery_date,
+            min_trades=min_trades,
+        )
+
+    def accumulate(
+            self,
+            trading_start: pd.Timestamp,
+            trading_end: pd.Timestamp,
+            dt: int = 15,
+            sides: tuple = ("BUY",),
+    ) -> VwapAccumulator:
+        return accumulate_transactions(self.conn, trading_start, trading_end, dt, sides)
+
+    def market_day(
+            self,
+            side: str,
+            trading_start: pd.Timestamp,
+            trading_end: pd.Timestamp,
+            dt: int = 15,
+    ) -> MarketDay:
+        return fetch_market_day(self.conn, side, trading_start, trading_end, dt)
+
+
+class DuckDBSource(MarketDataSource):
+    """
+    Transactions in Parquet or CSV files, scanned by an embedded DuckDB engine.
+
+    The files hold the columns of create_data, e.g. written by create_data
+    --output-file or exported from PostgreSQL. Queries read only the columns
+    and row groups they need, so a backtest runs on a laptop without a
+    database server. Needs the optional duckdb package.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: File, glob pattern (e.g. 'data/*.parquet') or list of them.
+                Paths ending in .csv or .csv.gz are read as CSV, others as Parquet.
+        """
+        if duckdb is None:
+            raise ImportError("DuckDBSource needs the duckdb package, install it with pip install duckdb")
+
+        paths = [path] if isinstance(path, str) else list(path)
+        is_csv = paths[0].endswith((".csv", ".csv.gz"))
+        files = "[" + ", ".join("'" + p.replace("'", "''") + "'" for p in paths) + "]"
+        scan = f"read_csv_auto({files})" if is_csv else f"read_parquet({files})"
+
+        self.conn = duckdb.connect()
+
+        # timestamps with a time zone become Europe/Berlin wall clock times, naive ones are taken as such
+        self.conn.execute("SET TimeZone = 'Europe/Berlin'")
+        self.conn.execute(f"""
+            CREATE VIEW transactions AS
+            SELECT
+            CAST(CAST(executiontime AS TIMESTAMPTZ) AS TIMESTAMP) AS executiontime,
+            CAST(CAST(deliverystart AS TIMESTAMPTZ) AS TIMESTAMP) AS deliverystart,
+            CAST(price AS DOUBLE) AS price,
+            CAST(volume AS DOUBLE) AS volume,
+            CAST(side AS VARCHAR) AS side
+            FROM {scan}
+            WHERE product IN ('XBID_Hour_Power', 'Intraday_Hour_Power');
+            """)
+
+    def transactions(
+            self,
+            execution_time_start: pd.Timestamp,
+            execution_time_end: pd.Timestamp,
+            delivery_start: pd.Timestamp,
+            delivery_end: pd.Timestamp,
+            sides: tuple = ("BUY",),
+    ) -> pd.DataFrame:
+        df = self.conn.execute(
+            """
+            SELECT
+            executiontime, deliverystart, price, volume, side
+            FROM
+            transactions
+            WHERE
+            (executiontime BETWEEN ? AND ?)
+            AND list_contains(?, side)
+            AND deliverystart < ?
+            AND deliverystart >= ?;
+            """,
+            [
+                pd.Timestamp(execution_time_start).to_pydatetime(),
+                pd.Timestamp(execution_time_end).to_pydatetime(),
+                list(sides),
+                pd.Timestamp(delivery_end).to_pydatetime(),
+                pd.Timestamp(delivery_start).to_pydatetime(),
+            ],
+        ).fetchdf()
+
+        return df[TRANSACTION_COLUMNS]
+
+    def average_prices(
+            self,
+            side: str,
+            execution_time_start: pd.Timestamp,
+            execution_time_end: pd.Timestamp,
+            target_delivery_date: pd.Timestamp,
+            min_trades: int = 1
+    ) -> pd.DataFrame:
+        products = delivery_products(target_delivery_date)
+        result = self.conn.execute(
+            """
+            SELECT
+            deliverystart,
+            SUM(price*volume)/SUM(volume) AS weighted_avg_price
+            FROM
+            transactions
+            WHERE
+            (executiontime BETWEEN ? AND ?)
+            AND side = ?
+            AND deliverystart < ?
+            AND deliverystart >= ?
+            GROUP BY
+            deliverystart
+            HAVING
+            COUNT(*) >= ?;
+            """,
+            [
+                pd.Timestamp(execution_time_start).to_pydatetime(),
+                pd.Timestamp(execution_time_end).to_pydatetime(),
+                side,
+                pd.Timestamp(target_delivery_date).to_pydatetime(),
+                products[0].to_pydatetime(),
+                int(min_trades),
+            ],
+        ).fetchall()
+
+        return average_prices_frame(result, products[0], products[-1] + pd.Timedelta(minutes=45))
+
+    def close(self):
+        self.conn.close()
+
+
+class InMemorySource(MarketDataSource):
+    """
+    Transactions held in NumPy arrays sorted by execution time, for tests, CI
+    and small backtests without any database.
+
+    An execution range is located by binary search, so a query costs the
+    transactions in the range rather than all of them.
+    """
+
+    def __init__(self, transactions: pd.DataFrame):
+        """
+        Args:
+            transactions (pd.DataFrame): Transactions with the columns of create_data,
+                timestamps naive Europe/Berlin or timezone-aware.
+        """
+        df = transactions[transactions["product"].isin(HOUR_PRODUCTS)]
+        execution_time = _wall_clock(df["executiontime"]).as_unit("ns").asi8
+        order = np.argsort(execution_time, kind="stable")
+
+        self.execution_time = execution_time[order]
+        self.delivery_start = _wall_clock(df["deliverystart"]).as_unit("ns").asi8[order]
+        self.price = df["price"].to_numpy(dtype=float)[order]
+        self.volume = df["volume"].to_numpy(dtype=float)[order]
+        self.side = df["side"].astype(str).to_numpy()[order]
+
+    @classmethod
+    def from_file(cls, path: str) -> "InMemorySource":
+        """Loads the transactions of a CSV file, e.g. of create_data --output-file, or a Parquet file."""
+        if path.endswith(".parquet"):
+            return cls(pd.read_parquet(path))
+        return cls(pd.read_csv(path))
+
+    def transactions(
+            self,
+            execution_time_start: pd.Timestamp,
+            execution_time_end: pd.Timestamp,
+            delivery_start: pd.Timestamp,
+            delivery_end: pd.Timestamp,
+            sides: tuple = ("BUY",),
+    ) -> pd.DataFrame:
+        first = np.searchsorted(self.execution_time, pd.Timestamp(execution_time_start).value, side="left")
+        last = np.searchsorted(self.execution_time, pd.Timestamp(execution_time_end).value, side="right")
+
+        delivery = self.delivery_start[first:last]
+        mask = (
+            (delivery >= pd.Timestamp(delivery_start).value)
+            & (delivery < pd.Timestamp(delivery_end).value)
+            & np.isin(self.side[first:last], sides)
+        )
+
+        return pd.DataFrame(
+            {
+                "executiontime": pd.to_datetime(self.execution_time[first:last][mask]),
+                "deliverystart": pd.to_datetime(delivery[mask]),
+                "price": self.price[first:last][mask],
+                "volume": self.volume[first:last][mask],
+                "side": self.side[first:last][mask],
+            }
+        )
+
+
+def open_source(kind: str, conn: PgConnection = None, path=None, vwap_aggregates: bool = False) -> MarketDataSource:
+    """
+    Opens a market data source of DATA_SOURCES.
+
+    Args:
+        kind (str): 'postgres' for conn, 'duckdb' to scan the files at path,
+            'memory' to load the file at path into memory.
+        conn (PgConnection): Connection of the 'postgres' source.
+        path: Files of the 'duckdb' and 'memory' sources.
+        vwap_aggregates (bool): Read the summary table with the 'postgres' source.
+
+    Returns:
+        MarketDataSource: The source.
+    """
+    if kind == "postgres":
+        return PostgresSource(conn, vwap_aggregates=vwap_aggregates)
+    if kind == "duckdb":
+        return DuckDBSource(path)
+    if kind == "memory":
+        return InMemorySource.from_file(path)
+    raise ValueError(f"Unknown data source '{kind}', choose one of {DATA_SOURCES}")
@@ -1,8 +1,19 @@
 import pandas as pd
-from bess_intra_trading.utils import get_average_prices, get_net_trades, setup_logger
-from bess_intra_trading.model import solve_intrinsic_problem
+from bess_intra_trading.utils import PositionTracker, setup_logger, VWAP_BUCKET_MIN
+from bess_intra_trading.ledger import TradeLedger
+from bess_intra_trading.model import solve_intrinsic_problem, drop_closed_products, SOLVERS
+from bess_intra_trading.milp import (
+    BatteryModelTemplate, warm_start_supported, FORMULATIONS
+)
+from bess_intra_trading.benchmark import save_cases
+from bess_intra_trading.market import load_minute_aggregates, VWAP_WINDOWS
+from bess_intra_trading.cube import open_price_cube
+from bess_intra_trading.queries import PriceQueries
+from bess_intra_trading.sources import MarketDataSource, PostgresSource
 from psycopg2.extensions import connection as PgConnection
+from typing import Union
 import socket
+import time
 import getpass
 import os
 
@@ -12,6 +23,35 @@ username = getpass.getuser()
 log = setup_logger()
 
 
+def cycle_allowance(max_cycles: float, days_left: int, current_cycles: float) -> float:
+    """
+    Cycles a trading day may use: the daily share of max_cycles plus the
+    shares of the days already passed, less the cycles already used.
+    """
+    return max_cycles / 365 + ((max_cycles / 365 * (365 - days_left)) - current_cycles)
+
+
+def day_cycles(net_buy, roundtrip_eff, cap: float = 1.0):
+    """
+    Cycles a trading day counts: its net bought volume at the start of its last
+    step, charged at the one-way efficiency.
+    """
+    return net_buy / cap * roundtrip_eff ** 0.5
+
+
+def trading_days(start_date: pd.Timestamp, end_date: pd.Timestamp) -> list:
+    """Trading days RollingIntrinsicStrategy.simulate steps through from start_date to end_date."""
+    days = []
+    current_day = start_date
+    while current_day < end_date:
+        current_day = current_day.replace(hour=0, minute=0, second=0, microsecond=0)
+        current_day = current_day + pd.Timedelta(days=1)
+        days.append(current_day)
+        current_day = current_day + pd.Timedelta(days=1) + pd.Timedelta(hours=2)
+
+    return days
+
+
 class RollingIntrinsicStrategy:
     """
     Implements the Rolling Intrinsic (RI) BESS trading strategy.
@@ -26,27 +66,61 @@ class RollingIntrinsicStrategy:
         """
         self.params = bess_params
         self.dt = self.params.get('time_step_h', 15)  # Default 15 min step
+        self.solver = self.params.get('solver', 'cbc')
+        self.use_template = self.params.get('model_template', False)
+        self.warm_start = self.params.get('warm_start', False)
+        self.formulation = self.params.get('formulation', 'standard')
+        self.record_cases = self.params.get('record_cases')
+        self.lp_relaxation = self.params.get('lp_relaxation', False)
+        self.drop_closed = self.params.get('drop_closed_products', False)
+        self.gate_closure = pd.Timedelta(minutes=self.params.get('gate_closure_min', 0))
+        self.prefetch = self.params.get('prefetch', False)
+        self.vwap_window = self.params.get('vwap_window', 'bucket')
+        self.vwap_lookback = self.params.get('vwap_lookback', 4)
+        self.lookback_h = self.params.get('lookback_h', 8)
+        self.minute_aggregates = self.params.get('minute_aggregates')
+        self.vwap_aggregates = self.params.get('vwap_aggregates', False)
+        self.prepared_queries = self.params.get('prepared_queries', False)
+        self.output_dir = self.params.get('output_dir', 'output')
+        self.price_cube = None
+        if self.params.get('price_cube'):
+            self.price_cube = open_price_cube(self.params['price_cube'])
 
-    def simulate(
-            self,
-            conn: PgConnection,
-            start_date: pd.Timestamp,
-            end_date: pd.Timestamp,
-            initial_soc: float
-    ):
-            # -> pd.DataFrame:
-        """
-        Runs the rolling simulation over the market data.
-
-        Args:
-            initial_soc (float): Starting State of Charge [MWh].
+        if self.solver not in SOLVERS:
+            raise ValueError(f"Unknown solver '{self.solver}', choose one of {SOLVERS}")
+        if self.vwap_window not in VWAP_WINDOWS:
+            raise ValueError(
+                f"Unknown VWAP window '{self.vwap_window}', choose one of {VWAP_WINDOWS}"
+            )
+        if self.price_cube is not None and (
+                self.price_cube.dt != self.dt or self.vwap_window != 'bucket'
+        ):
+            raise ValueError(
+                f"The price cube holds {self.price_cube.dt} minute bucket prices, "
+                f"not {self.vwap_window} prices of {self.dt} minute windows"
+            )
+        if self.vwap_aggregates and (
+                self.dt % VWAP_BUCKET_MIN != 0 or self.lookback_h * 60 % VWAP_BUCKET_MIN != 0
+        ):
+            raise ValueError(
+                f"The VWAP summary table holds {VWAP_BUCKET_MIN} minute buckets, the time step "
+                f"({self.dt} min) and lookback ({self.lookback_h} h) must be multiples of them"
+            )
+        if self.formulation not in FORMULATIONS:
+            raise ValueError(
+                f"Unknown formulation '{self.formulation}', choose one of {FORMULATIONS}"
+            )
+        if self.warm_start and not warm_start_supported(self.solver):
+            raise ValueError(
+                f"Solver '{self.solver}' takes no warm start, warm starts need the highs solver "
+                "and the highspy package (pip install .[highs])"
+            )
 
-        Returns:
-            pd.DataFrame: A log of all trading decisions and BESS states.
-        """
+    def output_path(self) -> str:
+        """Directory of the outputs of simulate, named after the battery parameters."""
         # set path as ./ma_results/threshold
-        path = os.path.join(
-            "output",
+        return os.path.join(
+            self.output_dir,
             "hourly",
             "bs"
             + str(self.dt)
@@ -59,9 +133,58 @@ class RollingIntrinsicStrategy:
             + "mt"
             + str(self.params['min_trades'])
         )
+
+    def simulate(
+            self,
+            conn: Union[PgConnection, MarketDataSource],
+            start_date: pd.Timestamp,
+            end_date: pd.Timestamp,
+            initial_soc: float,
+            queries: PriceQueries = None,
+            cycle_budget: dict = None,
+    ):
+            # -> pd.DataFrame:
+        """
+        Runs the rolling simulation over the market data.
+
+        Args:
+            conn (PgConnection | MarketDataSource): Connection to the transaction database or
+                another source of the transactions, unused with a price cube.
+            initial_soc (float): Starting State of Charge [MWh].
+            queries (PriceQueries): Prepared price queries to use instead of conn, e.g. on a
+                connection pool shared with other simulations.
+            cycle_budget (dict): Cycles allowed per trading day, replacing the allowance of
+                cycle_allowance, e.g. for days simulated apart from their predecessors.
+
+        Returns:
+            pd.DataFrame: Profit and cumulative cycles of every simulated day, as saved to profit.csv.
+        """
+        path = self.output_path()
         tradepath = os.path.join(path, "trades")
 
-        profits = pd.DataFrame(columns=["day", "profit", "cycles"])
+        # (day, profit, cycles) per simulated day
+        profits = []
+
+        # per-step solver statistics
+        solver_stats = []
+
+        # inputs of every solved step, replayed by benchmark_model
+        recorded_cases = []
+
+        # transactions behind the interface of sources, PostgreSQL unless another source is given
+        source = conn
+        if not isinstance(source, MarketDataSource):
+            source = PostgresSource(conn, vwap_aggregates=self.vwap_aggregates)
+        if (self.minute_aggregates or self.prepared_queries or self.vwap_aggregates) and not isinstance(
+                source, PostgresSource
+        ):
+            raise ValueError(
+                "Minute aggregates, prepared queries and the VWAP summary table need a PostgreSQL connection"
+            )
+
+        # prepared statements planned once per connection, with latency statistics
+        if queries is None and self.prepared_queries:
+            queries = PriceQueries(conn=source.conn)
 
         # create directory if it doesn't exist
         if not os.path.exists(path):
@@ -70,23 +193,20 @@ class RollingIntrinsicStrategy:
         if not os.path.exists(tradepath):
             os.makedirs(tradepath)
 
-        current_day = start_date
         current_cycles = 0
-        net_trades = pd.DataFrame(
-            columns=["sum_buy", "sum_sell", "net_buy", "net_sell", "product"]
-        )
 
-        while current_day < end_date:
+        # net buy volume at the start of the day's last step, counted as the day's cycles
+        day_net_buy = 0.0
 
-            all_trades = pd.DataFrame(
-                columns=["execution_time", "side", "quantity", "price", "product", "profit"]
-            )
+        # trades of the current day, reused from day to day
+        ledger = TradeLedger()
+
+        for current_day in trading_days(start_date, end_date):
 
-            current_day = current_day.replace(hour=0, minute=0, second=0, microsecond=0)
-            current_day = current_day + pd.Timedelta(days=1)
+            ledger.clear()
 
-            # introduce a hard-coded lookback window
-            trading_start = current_day - pd.Timedelta(hours=8)
+            # lookback window of lookback_h hours before the trading day
+            trading_start = current_day - pd.Timedelta(hours=self.lookback_h)
             trading_end = current_day + pd.Timedelta(days=1)
 
             execution_time_start = trading_start
@@ -94,21 +214,68 @@ class RollingIntrinsicStrategy:
 
             days_left = (end_date - current_day).days
 
-            allowed_cycles = self.params['max_cycles'] / 365 + (
-                    (self.params['max_cycles'] / 365 * (365 - days_left)) - current_cycles
-            )
+            # positions per product, updated with the trades of every step
+            positions = PositionTracker(trading_end)
 
-            while execution_time_end < trading_end:
-                volume_weighted_average_price = get_average_prices(
-                    conn=conn,
-                    side='BUY',
-                    execution_time_start=execution_time_start,
-                    execution_time_end=execution_time_end,
-                    target_delivery_date=trading_end,
-                    min_trades=self.params['min_trades'],
+            allowed_cycles = cycle_allowance(self.params['max_cycles'], days_left, current_cycles)
+            if cycle_budget is not None:
+                allowed_cycles = cycle_budget[current_day]
+
+            # prices of all execution windows of the day from a single query
+            market_day = None
+            if self.price_cube is not None:
+                market_day = self.price_cube.market_day(trading_start, trading_end, 'BUY')
+            elif self.minute_aggregates:
+                # minute sums cached per day, rolled up to the window length and lookback
+                market_day = load_minute_aggregates(
+                    source.conn, self.minute_aggregates, trading_end, self.lookback_h
+                ).rollup(
+                    trading_start,
+                    trading_end,
+                    self.dt,
+                    'BUY',
+                    window=self.vwap_window,
+                    lookback=self.vwap_lookback,
                 )
+            elif self.vwap_window != 'bucket':
+                # cumulative and sliding prices come from running sums of the day's transactions
+                market_day = source.accumulate(
+                    trading_start, trading_end, self.dt, sides=('BUY',)
+                ).market_day('BUY', window=self.vwap_window, lookback=self.vwap_lookback)
+            elif self.prefetch:
+                market_day = source.market_day('BUY', trading_start, trading_end, self.dt)
+
+            # battery model compiled once per product grid of the day
+            template = None
+
+            # schedule of the last solved step, used as warm start
+            previous_results = None
+
+            while execution_time_end < trading_end:
+                if market_day is not None:
+                    volume_weighted_average_price = market_day.average_prices(
+                        execution_time_start, self.params['min_trades']
+                    )
+                elif queries is not None:
+                    volume_weighted_average_price = queries.average_prices(
+                        side='BUY',
+                        execution_time_start=execution_time_start,
+                        execution_time_end=execution_time_end,
+                        target_delivery_date=trading_end,
+                        min_trades=self.params['min_trades'],
+                    )
+                else:
+                    # with vwap_aggregates PostgresSource reads the summary table of data.refresh_vwap_aggregates
+                    volume_weighted_average_price = source.average_prices(
+                        side='BUY',
+                        execution_time_start=execution_time_start,
+                        execution_time_end=execution_time_end,
+                        target_delivery_date=trading_end,
+                        min_trades=self.params['min_trades'],
+                    )
 
-                net_trades = get_net_trades(all_trades, trading_end)
+                net_trades = positions.net_trades
+                day_net_buy = positions.net_buy.sum()
 
                 if volume_weighted_average_price["price"].isnull().all():
                     log.info("No trades in this quarter hour")
@@ -118,21 +285,92 @@ class RollingIntrinsicStrategy:
                     )
                     continue
                 else:
+                    # products past gate closure leave the model, their state of charge and
+                    # cycles are folded into the initial state
+                    prices_qh = volume_weighted_average_price
+                    initial_soc = 0.0
+                    cycles_used = 0.0
+                    if self.drop_closed:
+                        prices_qh, initial_soc, cycles_used = drop_closed_products(
+                            volume_weighted_average_price,
+                            net_trades,
+                            execution_time_start,
+                            cap=1,
+                            roundtrip_eff=self.params['efficiency'],
+                            gate_closure=self.gate_closure,
+                        )
+
+                    if self.use_template and (
+                            template is None
+                            or not template.index.equals(prices_qh.index)
+                    ):
+                        template = BatteryModelTemplate(
+                            prices_qh.index,
+                            cap=1,
+                            c_rate=self.params['c_rate'],
+                            roundtrip_eff=self.params['efficiency'],
+                            formulation=self.formulation,
+                        )
+
+                    if self.record_cases:
+                        recorded_cases.append(
+                            dict(
+                                prices_qh=prices_qh.copy(),
+                                execution_time=execution_time_start,
+                                cap=1,
+                                c_rate=self.params['c_rate'],
+                                roundtrip_eff=self.params['efficiency'],
+                                max_cycles=allowed_cycles - cycles_used,
+                                threshold=self.params['threshold'],
+                                threshold_abs_min=self.params['threshold_abs_min'],
+                                discount_rate=self.params['discount_rate'],
+                                prev_net_trades=net_trades.copy(),
+                                initial_soc=initial_soc,
+                            )
+                        )
+
+                    warm_start = previous_results if self.warm_start else None
+
+                    step_stats = {}
+                    solve_start = time.perf_counter()
+
                     try:
                         results, trades, profit = solve_intrinsic_problem(
-                                prices_qh=volume_weighted_average_price,
+                                prices_qh=prices_qh,
                                 execution_time=execution_time_start,
                                 cap=1,
                                 c_rate=self.params['c_rate'],
                                 roundtrip_eff=self.params['efficiency'],
-                                max_cycles=allowed_cycles,
+                                max_cycles=allowed_cycles - cycles_used,
                                 threshold=self.params['threshold'],
                                 threshold_abs_min=self.params['threshold_abs_min'],
                                 discount_rate=self.params['discount_rate'],
                                 prev_net_trades=net_trades,
+                                solver=self.solver,
+                                template=template,
+                                warm_start=warm_start,
+                                formulation=self.formulation,
+                                lp_relaxation=self.lp_relaxation,
+                                stats=step_stats,
+                                initial_soc=initial_soc,
+                        )
+                        ledger.extend(trades)
+                        positions.add(trades)
+
+                        solver_stats.append(
+                            {
+                                "day": current_day,
+                                "execution_time": execution_time_start,
+                                "products": len(prices_qh),
+                                "warm_start": warm_start is not None,
+                                "warm_start_accepted": step_stats.get("warm_start_accepted", False),
+                                "mip_node_count": step_stats.get("mip_node_count"),
+                                "lp_relaxation": self.lp_relaxation,
+                                "relaxation_integral": step_stats.get("relaxation_integral", False),
+                                "solve_time": time.perf_counter() - solve_start,
+                            }
                         )
-                        # append trades to all_trades using concat
-                        all_trades = pd.concat([all_trades, trades])
+                        previous_results = results
                     except ValueError:
                         log.info("Error in optimization")
                         log.info("execution_time_start: {}".format(execution_time_start))
@@ -147,9 +385,9 @@ class RollingIntrinsicStrategy:
                     minutes=self.dt
                 )
 
-            # calculate daily_profit as sum of all_trades["profit"]
-            daily_profit = all_trades["profit"].sum()
-            current_cycles += net_trades["net_buy"].sum() / 1.0 * self.params['efficiency'] ** 0.5
+            all_trades = ledger.frame()
+            daily_profit = ledger.total_profit()
+            current_cycles += day_cycles(day_net_buy, self.params['efficiency'])
 
             # save trades
             all_trades.to_csv(
@@ -158,23 +396,14 @@ class RollingIntrinsicStrategy:
                 index=False,
             )
 
-            # append daily_profit to profits.csv using concat
-            profits = pd.concat(
-                [
-                    profits,
-                    pd.DataFrame(
-                        [[current_day, daily_profit, current_cycles]],
-                        columns=["day", "profit", "cycles"],
-                    ),
-                ]
-            )
+            profits.append((current_day, daily_profit, current_cycles))
 
             profits_db = pd.DataFrame(
                 [
                     [
                         current_day,
                         daily_profit,
-                        net_trades["net_buy"].sum() / 1.0 * self.params['efficiency'] ** 0.5,
+                        day_cycles(day_net_buy, self.params['efficiency']),
                     ]
                 ],
                 columns=["day", "profit", "cycles"],
@@ -198,7 +427,54 @@ class RollingIntrinsicStrategy:
             # )
 
             # save profits.csv
-            profits.to_csv(os.path.join(path, "profit.csv"), index=False)
+            profit_frame = pd.DataFrame(profits, columns=["day", "profit", "cycles"])
+            profit_frame["day"] = profit_frame["day"].astype(object)
+            profit_frame.to_csv(os.path.join(path, "profit.csv"), index=False)
+
+            # save solver statistics and report the warm start and LP relaxation hit rates of the day
+            stats = pd.DataFrame(
+                solver_stats,
+                columns=[
+                    "day",
+                    "execution_time",
+                    "products",
+                    "warm_start",
+                    "warm_start_accepted",
+                    "mip_node_count",
+                    "lp_relaxation",
+                    "relaxation_integral",
+                    "solve_time",
+                ],
+            )
+            stats.to_csv(os.path.join(path, "solver_stats.csv"), index=False)
+
+            day_stats = stats[stats["day"] == current_day]
+            if day_stats["warm_start"].any():
+                log.info(
+                    "Warm start accepted by HiGHS in {} of {} steps".format(
+                        day_stats["warm_start_accepted"].sum(), day_stats["warm_start"].sum()
+                    )
+                )
+            if day_stats["lp_relaxation"].any():
+                log.info(
+                    "LP relaxation integral in {} of {} steps, {:.2f} s solver time".format(
+                        day_stats["relaxation_integral"].sum(),
+                        day_stats["lp_relaxation"].sum(),
+                        day_stats["solve_time"].sum(),
+                    )
+                )
+
+            if queries is not None:
+                latency = queries.latency()
+                latency.to_csv(os.path.join(path, "query_latency.csv"), index=False)
+                for row in latency.itertuples():
+                    log.info(
+                        "Query {}: {} calls, mean {:.2f} ms, p95 {:.2f} ms".format(
+                            row.query, row.count, row.mean_ms, row.p95_ms
+                        )
+                    )
+
+            if self.record_cases:
+                save_cases(recorded_cases, self.record_cases)
 
-            # set current day to current_day plus 1 day
-            current_day = current_day + pd.Timedelta(days=1) + pd.Timedelta(hours=2)
+        return pd.DataFrame(profits, columns=["day", "profit", "cycles"])
@@ -0,0 +1,176 @@
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import NamedTuple, Union
+import pandas as pd
+from psycopg2.extensions import connection as PgConnection
+from bess_intra_trading.utils import setup_logger
+from bess_intra_trading.batch import SCENARIO_PARAMS
+from bess_intra_trading.cube import PriceCube, SharedPriceCube, build_price_cube
+from bess_intra_trading.sources import MarketDataSource
+from bess_intra_trading.strategy import RollingIntrinsicStrategy
+
+
+log = setup_logger()
+
+
+class SweepResult(NamedTuple):
+    summary: pd.DataFrame  # scenario, SCENARIO_PARAMS, days, profit, cycles, runtime_s
+    daily: pd.DataFrame  # scenario, SCENARIO_PARAMS, day, profit, cycles
+
+
+def parameter_grid(base: dict, grid: dict) -> list:
+    """
+    Scenarios of every combination of the values in grid.
+
+    Args:
+        base (dict): bess_params shared by all scenarios.
+        grid (dict): Values per parameter, e.g. {'c_rate': [0.5, 1], 'max_cycles': [365, 730]}.
+
+    Returns:
+        list: bess_params dicts, the last parameter of grid varying fastest.
+    """
+    names = list(grid)
+    return [
+        dict(base, **dict(zip(names, values)))
+        for values in itertools.product(*(grid[name] for name in names))
+    ]
+
+
+def _run_scenario(task: tuple):
+    """Simulates one scenario of a sweep in a worker process."""
+    k, params, start_date, end_date = task
+    start = time.perf_counter()
+
+    profits = RollingIntrinsicStrategy(params).simulate(None, start_date, end_date, 0.0)
+
+    return k, profits, time.perf_counter() - start
+
+
+def run_sweep(
+        conn: Union[PgConnection, MarketDataSource],
+        scenarios: list,
+        start_date: pd.Timestamp,
+        end_date: pd.Timestamp,
+        output_dir: str = "sweep",
+        processes: int = None,
+        price_cube: str = None,
+        shared_memory: bool = False,
+) -> SweepResult:
+    """
+    Runs RollingIntrinsicStrategy.simulate for many scenarios in a process pool.
+
+    The market data is read once: the prices of every trading day go into a
+    price cube, unless one is given, and every worker memory-maps the same
+    cube instead of querying the database. Scenarios are independent, so the
+    sweep scales with the number of processes. Unlike simulate_batch, any
+    solver and strategy option works.
+
+    Every scenario writes its outputs to output_dir/scenario_<k>, and the
+    summary and daily results of all scenarios to sweep_summary.csv and
+    sweep_daily.csv in output_dir.
+
+    With shared_memory, the cube is published once into shared memory with
+    SharedPriceCube and the workers attach to it instead of the files, which
+    keeps the prices in RAM on slow or network file systems. The blocks are
+    freed when the sweep ends.
+
+    Args:
+        conn (PgConnection | MarketDataSource): Source of the transactions, unused with price_cube.
+        scenarios (list): bess_params dicts, with the same time_step_h and lookback_h.
+        start_date (pd.Timestamp): Start date of the simulation.
+        end_date (pd.Timestamp): End date of the simulation.
+        output_dir (str): Directory of the outputs.
+        processes (int): Worker processes, by default the number of CPUs.
+        price_cube (str): Existing price cube to read the prices from.
+        shared_memory (bool): Serve the price cube to the workers from shared memory.
+
+    Returns:
+        SweepResult: Summary and daily profits per scenario.
+    """
+    dt = scenarios[0].get('time_step_h', 15)
+    lookback_h = scenarios[0].get('lookback_h', 8)
+    if any(
+            scenario.get('time_step_h', 15) != dt or scenario.get('lookback_h', 8) != lookback_h
+            for scenario in scenarios
+    ):
+        raise ValueError("All scenarios of a sweep need the same time_step_h and lookback_h")
+
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    # trading days of simulate run from the day after start_date to end_date
+    if price_cube is None:
+        price_cube = os.path.join(output_dir, "price_cube")
+        build_price_cube(
+            conn,
+            price_cube,
+            start_date + pd.Timedelta(days=1),
+            end_date,
+            dt=dt,
+            lookback_h=lookback_h,
+            sides=("BUY",),
+        )
+
+    shared_cube = SharedPriceCube.publish(PriceCube(price_cube)) if shared_memory else None
+    cube = shared_cube.spec if shared_memory else price_cube
+
+    tasks = [
+        (
+            k,
+            dict(
+                scenario,
+                price_cube=cube,
+                output_dir=os.path.join(output_dir, f"scenario_{k:04d}"),
+            ),
+            start_date,
+            end_date,
+        )
+        for k, scenario in enumerate(scenarios)
+    ]
+
+    daily = []
+    summary = []
+    sweep_start = time.perf_counter()
+
+    try:
+        with ProcessPoolExecutor(max_workers=processes or os.cpu_count()) as pool:
+            futures = [pool.submit(_run_scenario, task) for task in tasks]
+            for done, future in enumerate(as_completed(futures), start=1):
+                k, profits, runtime = future.result()
+                params = {name: scenarios[k].get(name) for name in SCENARIO_PARAMS}
+
+                daily.append(profits.assign(scenario=k, **params))
+                summary.append(
+                    dict(
+                        scenario=k,
+                        **params,
+                        days=len(profits),
+                        profit=profits["profit"].sum(),
+                        cycles=profits["cycles"].iloc[-1] if len(profits) else 0.0,
+                        runtime_s=runtime,
+                    )
+                )
+                log.info(
+                    "Sweep: {} of {} scenarios done, {:.1f} s elapsed".format(
+                        done, len(tasks), time.perf_counter() - sweep_start
+                    )
+                )
+    finally:
+        if shared_cube is not None:
+            shared_cube.unlink()
+
+    columns = ["scenario", *SCENARIO_PARAMS]
+    summary = pd.DataFrame(
+        summary, columns=[*columns, "days", "profit", "cycles", "runtime_s"]
+    ).sort_values("scenario", ignore_index=True)
+    daily = (
+        pd.concat(daily, ignore_index=True)[[*columns, "day", "profit", "cycles"]]
+        .sort_values(["scenario", "day"], ignore_index=True)
+    )
+
+    summary.to_csv(os.path.join(output_dir, "sweep_summary.csv"), index=False)
+    daily.to_csv(os.path.join(output_dir, "sweep_daily.csv"), index=False)
+
+    return SweepResult(summary=summary, daily=daily)
@@ -0,0 +1,231 @@
+import numpy as np
+import pandas as pd
+from bess_intra_trading.data import BERLIN_TZ, SIDES, PRODUCT_DURATION_MIN
+
+
+class MarketSimulator:
+    """
+    Synthetic continuous intraday market, a stand-in for EPEX transaction data
+    with its shape and volume.
+
+    Every delivery day holds the products of PRODUCT_DURATION_MIN given, e.g. 24
+    hourly and 96 quarter-hourly deliveries. A product trades from open_hour on
+    the day before delivery until gate_closure_min minutes before its delivery
+    starts. Its price follows an Ornstein-Uhlenbeck path reverting to a daily
+    price profile, and its trades cluster toward gate closure with an
+    exponentially rising intensity. BUY trades are half a spread above the path,
+    SELL trades half a spread below it.
+    """
+
+    def __init__(
+            self,
+            products: tuple = ('XBID_Hour_Power', 'XBID_Quarter_Hour_Power'),
+            trades_per_product: float = 200,
+            base_price: float = 80,
+            peak_premium: float = 30,
+            solar_dip: float = 25,
+            quarter_hour_ramp: float = 4,
+            daily_sigma: float = 15,
+            mean_reversion_h: float = 2,
+            volatility: float = 8,
+            intensity_decay_h: float = 2,
+            spread: float = 1,
+            mean_volume: float = 2,
+            open_hour: int = 15,
+            gate_closure_min: int = 5,
+            seed: int = None,
+    ):
+        """
+        Args:
+            products (tuple): Products traded every day, keys of PRODUCT_DURATION_MIN.
+            trades_per_product (float): Mean number of trades of a product, Poisson distributed.
+            base_price (float): Off-peak price level in EUR/MWh.
+            peak_premium (float): Height of the morning and evening peaks of the price profile.
+            solar_dip (float): Depth of the midday dip of the price profile.
+            quarter_hour_ramp (float): Price difference between the first and last quarter hour of an hour.
+            daily_sigma (float): Standard deviation of the price level of a day.
+            mean_reversion_h (float): Mean reversion time of the price paths in hours.
+            volatility (float): Volatility of the price paths in EUR/MWh per square root hour.
+            intensity_decay_h (float): Hours before gate closure in which the trade intensity falls by e.
+            spread (float): Price difference between BUY and SELL trades.
+            mean_volume (float): Mean volume of a trade in MW, lognormally distributed.
+            open_hour (int): Hour (Europe/Berlin) of the day before delivery at which trading opens.
+            gate_closure_min (int): Minutes before delivery at which trading of a product closes.
+            seed (int): Seed of the random generator, for reproducible markets.
+        """
+        self.products = tuple(products)
+        self.trades_per_product = trades_per_product
+        self.base_price = base_price
+        self.peak_premium = peak_premium
+        self.solar_dip = solar_dip
+        self.quarter_hour_ramp = quarter_hour_ramp
+        self.daily_sigma = daily_sigma
+        self.mean_reversion_h = mean_reversion_h
+        self.volatility = volatility
+        self.intensity_decay_h = intensity_decay_h
+        self.spread = spread
+        self.mean_volume = mean_volume
+        self.open_hour = open_hour
+        self.gate_closure_min = gate_closure_min
+        self.rng = np.random.default_rng(seed)
+
+    def price_profile(self, delivery_start: pd.DatetimeIndex, duration: np.ndarray) -> np.ndarray:
+        """Mean price of the products delivered from delivery_start (Europe/Berlin) for duration minutes."""
+        hour = delivery_start.hour.values + delivery_start.minute.values / 60 + duration / 120
+
+        profile = (
+            self.base_price
+            + self.peak_premium * (np.exp(-((hour - 8.5) / 2) ** 2) + np.exp(-((hour - 19) / 2) ** 2))
+            - self.solar_dip * np.exp(-((hour - 13) / 2.5) ** 2)
+        )
+
+        # quarter hours ramp within their hour, the shape of the intraday quarter hour auction
+        quarter = np.where(duration < 60, delivery_start.minute.values / 15, 1.5)
+        return profile + self.quarter_hour_ramp * (1.5 - quarter) / 3
+
+    def delivery_day(self, day: pd.Timestamp) -> pd.DataFrame:
+        """
+        Transactions of the products delivered on day, sorted by execution time.
+
+        Returns:
+            pd.DataFrame: Transactions with the columns of data.CSV_COLUMNS, timestamps as UTC strings.
+        """
+        day = pd.Timestamp(day).normalize()
+        day_start = day.tz_localize(BERLIN_TZ)
+        day_end = (day + pd.Timedelta(days=1)).tz_localize(BERLIN_TZ)
+
+        # delivery start and length of every product of the day
+        starts, durations, names = [], [], []
+        for product in self.products:
+            duration = PRODUCT_DURATION_MIN[product]
+            start = pd.date_range(day_start, day_end, freq=f"{duration}min", inclusive="left")
+            starts.append(start)
+            durations.append(np.full(len(start), duration))
+            names.append(np.full(len(start), product))
+        delivery_start = starts[0].append(starts[1:]) if len(starts) > 1 else starts[0]
+        duration = np.concatenate(durations)
+        product = np.concatenate(names)
+        n_products = len(duration)
+
+        # one minute grid from the opening of trading until the last gate closure
+        trading_open = (day - pd.Timedelta(days=1) + pd.Timedelta(hours=self.open_hour)).tz_localize(BERLIN_TZ)
+        grid_start = trading_open.tz_convert("UTC").tz_localize(None).to_datetime64().astype("datetime64[m]")
+        delivery = delivery_start.tz_convert("UTC").tz_localize(None).values.astype("datetime64[m]")
+        closure = ((delivery - grid_start) // np.timedelta64(1, "m")).astype(np.int64) - self.gate_closure_min
+        n_minutes = int(closure.max()) + 1
+
+        # price paths, exact discretisation of the Ornstein-Uhlenbeck process on the grid
+        mean = self.price_profile(delivery_start, duration) + self.rng.normal(0, self.daily_sigma)
+        theta = 1 / (self.mean_reversion_h * 60)
+        decay = np.exp(-theta)
+        sigma = self.volatility / np.sqrt(60)
+        step = sigma * np.sqrt((1 - decay ** 2) / (2 * theta))
+        shocks = self.rng.normal(0, step, (n_minutes, n_products))
+        shocks[0] = self.rng.normal(0, sigma / np.sqrt(2 * theta), n_products)
+        paths = np.empty((n_minutes, n_products))
+        paths[0] = shocks[0]
+        for minute in range(1, n_minutes):
+            paths[minute] = decay * paths[minute - 1] + shocks[minute]
+
+        # trade times before gate closure from the truncated exponential intensity
+        counts = self.rng.poisson(self.trades_per_product, n_products)
+        index = np.repeat(np.arange(n_products), counts)
+        horizon = closure[index]
+        decay_min = self.intensity_decay_h * 60
+        u = self.rng.uniform(0, 1, len(index))
+        before_closure = -decay_min * np.log1p(-u * (1 - np.exp(-horizon / decay_min)))
+        seconds = ((horizon - before_closure) * 60).astype(np.int64)
+
+        side = self.rng.integers(0, len(SIDES), len(index))
+        price = (
+            mean[index]
+            + paths[seconds // 60, index]
+            + np.where(np.array(SIDES)[side] == 'BUY', 0.5, -0.5) * self.spread
+        )
+        volume = np.maximum(self.rng.lognormal(np.log(self.mean_volume) - 0.5, 1, len(index)), 0.1)
+
+        executiontime = grid_start.astype("datetime64[s]") + seconds.astype("timedelta64[s]")
+        order = np.argsort(executiontime, kind="stable")
+        deliverystart = delivery[index]
+        deliveryend = deliverystart + duration[index].astype("timedelta64[m]")
+
+        return pd.DataFrame(
+            {
+                'executiontime': np.char.add(np.datetime_as_string(executiontime[order], unit='s'), '+00'),
+                'deliverystart': np.char.add(np.datetime_as_string(deliverystart[order], unit='s'), '+00'),
+                'deliveryend': np.char.add(np.datetime_as_string(deliveryend[order], unit='s'), '+00'),
+                'price': price[order].round(2),
+                'volume': volume[order].round(2),
+                'side': np.array(SIDES)[side[order]],
+                'product': product[index[order]],
+            }
+        )
+
+    def transactions(
+            self,
+            start_date: str = '2022-01-01',
+            end_date: str = '2022-03-01',
+            block_size: int = 1_000_000,
+    ):
+        """
+        Streams the transactions of the delivery days from start_date until
+        end_date in blocks of whole delivery days.
+
+        Args:
+            start_date (str): First delivery day.
+            end_date (str): End of the delivery days, excluded.
+            block_size (int): Transactions after which a block is yielded.
+
+        Yields:
+            pd.DataFrame: Blocks of transactions as returned by delivery_day.
+        """
+        blocks, count = [], 0
+        for day in pd.date_range(pd.to_datetime(start_date), pd.to_datetime(end_date), freq="D", inclusive="left"):
+            blocks.append(self.delivery_day(day))
+            count += len(blocks[-1])
+            if count >= block_size:
+                yield pd.concat(blocks, ignore_index=True)
+                blocks, count = [], 0
+
+        if blocks:
+            yield pd.concat(blocks, ignore_index=True)
+
+
+def simulate_transactions(
+        num_transactions: int,
+        start_date: str = '2022-01-01',
+        end_date: str = '2022-03-01',
+        seed: int = None,
+        products: tuple = ('XBID_Hour_Power', 'XBID_Quarter_Hour_Power'),
+        block_size: int = 1_000_000,
+        **kwargs,
+):
+    """
+    Transactions of a MarketSimulator, with the arguments of
+    data.generate_fake_transactions so both plug into its sinks.
+
+    The number of trades per product is chosen so the delivery days hold about
+    num_transactions transactions, the exact number varies with the Poisson
+    draws.
+
+    Args:
+        num_transactions (int): Expected number of transactions.
+        start_date (str): First delivery day.
+        end_date (str): End of the delivery days, excluded.
+        seed (int): Seed of the random generator.
+        products (tuple): Products traded every day, keys of PRODUCT_DURATION_MIN.
+        block_size (int): Transactions after which a block is yielded.
+        **kwargs: Further parameters of MarketSimulator.
+
+    Yields:
+        pd.DataFrame: Blocks of transactions as returned by MarketSimulator.delivery_day.
+    """
+    days = len(pd.date_range(pd.to_datetime(start_date), pd.to_datetime(end_date), freq="D", inclusive="left"))
+    products_per_day = sum(24 * 60 // PRODUCT_DURATION_MIN[product] for product in products)
+    simulator = MarketSimulator(
+        products=products,
+        trades_per_product=num_transactions / max(days * products_per_day, 1),
+        seed=seed,
+        **kwargs,
+    )
+    yield from simulator.transactions(start_date, end_date, block_size)
@@ -1,4 +1,5 @@
 from psycopg2.extensions import connection as PgConnection
+import numpy as np
 import pandas as pd
 import logging
 import socket
@@ -26,6 +27,27 @@ def setup_logger(
     return logging.getLogger(name)
 
 
+def average_prices_frame(result: list, start_of_day: pd.Timestamp, end_of_day: pd.Timestamp) -> pd.DataFrame:
+    """
+    Turns (deliverystart, price) rows into the price frame of get_average_prices,
+    indexed by the hourly products from start_of_day to end_of_day.
+    """
+    df = pd.DataFrame(result, columns=["product", "price"])
+
+    # set index to product
+    df.set_index("product", inplace=True)
+
+    # set index to be all 15 minute intervals from start_of_day to end_of_day, filling missing values with NaN
+    df.index = pd.DatetimeIndex(df.index)
+
+    # Remove timezone if present
+    if df.index.tz is not None:
+        df.index = df.index.tz_localize(None)
+    df = df.reindex(pd.date_range(start_of_day, end_of_day, freq="60min"))
+
+    return df
+
+
 def get_average_prices(
         conn: PgConnection,
         side: str,
@@ -67,20 +89,71 @@ def get_average_prices(
         """)
     result = cursor.fetchall()
 
-    df = pd.DataFrame(result, columns=["product", "price"])
+    return average_prices_frame(result, start_of_day, end_of_day)
 
-    # set index to product
-    df.set_index("product", inplace=True)
 
-    # set index to be all 15 minute intervals from start_of_day to end_of_day, filling missing values with NaN
-    df.index = pd.DatetimeIndex(df.index)
+# summary table of the transactions per side, product, delivery start and
+# execution bucket of VWAP_BUCKET_MIN minutes, see data.refresh_vwap_aggregates
+VWAP_AGGREGATES_TABLE = 'transactions_vwap_agg'
+VWAP_BUCKET_MIN = 15
 
-    # Remove timezone if present
-    if df.index.tz is not None:
-        df.index = df.index.tz_localize(None)
-    df = df.reindex(pd.date_range(start_of_day, end_of_day, freq="60min"))
 
-    return df
+def get_aggregated_average_prices(
+        conn: PgConnection,
+        side: str,
+        execution_time_start: pd.Timestamp,
+        execution_time_end: pd.Timestamp,
+        target_delivery_date: pd.Timestamp,
+        min_trades: int = 1,
+        bucket_min: int = VWAP_BUCKET_MIN,
+) -> pd.DataFrame:
+    """
+    Same as get_average_prices, read from the summary table of
+    data.refresh_vwap_aggregates instead of the raw transactions.
+
+    The window is made of the buckets from execution_time_start up to
+    execution_time_end plus the transactions exactly at execution_time_end,
+    which every bucket keeps separately as edge sums, so the inclusive BETWEEN
+    of get_average_prices is kept. Sums are in double precision, prices may
+    differ from get_average_prices in the last digits.
+
+    Raises:
+        ValueError: If the window does not start and end on bucket boundaries.
+    """
+    for time in (execution_time_start, execution_time_end):
+        if (time - time.floor("h")) % pd.Timedelta(minutes=bucket_min) != pd.Timedelta(0):
+            raise ValueError(f"{time} is not on the {bucket_min} minute buckets of {VWAP_AGGREGATES_TABLE}")
+
+    start_of_day = pd.to_datetime(target_delivery_date) - pd.Timedelta(hours=2)
+
+    # set hour and minute to 0 (europe/berlin time)
+    start_of_day = start_of_day.replace(hour=0, minute=0)
+
+    end_of_day = start_of_day.replace(hour=23, minute=45)
+    cursor = conn.cursor()
+
+    inside = f"bucket < '{execution_time_end}'"
+    cursor.execute(f"""
+        SELECT
+        deliverystart,
+        SUM(CASE WHEN {inside} THEN volume_price ELSE edge_volume_price END)
+        / SUM(CASE WHEN {inside} THEN volume ELSE edge_volume END) AS weighted_avg_price
+        FROM
+        {VWAP_AGGREGATES_TABLE}
+        WHERE
+        (bucket BETWEEN '{execution_time_start}' AND '{execution_time_end}')
+        AND (product ='XBID_Hour_Power' or product = 'Intraday_Hour_Power')
+        AND side='{side}'
+        AND deliverystart < '{target_delivery_date}'
+        AND deliverystart >= '{start_of_day}'
+        GROUP BY
+        deliverystart
+        HAVING
+        SUM(CASE WHEN {inside} THEN trades ELSE edge_trades END) >= {max(min_trades, 1)};
+        """)
+    result = cursor.fetchall()
+
+    return average_prices_frame(result, start_of_day, end_of_day)
 
 
 def get_net_trades(trades: pd.DataFrame, end_date: pd.Timestamp):
@@ -139,3 +212,55 @@ def get_net_trades(trades: pd.DataFrame, end_date: pd.Timestamp):
 
     # return the net_trades dataframe
     return net_trades
+
+
+# columns of the net trades frame of get_net_trades and PositionTracker
+NET_TRADE_COLUMNS = ["sum_buy", "sum_sell", "net_buy", "net_sell"]
+
+
+class PositionTracker:
+    """
+    Bought and sold quantities per hourly product of one trading day, updated
+    incrementally as trades come in.
+
+    The arrays sum_buy, sum_sell, net_buy and net_sell follow the product grid
+    of get_net_trades. net_trades builds a DataFrame of them on access, equal to
+    get_net_trades of all trades added so far, which keeps the positions of
+    that point in time.
+    """
+
+    def __init__(self, end_date: pd.Timestamp):
+        """
+        Args:
+            end_date (pd.Timestamp): Target delivery date of the trading day, as for get_net_trades.
+        """
+        start_of_day = pd.to_datetime(end_date) - pd.Timedelta(hours=2)
+
+        # set hour and minute to 0 (europe/berlin time)
+        start_of_day = start_of_day.replace(hour=0, minute=0)
+        end_of_day = start_of_day.replace(hour=23, minute=45)
+
+        self.products = pd.date_range(start_of_day, end_of_day, freq="60min")
+        self.values = np.zeros((len(self.products), len(NET_TRADE_COLUMNS)))
+        self.sum_buy, self.sum_sell, self.net_buy, self.net_sell = self.values.T
+
+    @property
+    def net_trades(self) -> pd.DataFrame:
+        """Positions per product in the frame of get_net_trades."""
+        return pd.DataFrame(self.values.copy(), index=self.products, columns=NET_TRADE_COLUMNS)
+
+    def add(self, trades: pd.DataFrame):
+        """Adds trades with side ("buy" or "sell"), quantity and product columns."""
+        if len(trades) == 0:
+            return
+
+        # trades off the product grid are dropped, as by the reindex of get_net_trades
+        column = self.products.get_indexer(pd.DatetimeIndex(trades["product"]))
+        quantity = trades["quantity"].to_numpy(dtype=float)
+        side = trades["side"].to_numpy()
+        on_grid = column >= 0
+
+        np.add.at(self.sum_buy, column[on_grid & (side == "buy")], quantity[on_grid & (side == "buy")])
+        np.add.at(self.sum_sell, column[on_grid & (side == "sell")], quantity[on_grid & (side == "sell")])
+        np.maximum(self.sum_buy - self.sum_sell, 0, out=self.net_buy)
+        np.maximum(self.sum_sell - self.sum_buy, 0, out=self.net_sell)
@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+from bess_intra_trading.sources import InMemorySource
+from bess_intra_trading.synthetic import simulate_transactions
+
+
+@pytest.fixture(scope="session")
+def transactions():
+    """Synthetic hourly product transactions delivered from 2022-01-01 to 2022-01-04."""
+    return pd.concat(
+        simulate_transactions(
+            20_000, start_date="2022-01-01", end_date="2022-01-05", seed=0, products=("XBID_Hour_Power",)
+        ),
+        ignore_index=True,
+    )
+
+
+@pytest.fixture(scope="session")
+def market(transactions):
+    return InMemorySource(transactions)
+
+
+class RecordingCursor:
+    """Cursor that records the queries and parameters executed on it and returns no rows."""
+
+    def __init__(self, executed):
+        self.executed = executed
+
+    def execute(self, query, params=None):
+        self.executed.append((query, params))
+
+    def fetchall(self):
+        return []
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.executed = []
+
+    def cursor(self):
+        return RecordingCursor(self.executed)
+
+
+@pytest.fixture
+def recording_conn():
+    """Connection stand-in to check the SQL and parameters sent to PostgreSQL."""
+    return RecordingConnection()
@@ -0,0 +1,56 @@
+import os
+import pandas as pd
+import pytest
+from bess_intra_trading.batch import simulate_batch
+from bess_intra_trading.strategy import RollingIntrinsicStrategy
+
+
+BASE = dict(
+    c_rate=0.5,
+    efficiency=0.86,
+    time_step_h=15,
+    max_cycles=365,
+    threshold=0,
+    threshold_abs_min=0,
+    discount_rate=0,
+    min_trades=1,
+)
+
+SCENARIOS = [
+    BASE,
+    dict(BASE, c_rate=1, threshold=5, threshold_abs_min=1),
+    dict(BASE, max_cycles=100, discount_rate=1),
+    dict(BASE, min_trades=3, efficiency=0.9),
+]
+
+
+def test_batch_matches_single_runs(market, tmp_path):
+    start_date, end_date = pd.Timestamp("2022-01-01"), pd.Timestamp("2022-01-05")
+    batch = simulate_batch(market, SCENARIOS, start_date, end_date, solver="cbc")
+
+    for k, scenario in enumerate(SCENARIOS):
+        params = dict(
+            scenario,
+            solver="cbc",
+            drop_closed_products=True,
+            prefetch=True,
+            output_dir=str(tmp_path / str(k)),
+        )
+        strategy = RollingIntrinsicStrategy(params)
+        single = strategy.simulate(market, start_date, end_date, 0.0)
+        profits = batch.profits[batch.profits["scenario"] == k]
+
+        assert len(single) == 2
+        assert list(profits["day"]) == list(single["day"])
+        assert profits["profit"].to_numpy() == pytest.approx(single["profit"].to_numpy(), abs=1e-9)
+        assert profits["cycles"].to_numpy() == pytest.approx(single["cycles"].to_numpy(), abs=1e-12)
+
+        for day in single["day"]:
+            expected = pd.read_csv(
+                os.path.join(strategy.output_path(), "trades", "trades_" + day.strftime("%Y-%m-%d") + ".csv"),
+                parse_dates=["execution_time", "product"],
+            )
+            trades = batch.trades[(batch.trades["scenario"] == k) & (batch.trades["product"] >= day)]
+            trades = trades[trades["product"] < day + pd.Timedelta(days=1)]
+            assert len(trades) == len(expected)
+            assert trades["quantity"].to_numpy() == pytest.approx(expected["quantity"].to_numpy(), abs=1e-9)
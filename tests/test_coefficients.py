@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+from bess_intra_trading.benchmark import make_cases
+from bess_intra_trading.model import build_objective_coefficients, calculate_discounted_price
+
+
+def loop_coefficients(prices_qh, execution_time, threshold, threshold_abs_min, discount_rate, prev_net_trades, e=0.01):
+    """Sell and buy coefficients of the per-product loop solve_intrinsic_problem used before vectorizing."""
+    sell = {}
+    buy = {}
+    for i in prices_qh.index:
+        raw = prices_qh.loc[i, "price"]
+        if pd.isna(raw):
+            continue
+
+        price = round(raw, 2)
+        price_sell = round(calculate_discounted_price(raw, execution_time, i, discount_rate), 2)
+        price_buy = round(calculate_discounted_price(raw, execution_time, i, -discount_rate), 2)
+        spread = max(abs((threshold / 100) * abs(price)), threshold_abs_min) / 2
+
+        if prev_net_trades.loc[i, "net_buy"] < e and prev_net_trades.loc[i, "net_sell"] < e:
+            sell[i] = price_sell - spread - e
+            buy[i] = price_buy + spread + e
+        else:
+            sell[i] = price - e
+            buy[i] = price
+
+    return pd.Series(sell, dtype=float), pd.Series(buy, dtype=float)
+
+
+@pytest.fixture(scope="module")
+def cases():
+    return make_cases(20, seed=1)
+
+
+@pytest.mark.parametrize("k", range(20))
+def test_vectorized_coefficients_match_loop(cases, k):
+    case = cases[k]
+    args = (
+        case["prices_qh"],
+        case["execution_time"],
+        case["threshold"],
+        case["threshold_abs_min"],
+        case["discount_rate"],
+        case["prev_net_trades"],
+    )
+
+    coefficients = build_objective_coefficients(*args)
+    sell, buy = loop_coefficients(*args)
+
+    priced = ~coefficients.nan_mask
+    assert list(case["prices_qh"].index[priced]) == list(sell.index)
+    assert coefficients.sell[priced] == pytest.approx(sell.to_numpy(), abs=1e-12)
+    assert coefficients.buy[priced] == pytest.approx(buy.to_numpy(), abs=1e-12)
+
+
+def test_discount_applies_beyond_one_hour_only():
+    index = pd.date_range("2022-01-02", periods=4, freq="60min")
+    prices_qh = pd.DataFrame({"price": [50.0, -20.0, 80.0, np.nan]}, index=index)
+    prev_net_trades = pd.DataFrame(0.0, index=index, columns=["sum_buy", "sum_sell", "net_buy", "net_sell"])
+
+    coefficients = build_objective_coefficients(
+        prices_qh, pd.Timestamp("2022-01-01 23:30"), 0, 0, 3, prev_net_trades
+    )
+
+    # 30 minutes to delivery, undiscounted
+    assert coefficients.price_sell[0] == 50.0
+    # discounting makes selling and buying less attractive, for negative prices too
+    assert coefficients.price_sell[1] < -20.0
+    assert coefficients.price_sell[2] < 80.0
+    assert coefficients.price_buy[1] > -20.0
+    assert coefficients.price_buy[2] > 80.0
+    assert coefficients.nan_mask.tolist() == [False, False, False, True]
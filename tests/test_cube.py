@@ -0,0 +1,79 @@
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+from bess_intra_trading.cube import (
+    CUBE_ARRAYS, PriceCube, SharedPriceCube, build_price_cube, open_price_cube
+)
+
+
+START_DATE, END_DATE = pd.Timestamp("2022-01-02"), pd.Timestamp("2022-01-04")
+LOOKBACK = pd.Timedelta(hours=8)
+
+
+@pytest.fixture(scope="module")
+def cube_path(market, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("cube"))
+    build_price_cube(market, path, START_DATE, END_DATE, dt=15, lookback_h=8, sides=("BUY", "SELL"))
+    return path
+
+
+@pytest.mark.parametrize("side", ["BUY", "SELL"])
+def test_cube_matches_source_market_day(market, cube_path, side):
+    cube = PriceCube(cube_path)
+
+    for day in pd.date_range(START_DATE, END_DATE):
+        trading_start, trading_end = day - LOOKBACK, day + pd.Timedelta(days=1)
+        expected = market.market_day(side, trading_start, trading_end, 15)
+        market_day = cube.market_day(trading_start, trading_end, side)
+
+        assert market_day.execution_times.equals(expected.execution_times)
+        assert market_day.products.equals(expected.products)
+        assert market_day.count.sum() > 0
+        for min_trades in (1, 3):
+            for execution_time in expected.execution_times[::9]:
+                pd.testing.assert_frame_equal(
+                    market_day.average_prices(execution_time, min_trades),
+                    expected.average_prices(execution_time, min_trades),
+                )
+
+
+def test_cube_rejects_other_days(cube_path):
+    cube = PriceCube(cube_path)
+    day = END_DATE + pd.Timedelta(days=1)
+
+    with pytest.raises(ValueError):
+        cube.market_day(day - LOOKBACK, day + pd.Timedelta(days=1))
+    with pytest.raises(ValueError):
+        cube.market_day(START_DATE - pd.Timedelta(hours=4), START_DATE + pd.Timedelta(days=1))
+
+
+def _worker_prices(spec):
+    """Average prices of the first trading day read by a worker attached to a shared cube."""
+    cube = open_price_cube(spec)
+    day = START_DATE
+    market_day = cube.market_day(day - LOOKBACK, day + pd.Timedelta(days=1), "BUY")
+    return market_day.average_prices(market_day.execution_times[-1])
+
+
+def test_shared_cube_round_trip(cube_path):
+    cube = PriceCube(cube_path)
+    shared = SharedPriceCube.publish(cube)
+    day = START_DATE
+    expected = cube.market_day(day - LOOKBACK, day + pd.Timedelta(days=1), "BUY")
+
+    try:
+        attached = SharedPriceCube(shared.spec)
+        for name in CUBE_ARRAYS:
+            np.testing.assert_array_equal(attached.arrays[name], cube.arrays[name])
+            assert not attached.arrays[name].flags.writeable
+        attached.close()
+
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            prices = pool.submit(_worker_prices, shared.spec).result()
+        pd.testing.assert_frame_equal(prices, expected.average_prices(expected.execution_times[-1]))
+    finally:
+        shared.unlink()
+
+    with pytest.raises(FileNotFoundError):
+        SharedPriceCube(shared.spec)
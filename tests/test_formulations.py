@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+from bess_intra_trading.benchmark import ENGINES, make_cases, run_benchmark
+from bess_intra_trading.milp import BatteryModelTemplate
+from bess_intra_trading.model import build_objective_coefficients, solve_intrinsic_problem
+
+
+MILP_ENGINES = ["cbc", "cbc-compact", "highs", "highs-compact", "highs-compact-lp"]
+
+
+@pytest.fixture(scope="module")
+def cases():
+    return make_cases(30, seed=0)
+
+
+@pytest.fixture(scope="module")
+def objectives(cases):
+    _, per_case = run_benchmark(cases, MILP_ENGINES, reference="cbc")
+    return per_case.pivot(index="case", columns="engine", values="objective")
+
+
+def test_benchmark_engines_are_known():
+    assert set(MILP_ENGINES) <= set(ENGINES)
+
+
+@pytest.mark.parametrize("engine", MILP_ENGINES[1:])
+def test_formulations_reach_the_same_objective(objectives, engine):
+    reference = objectives["cbc"]
+    solved = reference.notna()
+
+    assert solved.sum() > 0
+    assert objectives.loc[solved, engine].notna().all()
+    assert objectives.loc[solved, engine].to_numpy() == pytest.approx(reference[solved].to_numpy(), abs=1e-5)
+
+
+def test_compact_template_bounds_net_positions_by_power(cases):
+    case = cases[1]
+    template = BatteryModelTemplate(
+        case["prices_qh"].index, case["cap"], case["c_rate"], case["roundtrip_eff"], formulation="compact"
+    )
+    coefficients = build_objective_coefficients(
+        case["prices_qh"].copy(),
+        case["execution_time"],
+        case["threshold"],
+        case["threshold_abs_min"],
+        case["discount_rate"],
+        case["prev_net_trades"],
+        e=0.01,
+    )
+    template.update(
+        coefficients,
+        case["prev_net_trades"]["net_buy"].to_numpy(dtype=float),
+        case["prev_net_trades"]["net_sell"].to_numpy(dtype=float),
+        case["max_cycles"],
+    )
+
+    values = template.values(template.solve("highs"))
+    power = case["cap"] * case["c_rate"]
+
+    assert np.all(values["net_buy"] <= power + 1e-9)
+    assert np.all(values["net_sell"] <= power + 1e-9)
+    assert "z" not in values and "w" not in values
+
+
+def solve_or_nan(case, **kwargs):
+    try:
+        return solve_intrinsic_problem(**dict(case, prices_qh=case["prices_qh"].copy()), **kwargs)[2]
+    except ValueError:
+        return np.nan
+
+
+def test_template_patches_one_cbc_problem(cases):
+    params = dict(c_rate=0.5, roundtrip_eff=0.9)
+    template = BatteryModelTemplate(cases[0]["prices_qh"].index, 1, formulation="standard", **params)
+
+    patched = []
+    fresh = []
+    problems = set()
+    for case in cases[:12]:
+        case = dict(case, **params)
+        patched.append(solve_or_nan(case, solver="cbc", template=template))
+        fresh.append(solve_or_nan(case, solver="highs", formulation="compact"))
+        problems.add(id(template._pulp.problem))
+
+    assert np.isnan(fresh).sum() < len(fresh)
+    assert patched == pytest.approx(fresh, abs=1e-5, nan_ok=True)
+
+    # products gaining and losing their price only change right-hand sides
+    assert len(problems) == 1
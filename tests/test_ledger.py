@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+from bess_intra_trading.ledger import TRADE_COLUMNS, TradeLedger
+
+
+PRODUCTS = pd.date_range("2022-01-02", periods=24, freq="60min")
+
+
+def step_frame(execution_time, buy, sell, price):
+    """Trades of one step as a DataFrame, row by row as simulate collected them before the ledger."""
+    rows = []
+    for i, product in enumerate(PRODUCTS):
+        if buy[i] > 0:
+            rows.append([execution_time, "buy", buy[i], price[i], product, -buy[i] * price[i]])
+        if sell[i] > 0:
+            rows.append([execution_time, "sell", sell[i], price[i], product, sell[i] * price[i]])
+
+    return pd.DataFrame(rows, columns=TRADE_COLUMNS)
+
+
+def random_steps(n_steps, seed=0):
+    rng = np.random.default_rng(seed)
+    for k in range(n_steps):
+        execution_time = pd.Timestamp("2022-01-01 16:00") + pd.Timedelta(minutes=15 * k)
+        buy = np.where(rng.random(24) < 0.2, rng.uniform(0, 0.5, 24), 0.0)
+        sell = np.where(rng.random(24) < 0.2, rng.uniform(0, 0.5, 24), 0.0)
+        price = rng.normal(80, 30, 24).round(2)
+        price[rng.random(24) < 0.05] = np.nan
+        yield execution_time, buy, sell, price
+
+
+@pytest.fixture(scope="module")
+def steps():
+    return list(random_steps(40))
+
+
+@pytest.fixture(scope="module")
+def ledger(steps):
+    # a small capacity makes the arrays grow several times
+    ledger = TradeLedger(capacity=2)
+    for execution_time, buy, sell, price in steps:
+        ledger.append_solution(execution_time, PRODUCTS, buy, sell, price)
+    return ledger
+
+
+@pytest.fixture(scope="module")
+def expected(steps):
+    return pd.concat([step_frame(*step) for step in steps], ignore_index=True)
+
+
+def test_frame_matches_concatenated_steps(ledger, expected):
+    assert len(ledger) == len(expected) > 2
+    pd.testing.assert_frame_equal(ledger.frame(), expected, check_dtype=False)
+
+
+def test_frame_from_start(ledger, expected):
+    start = len(expected) // 2
+    pd.testing.assert_frame_equal(
+        ledger.frame(start), expected.iloc[start:].reset_index(drop=True), check_dtype=False
+    )
+    assert ledger.frame(len(ledger)).empty
+
+
+def test_total_profit_skips_nan_as_pandas(ledger, expected):
+    assert expected["profit"].isna().any()
+    assert ledger.total_profit() == pytest.approx(expected["profit"].sum(), abs=1e-9)
+    assert ledger.total_profit(10) == pytest.approx(expected["profit"].iloc[10:].sum(), abs=1e-9)
+
+
+def test_extend_round_trips_frame(ledger, expected):
+    copy = TradeLedger()
+    copy.extend(ledger.frame())
+
+    pd.testing.assert_frame_equal(copy.frame(), expected, check_dtype=False)
+
+    copy.clear()
+    assert len(copy) == 0
+    assert copy.total_profit() == 0.0
@@ -0,0 +1,123 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+import pytest
+from bess_intra_trading.market import (
+    VwapAccumulator, accumulate_transactions, execution_windows, delivery_products, fetch_market_day,
+    fetch_minute_aggregates,
+)
+from bess_intra_trading.sources import InMemorySource
+from bess_intra_trading.utils import get_average_prices
+
+
+TRADING_END = pd.Timestamp("2022-01-03")
+TRADING_START = TRADING_END - pd.Timedelta(days=1, hours=8)
+DT = 15
+
+
+@pytest.fixture(scope="module")
+def wall_clock_transactions(transactions):
+    """The synthetic transactions in wall clock time, with trades exactly on window boundaries added."""
+    df = transactions.copy()
+    for column in ("executiontime", "deliverystart"):
+        df[column] = pd.to_datetime(df[column], utc=True).dt.tz_convert("Europe/Berlin").dt.tz_localize(None)
+
+    windows = execution_windows(TRADING_START, TRADING_END, DT)
+    boundary = pd.DataFrame(
+        {
+            "executiontime": windows[1::7],
+            "deliverystart": delivery_products(TRADING_END)[np.arange(len(windows[1::7])) % 24],
+            "price": np.linspace(20, 120, len(windows[1::7])),
+            "volume": 5.0,
+            "side": "BUY",
+            "product": "XBID_Hour_Power",
+        }
+    )
+
+    return pd.concat([df, boundary], ignore_index=True)
+
+
+@pytest.fixture(scope="module")
+def conn(wall_clock_transactions):
+    """SQLite copy of the transactions table, answering the SQL of get_average_prices."""
+    conn = sqlite3.connect(":memory:")
+    df = wall_clock_transactions.copy()
+    for column in ("executiontime", "deliverystart"):
+        df[column] = df[column].dt.strftime("%Y-%m-%d %H:%M:%S")
+    df.to_sql("transactions_intraday_de", conn, index=False)
+    conn.execute("CREATE INDEX idx_executiontime ON transactions_intraday_de (executiontime)")
+
+    yield conn
+    conn.close()
+
+
+@pytest.fixture(scope="module")
+def accumulator(wall_clock_transactions):
+    accumulator = VwapAccumulator(
+        execution_windows(TRADING_START, TRADING_END, DT), delivery_products(TRADING_END), DT
+    )
+    accumulator.add_transactions(wall_clock_transactions)
+    return accumulator
+
+
+def reference_prices(conn, window_starts, window_end, min_trades):
+    return [
+        get_average_prices(conn, "BUY", start, end, TRADING_END, min_trades)["price"].to_numpy(dtype=float)
+        for start, end in zip(window_starts, window_end)
+    ]
+
+
+def assert_prices_match(market_day, expected, min_trades):
+    for execution_time, price in zip(market_day.execution_times, expected):
+        actual = market_day.average_prices(execution_time, min_trades)["price"].to_numpy()
+        np.testing.assert_allclose(actual, price, rtol=1e-9, atol=1e-9)
+
+
+@pytest.mark.parametrize("min_trades", [1, 3])
+def test_market_day_matches_get_average_prices(conn, wall_clock_transactions, accumulator, min_trades):
+    windows = execution_windows(TRADING_START, TRADING_END, DT)
+    expected = reference_prices(conn, windows, windows + pd.Timedelta(minutes=DT), min_trades)
+
+    source = InMemorySource(wall_clock_transactions)
+    assert_prices_match(source.market_day("BUY", TRADING_START, TRADING_END, DT), expected, min_trades)
+    assert_prices_match(accumulator.market_day("BUY"), expected, min_trades)
+
+
+def test_cumulative_window_matches_get_average_prices(conn, accumulator):
+    windows = execution_windows(TRADING_START, TRADING_END, DT)
+    expected = reference_prices(conn, [TRADING_START] * len(windows), windows + pd.Timedelta(minutes=DT), 1)
+
+    assert_prices_match(accumulator.market_day("BUY", window="cumulative"), expected, 1)
+
+
+def test_sliding_window_matches_get_average_prices(conn, accumulator):
+    windows = execution_windows(TRADING_START, TRADING_END, DT)
+    first = windows[np.maximum(np.arange(len(windows)) - 3, 0)]
+    expected = reference_prices(conn, first, windows + pd.Timedelta(minutes=DT), 1)
+
+    assert_prices_match(accumulator.market_day("BUY", window="sliding", lookback=4), expected, 1)
+
+
+def test_fetch_market_day_passes_parameters(recording_conn):
+    fetch_market_day(recording_conn, "BUY", TRADING_START, TRADING_END, DT)
+
+    (query, params), = recording_conn.executed
+    windows = execution_windows(TRADING_START, TRADING_END, DT)
+    assert query.count("%s") == len(params) == 3 * len(windows) + 5
+    assert str(TRADING_END) not in query and "BUY" not in query
+    assert params[:3] == [0, str(windows[0]), str(windows[0] + pd.Timedelta(minutes=DT))]
+    assert params[-3:] == ["BUY", str(TRADING_END), str(delivery_products(TRADING_END)[0])]
+
+
+@pytest.mark.parametrize("fetch", [
+    lambda conn, sides: accumulate_transactions(conn, TRADING_START, TRADING_END, DT, sides=sides),
+    lambda conn, sides: fetch_minute_aggregates(conn, TRADING_END, sides=sides),
+])
+def test_transaction_queries_pass_parameters(recording_conn, fetch):
+    fetch(recording_conn, ("BUY", "SELL"))
+
+    (query, params), = recording_conn.executed
+    assert "side::text = ANY(%s)" in query
+    assert query.count("%s") == len(params) == 5
+    assert str(TRADING_END) not in query
+    assert params[2] == ["BUY", "SELL"]
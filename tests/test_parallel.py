@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+from bess_intra_trading.parallel import simulate_parallel
+from bess_intra_trading.strategy import RollingIntrinsicStrategy
+
+
+PARAMS = dict(
+    c_rate=0.5,
+    efficiency=0.86,
+    time_step_h=15,
+    max_cycles=100,
+    threshold=0,
+    threshold_abs_min=0,
+    discount_rate=0,
+    min_trades=1,
+    solver="highs",
+)
+
+
+def test_reconcile_matches_sequential_simulate(market, tmp_path):
+    start_date, end_date = pd.Timestamp("2022-01-01"), pd.Timestamp("2022-01-05")
+
+    sequential = RollingIntrinsicStrategy(dict(PARAMS, output_dir=str(tmp_path / "sequential"))).simulate(
+        market, start_date, end_date, 0.0
+    )
+    parallel = simulate_parallel(
+        dict(PARAMS, output_dir=str(tmp_path / "parallel")), market, start_date, end_date, processes=2
+    )
+
+    # with 100 cycles a year the first day leaves cycles to the second, whose budget needs a second pass
+    assert len(sequential) == 2
+    assert list(parallel["day"]) == list(sequential["day"])
+    assert parallel["profit"].to_numpy() == pytest.approx(sequential["profit"].to_numpy(), abs=1e-9)
+    assert parallel["cycles"].to_numpy() == pytest.approx(sequential["cycles"].to_numpy(), abs=1e-9)
+
+
+def test_reconcile_fails_without_enough_passes(market, tmp_path):
+    with pytest.raises(ValueError, match="not reconciled"):
+        simulate_parallel(
+            dict(PARAMS, output_dir=str(tmp_path)),
+            market,
+            pd.Timestamp("2022-01-01"),
+            pd.Timestamp("2022-01-05"),
+            processes=2,
+            max_passes=1,
+        )
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from bess_intra_trading.utils import NET_TRADE_COLUMNS, PositionTracker, get_net_trades
+
+
+END_DATE = pd.Timestamp("2022-01-03")
+
+
+def random_trades(rng, n):
+    """Trades on the hourly products of END_DATE's trading day, some of them off the product grid."""
+    products = pd.date_range("2022-01-01 22:00", periods=28, freq="60min")
+    return pd.DataFrame(
+        {
+            "side": rng.choice(["buy", "sell"], n),
+            "quantity": rng.uniform(0, 0.5, n).round(6),
+            "price": rng.normal(80, 20, n).round(2),
+            "product": products[rng.integers(len(products), size=n)],
+        }
+    )
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_position_tracker_matches_get_net_trades(seed):
+    rng = np.random.default_rng(seed)
+    positions = PositionTracker(END_DATE)
+    trades = []
+
+    for n in [0, 1, 5, 40, 0, 120]:
+        batch = random_trades(rng, n)
+        positions.add(batch)
+        trades.append(batch)
+
+        expected = get_net_trades(pd.concat(trades, ignore_index=True), END_DATE)
+        pd.testing.assert_index_equal(positions.net_trades.index, expected.index, check_names=False)
+        np.testing.assert_allclose(
+            positions.net_trades[NET_TRADE_COLUMNS].to_numpy(), expected[NET_TRADE_COLUMNS].to_numpy(), atol=1e-12
+        )
+
+
+def test_position_tracker_frame_keeps_its_point_in_time():
+    positions = PositionTracker(END_DATE)
+    before = positions.net_trades
+
+    product = pd.Timestamp("2022-01-02 05:00")
+    positions.add(pd.DataFrame({"side": ["buy", "sell"], "quantity": [0.5, 0.2], "product": [product, product]}))
+
+    assert before.to_numpy().sum() == 0
+    assert positions.net_trades.loc[product].tolist() == pytest.approx([0.5, 0.2, 0.3, 0.0])
+    assert positions.net_trades.drop(product).to_numpy().sum() == 0
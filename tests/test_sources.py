@@ -0,0 +1,66 @@
+import pandas as pd
+import pytest
+from bess_intra_trading.sources import InMemorySource, PostgresSource
+from bess_intra_trading.strategy import RollingIntrinsicStrategy
+
+
+def test_in_memory_source_reads_offsets_across_daylight_saving_time():
+    # Europe/Berlin timestamps switch from +01:00 to +02:00 on 2022-03-27
+    transactions = pd.DataFrame(
+        {
+            "executiontime": ["2022-03-26 10:00:00+01:00", "2022-03-28 10:00:00+02:00"],
+            "deliverystart": ["2022-03-26 12:00:00+01:00", "2022-03-28 12:00:00+02:00"],
+            "price": [50.0, 60.0],
+            "volume": [1.0, 2.0],
+            "side": ["BUY", "BUY"],
+            "product": ["XBID_Hour_Power", "XBID_Hour_Power"],
+        }
+    )
+
+    df = InMemorySource(transactions).transactions(
+        pd.Timestamp("2022-03-26"), pd.Timestamp("2022-03-29"), pd.Timestamp("2022-03-26"), pd.Timestamp("2022-03-29")
+    )
+
+    assert list(df["executiontime"]) == [pd.Timestamp("2022-03-26 10:00"), pd.Timestamp("2022-03-28 10:00")]
+    assert list(df["deliverystart"]) == [pd.Timestamp("2022-03-26 12:00"), pd.Timestamp("2022-03-28 12:00")]
+
+
+def test_in_memory_source_keeps_naive_wall_clock_times():
+    transactions = pd.DataFrame(
+        {
+            "executiontime": ["2022-03-26 10:00:00", "2022-03-28 10:00:00"],
+            "deliverystart": ["2022-03-26 12:00:00", "2022-03-28 12:00:00"],
+            "price": [50.0, 60.0],
+            "volume": [1.0, 2.0],
+            "side": ["BUY", "SELL"],
+            "product": ["XBID_Hour_Power", "XBID_Hour_Power"],
+        }
+    )
+
+    df = InMemorySource(transactions).transactions(
+        pd.Timestamp("2022-03-26"), pd.Timestamp("2022-03-29"), pd.Timestamp("2022-03-26"), pd.Timestamp("2022-03-29")
+    )
+
+    assert list(df["executiontime"]) == [pd.Timestamp("2022-03-26 10:00")]
+    assert list(df["price"]) == [50.0]
+
+
+def test_postgres_source_matches_sides_as_text(recording_conn):
+    # side is a trade_side enum in the compact schema, which does not compare with a text[] parameter
+    PostgresSource(recording_conn).transactions(
+        pd.Timestamp("2022-03-26"), pd.Timestamp("2022-03-27"), pd.Timestamp("2022-03-27"), pd.Timestamp("2022-03-28"),
+        sides=("BUY", "SELL"),
+    )
+
+    (query, params), = recording_conn.executed
+    assert "side::text = ANY(%s)" in query
+    assert query.count("%s") == len(params)
+    assert ["BUY", "SELL"] in params
+
+
+@pytest.mark.parametrize("params", [dict(time_step_h=10), dict(time_step_h=15, lookback_h=7.9)])
+def test_vwap_aggregates_need_bucket_aligned_windows(params):
+    with pytest.raises(ValueError, match="15 minute buckets"):
+        RollingIntrinsicStrategy(dict(params, vwap_aggregates=True))
+
+    RollingIntrinsicStrategy(dict(time_step_h=30, lookback_h=7.5, vwap_aggregates=True))
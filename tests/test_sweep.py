@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+from bess_intra_trading.strategy import RollingIntrinsicStrategy
+from bess_intra_trading.sweep import parameter_grid, run_sweep
+
+
+BASE = dict(
+    c_rate=0.5,
+    efficiency=0.86,
+    time_step_h=15,
+    max_cycles=365,
+    threshold=0,
+    threshold_abs_min=0,
+    discount_rate=0,
+    min_trades=1,
+    solver="highs",
+)
+
+
+@pytest.mark.parametrize("shared_memory", [False, True])
+def test_sweep_matches_direct_simulate(market, tmp_path, shared_memory):
+    start_date, end_date = pd.Timestamp("2022-01-01"), pd.Timestamp("2022-01-03")
+    scenarios = parameter_grid(BASE, {"c_rate": [0.5, 1]})
+
+    result = run_sweep(
+        market, scenarios, start_date, end_date, output_dir=str(tmp_path / "sweep"), processes=2,
+        shared_memory=shared_memory,
+    )
+
+    assert list(result.summary["scenario"]) == [0, 1]
+    for k, scenario in enumerate(scenarios):
+        expected = RollingIntrinsicStrategy(dict(scenario, output_dir=str(tmp_path / str(k)))).simulate(
+            market, start_date, end_date, 0.0
+        )
+        daily = result.daily[result.daily["scenario"] == k]
+
+        assert len(expected) == 1
+        assert list(daily["day"]) == list(expected["day"])
+        assert daily["c_rate"].tolist() == [scenario["c_rate"]]
+        assert daily["profit"].to_numpy() == pytest.approx(expected["profit"].to_numpy(), abs=1e-9)
+        assert daily["cycles"].to_numpy() == pytest.approx(expected["cycles"].to_numpy(), abs=1e-12)
+        assert result.summary["profit"].iloc[k] == pytest.approx(expected["profit"].sum(), abs=1e-9)
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+from bess_intra_trading.milp import highspy, warm_start_supported
+from bess_intra_trading.model import solve_intrinsic_problem
+from bess_intra_trading.strategy import RollingIntrinsicStrategy
+
+
+def rolling_step():
+    """
+    A rolling step of synthetic market data with the schedule of the previous
+    step as warm start, on which CBC's MIP start used to return a worse
+    objective than a cold solve.
+    """
+    index = pd.date_range("2022-01-02", periods=24, freq="60min")
+    price = np.full(24, np.nan)
+    price[:12] = [75.1594, 95.597, 82.5141, 77.0159, 88.1196, 98.82, np.nan, 111.88, 113.68, np.nan, 69.54, 78.41]
+
+    sum_buy = np.zeros(24)
+    sum_sell = np.zeros(24)
+    sum_buy[:10] = [1.503068, 1.0, 0.578328, 1.07, 0.5, 0.36, 0.581395, 0.43, 0.002638, 0.0]
+    sum_sell[:10] = [1.003068, 1.0, 0.5, 0.57, 0.5, 0.36, 0.5, 0.5, 0.43, 0.5]
+    prev_net_trades = pd.DataFrame(
+        {
+            "sum_buy": sum_buy,
+            "sum_sell": sum_sell,
+            "net_buy": np.maximum(sum_buy - sum_sell, 0),
+            "net_sell": np.maximum(sum_sell - sum_buy, 0),
+        },
+        index=index,
+    )
+
+    previous = pd.DataFrame(0.0, index=index, columns=[
+        "current_buy_qh", "current_sell_qh", "battery_soc", "net_buy", "net_sell", "charge_sign"
+    ])
+    previous.iloc[:10, 2] = [0.0, 0.463681, 0.463681, 0.536319, 1.0, 1.0, 1.0, 1.075483, 1.0, 0.539164]
+    previous.iloc[:10, 3] = [0.5, 0.0, 0.078328, 0.5, 0.0, 0.0, 0.081395, 0.0, 0.0, 0.0]
+    previous.iloc[:10, 4] = [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.07, 0.427362, 0.5]
+    previous.iloc[:10, 5] = [1.0, 0.0, 1.0, 1.0, 1.0, 1.0, 1.0, 0.0, 0.0, 0.0]
+
+    case = dict(
+        prices_qh=pd.DataFrame({"price": price}, index=index),
+        execution_time=pd.Timestamp("2022-01-01 23:15"),
+        cap=1,
+        c_rate=0.5,
+        roundtrip_eff=0.86,
+        max_cycles=365.0,
+        threshold=0,
+        threshold_abs_min=0,
+        discount_rate=0,
+        prev_net_trades=prev_net_trades,
+    )
+
+    return case, previous
+
+
+def solve(case, **kwargs):
+    case = dict(case, prices_qh=case["prices_qh"].copy(), prev_net_trades=case["prev_net_trades"].copy())
+    return solve_intrinsic_problem(**case, **kwargs)[2]
+
+
+@pytest.mark.parametrize("solver", ["cbc", "highs"])
+def test_warm_start_keeps_cold_objective(solver):
+    case, previous = rolling_step()
+
+    cold = solve(case, solver="highs", formulation="compact")
+    warm = solve(case, solver=solver, warm_start=previous)
+
+    assert warm == pytest.approx(cold, abs=1e-6)
+
+
+def test_warm_start_supported():
+    assert not warm_start_supported("cbc")
+    assert warm_start_supported("highs") == (highspy is not None)
+
+
+@pytest.mark.skipif(highspy is None, reason="needs highspy")
+def test_warm_start_status_from_highs():
+    case, previous = rolling_step()
+
+    warm_stats, cold_stats = {}, {}
+    solve(case, solver="highs", warm_start=previous, stats=warm_stats)
+    solve(case, solver="highs", stats=cold_stats)
+
+    assert warm_stats["warm_start_accepted"] is True
+    assert cold_stats["warm_start_accepted"] is False
+    assert isinstance(warm_stats["mip_node_count"], int)
+
+
+def test_warm_start_rejected_without_support():
+    with pytest.raises(ValueError, match="warm start"):
+        RollingIntrinsicStrategy(dict(solver="cbc", warm_start=True))